@@ -19,6 +19,7 @@
 
 import sys
 import os
+import argparse
 import os.path
 import errno
 import platform
@@ -36,7 +37,6 @@ from PyQt5.QtWidgets import (
     QSplashScreen,
 )
 from PyQt5.QtGui import QPixmap
-from PyQt5.QtQml import QQmlEngine, qmlRegisterSingletonType, qmlRegisterType
 import platformdirs
 
 # importing friture.exceptionhandler also installs a temporary exception hook
@@ -46,28 +46,16 @@ from friture.ui_friture import Ui_MainWindow
 from friture.about import About_Dialog  # About dialog
 from friture.settings import Settings_Dialog  # Setting dialog
 from friture.audiobuffer import AudioBuffer  # audio ring buffer class
-from friture.audiobackend import AudioBackend  # audio backend class
+from friture.audiobackend import AudioBackend, SAMPLING_RATE, FRAMES_PER_BUFFER  # audio backend class
+from friture.filesource import RAW_FORMATS
+from friture.syntheticsource import SIGNALS
 from friture.dockmanager import DockManager
 from friture.tilelayout import TileLayout
-from friture.level_view_model import LevelViewModel
-from friture.level_data import LevelData
 from friture.levels import Levels_Widget
-from friture.store import GetStore, Store
-from friture.scope_data import Scope_Data
-from friture.axis import Axis
-from friture.colorBar import ColorBar
-from friture.curve import Curve
 from friture.playback.control import PlaybackControlWidget
 from friture.playback.player import Player
-from friture.plotCurve import PlotCurve
-from friture.plotting.coordinateTransform import CoordinateTransform
-from friture.plotting.scaleDivision import ScaleDivision, Tick
-from friture.spectrogram_item import SpectrogramItem
-from friture.spectrogram_item_data import SpectrogramImageData
-from friture.spectrum_data import Spectrum_Data
-from friture.plotFilledCurve import PlotFilledCurve
-from friture.filled_curve import FilledCurve
 from friture.qml_tools import qml_url
+from friture.qml_types import qml_engine
 
 # the display timer could be made faster when the processing
 # power allows it, firing down to every 10 ms
@@ -92,35 +80,7 @@ class Friture(
         self.errorDialogOpened = False
         sys.excepthook = self.excepthook
 
-        store = GetStore()
-
-        # set the store as the parent of the QML engine
-        # so that the store outlives the engine
-        # otherwise the store gets destroyed before the engine
-        # which refreshes the QML bindings to undefined values
-        # and QML errors are raised
-        self.qml_engine = QQmlEngine(store)
-
-        # Register the ScaleDivision type.  Its URI is 'ScaleDivision', it's v1.0 and the type
-        # will be called 'Person' in QML.
-        qmlRegisterType(ScaleDivision, "Friture", 1, 0, "ScaleDivision")
-        qmlRegisterType(CoordinateTransform, "Friture", 1, 0, "CoordinateTransform")
-        qmlRegisterType(Scope_Data, "Friture", 1, 0, "ScopeData")
-        qmlRegisterType(Spectrum_Data, "Friture", 1, 0, "SpectrumData")
-        qmlRegisterType(LevelData, "Friture", 1, 0, "LevelData")
-        qmlRegisterType(LevelViewModel, "Friture", 1, 0, "LevelViewModel")
-        qmlRegisterType(Axis, "Friture", 1, 0, "Axis")
-        qmlRegisterType(Curve, "Friture", 1, 0, "Curve")
-        qmlRegisterType(FilledCurve, "Friture", 1, 0, "FilledCurve")
-        qmlRegisterType(PlotCurve, "Friture", 1, 0, "PlotCurve")
-        qmlRegisterType(PlotFilledCurve, "Friture", 1, 0, "PlotFilledCurve")
-        qmlRegisterType(SpectrogramItem, "Friture", 1, 0, "SpectrogramItem")
-        qmlRegisterType(SpectrogramImageData, "Friture", 1, 0, "SpectrogramImageData")
-        qmlRegisterType(ColorBar, "Friture", 1, 0, "ColorBar")
-        qmlRegisterType(Tick, "Friture", 1, 0, "Tick")
-        qmlRegisterSingletonType(
-            Store, "Friture", 1, 0, "Store", lambda engine, script_engine: GetStore()
-        )
+        self.qml_engine = qml_engine()
 
         # Setup the user interface
         self.ui = Ui_MainWindow()
@@ -130,11 +90,17 @@ class Friture(
         self.audiobuffer = AudioBuffer()
 
         # Initialize the audio backend
-        # signal containing new data from the audio callback thread, processed as numpy array
+        # signal containing new data from the audio capture thread, processed as numpy array
+        # (queued connection, the audio buffer is consumed in the GUI thread)
         AudioBackend().new_data_available.connect(self.audiobuffer.handle_new_data)
+        AudioBackend().sample_rate_changed.connect(self.audiobuffer.set_sample_rate)
+        self.audiobuffer.set_sample_rate(AudioBackend().get_sample_rate())
+        AudioBackend().channels_changed.connect(self.audiobuffer.set_channels)
+        self.audiobuffer.set_channels(AudioBackend().get_selected_channels())
 
         self.player = Player(self)
         self.audiobuffer.new_data_available.connect(self.player.handle_new_data)
+        self.audiobuffer.sample_rate_changed.connect(self.player.set_sample_rate)
 
         # this timer is used to update widgets that just need to display as fast as they can
         self.display_timer = QtCore.QTimer()
@@ -173,7 +139,9 @@ class Friture(
         # timer ticks
         self.display_timer.timeout.connect(self.dockmanager.canvasUpdate)
         self.display_timer.timeout.connect(self.level_widget.canvasUpdate)
-        self.display_timer.timeout.connect(AudioBackend().fetchAudioData)
+
+        # the audio data is drained by a dedicated thread, independently of the display timer
+        AudioBackend().start_capture()
 
         # toolbar clicks
         self.ui.actionStart.triggered.connect(self.timer_toggle)
@@ -298,6 +266,12 @@ class Friture(
 
         settings = QtCore.QSettings("Friture", "Friture")
 
+        # restore the audio settings first, so that the docks are restored
+        # with the right sample rate
+        settings.beginGroup("AudioBackend")
+        self.settings_dialog.restoreState(settings)
+        settings.endGroup()
+
         settings.beginGroup("Docks")
         self.dockmanager.restoreState(settings)
         settings.endGroup()
@@ -307,10 +281,6 @@ class Friture(
         self.restoreState(settings.value("windowState", type=QtCore.QByteArray))
         settings.endGroup()
 
-        settings.beginGroup("AudioBackend")
-        self.settings_dialog.restoreState(settings)
-        settings.endGroup()
-
     # slot
     def timer_toggle(self):
         if self.display_timer.isActive():
@@ -361,6 +331,36 @@ class StreamToLogger(object):
         pass
 
 
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="friture", description="Real-time audio analyzer")
+    parser.add_argument("--python", dest="profile", action="store_const", const="python", default="no",
+                        help="profile with cProfile, saved to friture.cprof")
+    parser.add_argument("--kcachegrind", dest="profile", action="store_const", const="kcachegrind",
+                        help="profile for KCacheGrind, saved to cachegrind.out.00000")
+    parser.add_argument("--no", dest="profile", action="store_const", const="no",
+                        help="do not profile (default)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--input-file", metavar="PATH",
+                        help="analyze a WAV or raw PCM file instead of the audio input device")
+    source.add_argument("--synthetic", choices=SIGNALS,
+                        help="analyze a generated test signal instead of the audio input device")
+    parser.add_argument("--raw-format", choices=RAW_FORMATS,
+                        help="sample format of a raw PCM input file (little-endian, interleaved)")
+    parser.add_argument("--rate", type=int, default=SAMPLING_RATE,
+                        help="sample rate of a raw PCM input file or of the test signal (default: %(default)d)")
+    parser.add_argument("--channels", type=int, default=1,
+                        help="channel count of a raw PCM input file or of the test signal (default: %(default)d)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the test signal noise generator (default: %(default)d)")
+    parser.add_argument("--block-size", type=int, default=FRAMES_PER_BUFFER,
+                        help="frames per block read from the file or test signal (default: %(default)d)")
+    parser.add_argument("--speed", type=float, default=1.,
+                        help="pace of the file or test signal, relative to real time (default: %(default)g)")
+    parser.add_argument("--free-run", action="store_true",
+                        help="read the file or test signal as fast as the analyzers can process it")
+    return parser.parse_known_args(argv)
+
+
 def main():
     # make the Python warnings go to Friture logger
     logging.captureWarnings(True)
@@ -449,21 +449,30 @@ def main():
     splash.showMessage("Initializing the audio subsystem")
     app.processEvents()
 
+    args, unknown_args = parse_args(sys.argv[1:])
+    if unknown_args:
+        logger.info("command-line arguments (%s) not recognized", unknown_args)
+
     window = Friture()
     window.show()
     splash.finish(window)
 
-    profile = "no"  # "python" or "kcachegrind" or anything else to disable
+    source_options = {"block_size": args.block_size, "speed": args.speed}
+    if args.input_file is not None:
+        try:
+            AudioBackend().open_file(args.input_file, free_run=args.free_run, raw_format=args.raw_format,
+                                     samplerate=args.rate, channels=args.channels, **source_options)
+        except (OSError, ValueError):
+            logger.exception("Failed to open the input file '%s'", args.input_file)
+    elif args.synthetic is not None:
+        try:
+            AudioBackend().open_synthetic(args.synthetic, channels=args.channels, samplerate=args.rate,
+                                          seed=args.seed, free_run=args.free_run, **source_options)
+        except ValueError:
+            logger.exception("Failed to start the synthetic input")
 
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--python":
-            profile = "python"
-        elif sys.argv[1] == "--kcachegrind":
-            profile = "kcachegrind"
-        elif sys.argv[1] == "--no":
-            profile = "no"
-        else:
-            logger.info("command-line arguments (%s) not recognized", sys.argv[1:])
+    # "python" or "kcachegrind" or anything else to disable
+    profile = args.profile
 
     return_code = 0
     if profile == "python":
@@ -19,17 +19,34 @@
 
 import logging
 import math
+import threading
+import time
 
 from PyQt5 import QtCore
 import sounddevice
 import rtmixer
-from numpy import ndarray, vstack, int8, int16, float64, float32, frombuffer, concatenate
-import numpy as np
+from numpy import ndarray, int16, float64, float32, frombuffer, empty, concatenate
 
-# the sample rate below should be dynamic, taken from PyAudio/PortAudio
+from friture.devicecatalog import DeviceCatalog
+from friture.filesource import FileSource
+from friture.syntheticsource import SyntheticSource
+
+# default sample rate, used until a stream is opened
+# the actual sample rate is dynamic, see AudioBackend().get_sample_rate()
 SAMPLING_RATE = 48000
+
+# the sample rates that can be selected, if the device supports them
+SAMPLE_RATES = [44100, 48000, 96000, 192000]
 FRAMES_PER_BUFFER = 512
 
+# how often the capture thread polls the rtmixer ringbuffer
+# (a fraction of the block duration, so that blocks are drained as soon as they arrive)
+CAPTURE_POLL_PERIOD_MS = 2
+
+# how many blocks from an input source can wait for the GUI thread
+# (in free-run mode, this is what throttles the source to the pace of the analyzers)
+MAX_PENDING_SOURCE_BLOCKS = 8
+
 __audiobackendInstance = None
 
 # python-sounddevice (bindings to PortAudio)
@@ -58,6 +75,64 @@ __audiobackendInstance = None
 # > doc, features are lacking
 
 
+def deinterleave_into(dest: ndarray, buf1, buf2, nchannels: int) -> ndarray:
+    """De-interleave the two ringbuffer read regions into the channel-major dest.
+
+    The read regions are viewed in place as (frames, channels) float32 arrays and
+    every captured channel is converted in one strided copy per region, straight
+    into the preallocated float64 destination. The second region is only
+    non-empty when the read wraps around the end of the ringbuffer.
+    """
+    region1 = frombuffer(buf1, dtype=float32).reshape(-1, nchannels)
+    region2 = frombuffer(buf2, dtype=float32).reshape(-1, nchannels)
+    n1 = region1.shape[0]
+    n2 = region2.shape[0]
+
+    dest[:nchannels, :n1] = region1.T
+    if n2 > 0:
+        dest[:nchannels, n1:n1 + n2] = region2.T
+
+    return dest[:nchannels, :n1 + n2]
+
+
+def batch_blocks(blocks, samplerate):
+    """Concatenate consecutive (floatdata, input_time, input_overflow) blocks.
+
+    The input time of a block is the time at its end, so a batch takes the time
+    of its last block. The blocks are only merged when they are contiguous in
+    time and have the same channel count, so that the time of every sample
+    can still be derived from the batch time.
+    """
+    batches = []
+    group = []
+
+    for block in blocks:
+        if group:
+            floatdata, input_time, input_overflow = block
+            previous_data, previous_time, previous_overflow = group[-1]
+            expected_time = previous_time + floatdata.shape[1] / samplerate
+            contiguous = abs(input_time - expected_time) < 0.5 / samplerate
+            if not contiguous or floatdata.shape[0] != previous_data.shape[0]:
+                batches.append(merge_blocks(group))
+                group = []
+        group.append(block)
+
+    if group:
+        batches.append(merge_blocks(group))
+
+    return batches
+
+
+def merge_blocks(group):
+    if len(group) == 1:
+        return group[0]
+
+    floatdata = concatenate([block[0] for block in group], axis=1)
+    input_time = group[-1][1]
+    input_overflow = any(block[2] for block in group)
+    return floatdata, input_time, input_overflow
+
+
 def AudioBackend():
     global __audiobackendInstance
     if __audiobackendInstance is None:
@@ -69,6 +144,12 @@ class __AudioBackend(QtCore.QObject):
 
     underflow = QtCore.pyqtSignal()
     new_data_available = QtCore.pyqtSignal(ndarray, float, bool)
+    blocks_pending = QtCore.pyqtSignal()
+    sample_rate_changed = QtCore.pyqtSignal(int)
+    # the captured channels that the widgets should look at
+    channels_changed = QtCore.pyqtSignal(tuple)
+    # emitted from the probing thread when the device formats are known
+    device_formats_probed = QtCore.pyqtSignal()
 
     def __init__(self):
         QtCore.QObject.__init__(self)
@@ -79,9 +160,8 @@ class __AudioBackend(QtCore.QObject):
 
         self.logger.info("Initializing audio backend")
 
-        # look for devices
-        self.input_devices = self.get_input_devices()
-        self.output_devices = self.get_output_devices()
+        # look for devices, their formats are probed later
+        self.devices = DeviceCatalog(on_probed=self.device_formats_probed.emit)
 
         self.logger.info(f"Found {len(self.input_devices)} input devices and {len(self.output_devices)} output devices")
 
@@ -93,6 +173,23 @@ class __AudioBackend(QtCore.QObject):
         self.ringBuffer = None
         self.action = None
         self.nchannels_max = 0
+        self.samplerate = SAMPLING_RATE
+
+        # an input source (e.g. a file) replaces the input stream when set
+        self.source = None
+        self.source_free_run = False
+        self.source_block_size = FRAMES_PER_BUFFER
+        self.source_speed = 1.
+        self.source_paused = False
+        self.source_start_clock = 0.
+
+        # blocks drained by the capture thread, waiting to be delivered in the GUI thread
+        self.pending_lock = threading.Lock()
+        self.pending_blocks = []
+        self.pending_frames = 0
+        self.delivery_scheduled = False
+        # queued connection, since the signal is emitted from the capture thread
+        self.blocks_pending.connect(self.deliver_blocks)
 
         # we will try to open all the input devices until one
         # works, starting by the default input device
@@ -106,6 +203,9 @@ class __AudioBackend(QtCore.QObject):
             except Exception:
                 self.logger.exception("Failed to open stream")
 
+        # now that the stream is running, find the formats of all the devices
+        self.devices.start_probing()
+
         if self.device is not None:
             self.first_channel = 0
             nchannels = self.get_current_device_nchannels()
@@ -121,65 +221,37 @@ class __AudioBackend(QtCore.QObject):
 
         self.devices_with_timing_errors = []
 
-    def close(self):
-        if self.stream is not None:
-            self.stream.stop()
-            self.stream = None
-
-    # method
-    def get_readable_devices_list(self):
-        input_devices = self.get_input_devices()
-
-        raw_devices = sounddevice.query_devices()
+        # protects the stream and ringbuffer, that are shared with the capture thread
+        self.lock = threading.RLock()
 
-        try:
-            default_input_device = sounddevice.query_devices(kind='input')
-            default_input_device['index'] = raw_devices.index(default_input_device)
-        except sounddevice.PortAudioError:
-            self.logger.exception("Failed to query the default input device")
-            default_input_device = None
-
-        devices_list = []
-        for device in input_devices:
-            api = sounddevice.query_hostapis(device['hostapi'])['name']
-
-            if default_input_device is not None and device['index'] == default_input_device['index']:
-                extra_info = ' (default)'
-            else:
-                extra_info = ''
+        # the capture thread drains the rtmixer ringbuffer independently of the GUI
+        self.capture_thread = AudioCaptureThread(self)
 
-            nchannels = device['max_input_channels']
+    def start_capture(self):
+        if not self.capture_thread.isRunning():
+            self.logger.info("Starting the capture thread")
+            self.capture_thread.start(QtCore.QThread.TimeCriticalPriority)
 
-            desc = "%s (%d channels) (%s) %s" % (device['name'], nchannels, api, extra_info)
+    def stop_capture(self):
+        if self.capture_thread.isRunning():
+            self.logger.info("Stopping the capture thread")
+            self.capture_thread.requestInterruption()
+            self.capture_thread.wait()
 
-            devices_list += [desc]
+    def close(self):
+        self.stop_capture()
+        with self.lock:
+            if self.stream is not None:
+                self.stream.stop()
+                self.stream = None
 
-        return devices_list
+    # method
+    def get_readable_devices_list(self):
+        return self.devices.readable_input_devices()
 
     # method
     def get_readable_output_devices_list(self):
-        output_devices = self.get_output_devices()
-
-        raw_devices = sounddevice.query_devices()
-        default_output_device = sounddevice.query_devices(kind='output')
-        default_output_device['index'] = raw_devices.index(default_output_device)
-
-        devices_list = []
-        for device in output_devices:
-            api = sounddevice.query_hostapis(device['hostapi'])['name']
-
-            if default_output_device is not None and device['index'] == default_output_device['index']:
-                extra_info = ' (default)'
-            else:
-                extra_info = ''
-
-            nchannels = device['max_output_channels']
-
-            desc = "%s (%d channels) (%s) %s" % (device['name'], nchannels, api, extra_info)
-
-            devices_list += [desc]
-
-        return devices_list
+        return self.devices.readable_output_devices()
 
     # method
     def get_default_input_device(self):
@@ -199,137 +271,243 @@ class __AudioBackend(QtCore.QObject):
 
         return index
 
+    # list of input devices, starting with the system default
+    @property
+    def input_devices(self):
+        return self.devices.input_devices
+
+    # list of output devices, starting with the system default
+    @property
+    def output_devices(self):
+        return self.devices.output_devices
+
     # method
-    # returns a list of input devices index, starting with the system default
-    def get_input_devices(self):
-        devices = sounddevice.query_devices()
+    # re-query the devices and probe their formats again, falling back to
+    # the first device that works when the current one is gone.
+    # Returns True if the current device was changed
+    def refresh_devices(self):
+        # the catalog waits for its probe thread and rescans the devices,
+        # the lock is only taken to swap the current device
+        self.devices.refresh()
+        with self.lock:
+            if self.device is None:
+                return False
+            device = self.devices.find_input_device(self.device)
+            if device is not None:
+                self.device = device
+                return False
 
-        # early exit if there is no input device. Otherwise query_devices(kind='input') fails
-        input_devices = [device for device in devices if device['max_input_channels'] > 0]
+        self.logger.warning("The current input device is not listed anymore, falling back to the default one")
+        for index in range(len(self.input_devices)):
+            success, _ = self.select_input_device(index)
+            if success:
+                return True
 
-        if len(input_devices) == 0:
-            return []
+        self.logger.error("No input device could be opened")
+        return True
 
-        try:
-            default_input_device = sounddevice.query_devices(kind='input')
-        except sounddevice.PortAudioError:
-            self.logger.exception("Failed to query the default input device")
-            default_input_device = None
-
-        input_devices = []
-        if default_input_device is not None:
-            # start by the default input device
-            default_input_device['index'] = devices.index(default_input_device)
-            input_devices += [default_input_device]
-
-        for device in devices:
-            # select only the input devices by looking at the number of input channels
-            if device['max_input_channels'] > 0:
-                device['index'] = devices.index(device)
-                # default input device has already been inserted
-                if default_input_device is not None and device['index'] != default_input_device['index']:
-                    input_devices += [device]
-
-        return input_devices
+    # method.
+    # The index parameter is the index in the self.input_devices list of devices !
+    # The return parameter is also an index in the same list.
+    def select_input_device(self, index):
+        with self.lock:
+            device = self.input_devices[index]
+
+            # save current stream in case we need to restore it
+            previous_stream = self.stream
+            previous_ringBuffer = self.ringBuffer
+            previous_action = self.action
+            previous_nchannels_max = self.nchannels_max
+            previous_device = self.device
+
+            self.logger.info("Trying to open input device #%d", index)
+
+            try:
+                (self.stream, self.ringBuffer, self.action, self.nchannels_max) = self.open_stream(device)
+                self.device = device
+                self.stream.start()
+                self.stream_start_time = self.stream.time
+                self.stream_read_index = 0
+                success = True
+            except Exception:
+                self.logger.exception("Failed to open input device")
+                success = False
+                if self.stream is not None:
+                    self.stream.stop()
+                # restore previous stream
+                self.stream = previous_stream
+                self.ringBuffer = previous_ringBuffer
+                self.action = previous_action
+                self.nchannels_max = previous_nchannels_max
+                self.device = previous_device
+
+            if success:
+                self.logger.info("Success")
+
+                if previous_stream is not None:
+                    previous_stream.stop()
+
+                # the device replaces any input source
+                self.source = None
+                self.discard_pending_blocks()
+
+                self.first_channel = 0
+                nchannels = self.device['max_input_channels']
+                if nchannels == 1:
+                    self.second_channel = 0
+                else:
+                    self.second_channel = 1
+
+        if success:
+            self.channels_changed.emit(self.get_selected_channels())
+
+        return success, self.devices.input_position(self.device)
 
     # method
-    # returns a list of output devices index, starting with the system default
-    def get_output_devices(self):
-        devices = sounddevice.query_devices()
+    # returns the actual sample rate, which is the previous one on failure
+    def select_sample_rate(self, samplerate):
+        if samplerate == self.samplerate:
+            return True, self.samplerate
 
-        default_output_device = sounddevice.query_devices(kind='output')
+        if self.source is not None:
+            self.logger.info("The sample rate of an input source cannot be changed")
+            return False, self.samplerate
 
-        output_devices = []
-        if default_output_device is not None:
-            # start by the default input device
-            default_output_device['index'] = devices.index(default_output_device)
-            output_devices += [default_output_device]
+        with self.lock:
+            previous_stream = self.stream
+            previous_ringBuffer = self.ringBuffer
+            previous_action = self.action
+            previous_samplerate = self.samplerate
 
-        for device in devices:
-            # select only the output devices by looking at the number of output channels
-            if device['max_output_channels'] > 0:
-                device['index'] = devices.index(device)
-                # default output device has already been inserted
-                if default_output_device is not None and device['index'] != default_output_device['index']:
-                    output_devices += [device]
+            self.logger.info("Trying to open the input device at %d Hz", samplerate)
 
-        return output_devices
+            try:
+                self.samplerate = samplerate
+                (self.stream, self.ringBuffer, self.action, self.nchannels_max) = self.open_stream(self.device)
+                self.stream.start()
+                self.stream_start_time = self.stream.time
+                self.stream_read_index = 0
+                success = True
+            except Exception:
+                self.logger.exception("Failed to open input device at %d Hz", samplerate)
+                success = False
+                if self.stream is not None and self.stream is not previous_stream:
+                    self.stream.stop()
+                # restore previous stream
+                self.stream = previous_stream
+                self.ringBuffer = previous_ringBuffer
+                self.action = previous_action
+                self.samplerate = previous_samplerate
+
+            if success:
+                self.logger.info("Success")
+                if previous_stream is not None:
+                    previous_stream.stop()
 
-    # method.
-    # The index parameter is the index in the self.input_devices list of devices !
-    # The return parameter is also an index in the same list.
-    def select_input_device(self, index):
-        device = self.input_devices[index]
+                self.discard_pending_blocks()
 
-        # save current stream in case we need to restore it
-        previous_stream = self.stream
-        previous_ringBuffer = self.ringBuffer
-        previous_action = self.action
-        previous_nchannels_max = self.nchannels_max
-        previous_device = self.device
+        if success:
+            self.sample_rate_changed.emit(self.samplerate)
 
-        self.logger.info("Trying to open input device #%d", index)
+        return success, self.samplerate
+
+    # method
+    # replaces the input stream by a source object that produces the data itself,
+    # with read(frames) returning channel-major float64 blocks (see FileSource
+    # and SyntheticSource)
+    # In free-run mode, the data is pushed as fast as the analyzers consume it,
+    # otherwise it is paced in real time, accelerated by the 'speed' factor.
+    def set_source(self, source, free_run=False, block_size=FRAMES_PER_BUFFER, speed=1.):
+        if source.samplerate not in SAMPLE_RATES:
+            raise ValueError("Unsupported sample rate: %d Hz" % (source.samplerate))
+        if block_size <= 0 or speed <= 0:
+            raise ValueError("The block size and the speed must be positive")
+
+        with self.lock:
+            self.logger.info("Using '%s' as input (%s, blocks of %d frames)", source.name,
+                             "free-run" if free_run else "real-time x%g" % (speed), block_size)
 
-        try:
-            (self.stream, self.ringBuffer, self.action, self.nchannels_max) = self.open_stream(device)
-            self.device = device
-            self.stream.start()
-            self.stream_start_time = self.stream.time
-            self.stream_read_index = 0
-            success = True
-        except Exception:
-            self.logger.exception("Failed to open input device")
-            success = False
             if self.stream is not None:
                 self.stream.stop()
-            # restore previous stream
-            self.stream = previous_stream
-            self.ringBuffer = previous_ringBuffer
-            self.action = previous_action
-            self.nchannels_max = previous_nchannels_max
-            self.device = previous_device
-
-        if success:
-            self.logger.info("Success")
 
-            if previous_stream is not None:
-                previous_stream.stop()
+            self.source = source
+            self.source_free_run = free_run
+            self.source_block_size = block_size
+            self.source_speed = speed
+            self.source_paused = False
+            self.source_start_clock = time.monotonic() - self.source.position / (source.samplerate * speed)
 
+            self.samplerate = source.samplerate
+            self.nchannels_max = source.nchannels
             self.first_channel = 0
-            nchannels = self.device['max_input_channels']
-            if nchannels == 1:
-                self.second_channel = 0
-            else:
-                self.second_channel = 1
+            self.second_channel = 1 if source.nchannels > 1 else 0
 
-        return success, self.input_devices.index(self.device)
+            # the blocks of the previous input have another format
+            self.discard_pending_blocks()
+
+        self.sample_rate_changed.emit(self.samplerate)
+        self.channels_changed.emit(self.get_selected_channels())
+
+    # method
+    def open_file(self, path, free_run=False, raw_format=None, samplerate=None, channels=None, **kwargs):
+        self.set_source(FileSource(path, raw_format, samplerate, channels), free_run, **kwargs)
+
+    # method
+    def open_synthetic(self, signal, channels=1, samplerate=SAMPLING_RATE, seed=0, free_run=False, **kwargs):
+        self.set_source(SyntheticSource(signal, channels, samplerate, seed), free_run, **kwargs)
+
+    # method
+    def get_sample_rate(self):
+        return self.samplerate
 
     # method
+    # returns the sample rates of SAMPLE_RATES that the device supports,
+    # or only the default one until the device formats have been probed
+    # (device_formats_probed is emitted then)
+    def get_supported_sample_rates(self, device):
+        formats = self.devices.supported_input_formats(device)
+        if formats is None:
+            return [SAMPLING_RATE]
+        return [samplerate for samplerate in SAMPLE_RATES if (samplerate, "float32") in formats]
+
+    # method
+    # every captured channel is kept in the buffers, so selecting a channel
+    # does not touch the stream
     def select_first_channel(self, index):
         self.first_channel = index
         success = True
+        self.channels_changed.emit(self.get_selected_channels())
         return success, self.first_channel
 
     # method
     def select_second_channel(self, index):
         self.second_channel = index
         success = True
+        self.channels_changed.emit(self.get_selected_channels())
         return success, self.second_channel
 
     # method
-    def open_stream(self, device):
-        self.log_supported_input_formats(device)
+    def get_selected_channels(self):
+        if self.first_channel is None:
+            return (0,)
+        if self.duo_input:
+            return (self.first_channel, self.second_channel)
+        return (self.first_channel,)
 
+    # method
+    def open_stream(self, device):
         self.logger.info("Opening the stream for device '%s'", device['name'])
 
         # by default we open the device stream with all the channels
         # (interleaved in the data buffer)
-        stream = rtmixer.Recorder(
-            device=device['index'],
-            channels=device['max_input_channels'],
-            blocksize=FRAMES_PER_BUFFER,
-            # latency=latency,
-            samplerate=SAMPLING_RATE)
+        # the catalog lock keeps the background format probes out of the way
+        with self.devices.lock:
+            stream = rtmixer.Recorder(
+                device=device['index'],
+                channels=device['max_input_channels'],
+                blocksize=FRAMES_PER_BUFFER,
+                # latency=latency,
+                samplerate=self.samplerate)
 
         sampleSize = 4  # the sample size in bytes (float32)
         nchannels_max = device['max_input_channels']  # the number of channels that we record
@@ -339,7 +517,7 @@ class __AudioBackend(QtCore.QObject):
         ringbufferSeconds = 3.
 
         # The number of elements in the buffer (must be a power of 2)
-        ringbufferSize = 2**int(math.log2(ringbufferSeconds * SAMPLING_RATE))
+        ringbufferSize = 2**int(math.log2(ringbufferSeconds * self.samplerate))
 
         ringBuffer = rtmixer.RingBuffer(elementSize, ringbufferSize)
 
@@ -351,32 +529,12 @@ class __AudioBackend(QtCore.QObject):
 
         return (stream, ringBuffer, action, nchannels_max)
 
-    def log_supported_input_formats(self, device):
-        samplerates = [22050, 44100, 48000, 96000]
-        dtypes = [float32, int16, int8]
-        supported_formats = []
-        for samplerate in samplerates:
-            for dtype in dtypes:
-                try:
-                    sounddevice.check_input_settings(
-                        device=device['index'],
-                        channels=device['max_input_channels'],
-                        dtype=dtype,
-                        extra_settings=None,
-                        samplerate=samplerate)
-                    supported_formats += [f"{samplerate} Hz, {np.dtype(dtype).name}"]
-                except Exception:
-                    pass # check_input_settings throws when the format is not supported
-
-        api = sounddevice.query_hostapis(device['hostapi'])['name']
-        self.logger.info(f"Supported formats for '{device['name']}' on '{api}': {supported_formats}")
-
     # method
     def open_output_stream(self, device, callback):
         # by default we open the device stream with all the channels
         # (interleaved in the data buffer)
         stream = sounddevice.OutputStream(
-            samplerate=SAMPLING_RATE,
+            samplerate=self.samplerate,
             blocksize=FRAMES_PER_BUFFER,
             device=device['index'],
             channels=device['max_output_channels'],
@@ -392,14 +550,14 @@ class __AudioBackend(QtCore.QObject):
             device=device['index'],
             channels=device['max_output_channels'],
             dtype=output_format,
-            samplerate=SAMPLING_RATE)
+            samplerate=self.samplerate)
 
     # method
     # return the index of the current input device in the input devices list
     # (not the same as the PortAudio index, since the latter is the index
     # in the list of *all* devices, not only input ones)
     def get_readable_current_device(self):
-        return self.input_devices.index(self.device)
+        return self.devices.input_position(self.device)
 
     # method
     def get_readable_current_channels(self):
@@ -430,65 +588,130 @@ class __AudioBackend(QtCore.QObject):
         return device['max_output_channels']
 
     def fetchAudioData(self):
-        if self.action is None or self.ringBuffer is None:
-            return
-
-        while self.ringBuffer.read_available >= FRAMES_PER_BUFFER:
-            read, buf1, buf2 = self.ringBuffer.get_read_buffers(FRAMES_PER_BUFFER)
-            assert read == FRAMES_PER_BUFFER
+        with self.lock:
+            if self.source is not None:
+                self.drain_source()
+            else:
+                self.drain_ringbuffer()
 
-            stream_time = self.get_stream_time()
+    # called with self.lock held
+    def drain_source(self):
+        if self.source_paused or self.source.exhausted():
+            return
 
-            buffer1 = frombuffer(buf1, dtype='float32')
-            buffer2 = frombuffer(buf2, dtype='float32')
-            buffer = concatenate((buffer1, buffer2)).astype(float64)
-            buffer.shape = -1, self.nchannels_max
-            self.ringBuffer.advance_read_index(FRAMES_PER_BUFFER)
+        if self.source_free_run:
+            # keep a bounded amount of data waiting for the analyzers, so that the
+            # source follows their pace
+            with self.pending_lock:
+                pending_frames = self.pending_frames
+            frames = MAX_PENDING_SOURCE_BLOCKS * self.source_block_size - pending_frames
+        else:
+            # in real-time mode, a block is only available once its last sample is due
+            elapsed = (time.monotonic() - self.source_start_clock) * self.source_speed
+            frames = int(elapsed * self.samplerate) - self.source.position
 
-            # ideally we would use the exact time of the samples retrieved from the ring buffer,
-            # but rtmixer does not provide it
-            self.stream_read_index += read
-            stream_read_time = self.stream_start_time + self.stream_read_index / SAMPLING_RATE
+        # whole blocks only, read in one go
+        frames -= frames % self.source_block_size
+        if frames <= 0:
+            return
 
-            # when starting a stream, it seems PortAudio gives us some data that is already in the buffer
-            # so the stream start time is actually older
-            # so we compensate here
-            if stream_read_time > stream_time and self.stream_read_index < 100000:
-                delta_seconds = stream_read_time - stream_time
-                self.stream_start_time -= delta_seconds
+        floatdata = self.source.read(frames)
 
-            if stream_read_time < stream_time - 100 * FRAMES_PER_BUFFER / SAMPLING_RATE:
-                self.logger.warning("Ringbuffer lagging behind: ringbuffer time = %f, stream time = %f", stream_read_time, stream_time)
+        # the timestamps derive from the sample index
+        source_time = self.source.position / self.samplerate
 
-            channel = self.get_current_first_channel()
-            if self.duo_input:
-                channel_2 = self.get_current_second_channel()
+        self.queue_block(floatdata, source_time, False)
 
-            floatdata1 = buffer[:, channel]
+        if self.source.exhausted():
+            self.logger.info("End of input source '%s'", self.source.name)
 
-            if self.duo_input:
-                floatdata2 = buffer[:, channel_2]
-                floatdata = vstack((floatdata1, floatdata2))
-            else:
-                floatdata = floatdata1
-                floatdata.shape = (1, floatdata.size)
+    # called with self.lock held
+    def drain_ringbuffer(self):
+        if self.action is None or self.ringBuffer is None:
+            return
 
-            input_overflows = self.action.stats.input_overflows
-            input_overflow = input_overflows > self.xruns
-            if input_overflow:
-                self.xruns = input_overflows
-                self.logger.info("Stream overflow!")
-                self.underflow.emit()
+        available = self.ringBuffer.read_available
+        if available < FRAMES_PER_BUFFER:
+            return
 
-            self.new_data_available.emit(floatdata, stream_read_time, input_overflow)
+        # drain everything that is available in one read, with a single timestamp
+        read, buf1, buf2 = self.ringBuffer.get_read_buffers(available)
+
+        stream_time = self.get_stream_time()
+
+        # the read regions must be consumed before the read index is advanced
+        # Note: a new destination is needed for each block, since the data is
+        # handed over to the GUI thread
+        # All the captured channels are kept, the channel selection is applied
+        # by the AudioBuffer views
+        floatdata = deinterleave_into(empty((self.nchannels_max, read), dtype=float64), buf1, buf2, self.nchannels_max)
+        self.ringBuffer.advance_read_index(read)
+
+        # ideally we would use the exact time of the samples retrieved from the ring buffer,
+        # but rtmixer does not provide it
+        self.stream_read_index += read
+        stream_read_time = self.stream_start_time + self.stream_read_index / self.samplerate
+
+        # when starting a stream, it seems PortAudio gives us some data that is already in the buffer
+        # so the stream start time is actually older
+        # so we compensate here
+        if stream_read_time > stream_time and self.stream_read_index < 100000:
+            delta_seconds = stream_read_time - stream_time
+            self.stream_start_time -= delta_seconds
+
+        if stream_read_time < stream_time - 100 * FRAMES_PER_BUFFER / self.samplerate:
+            self.logger.warning("Ringbuffer lagging behind: ringbuffer time = %f, stream time = %f", stream_read_time, stream_time)
+
+        input_overflows = self.action.stats.input_overflows
+        input_overflow = input_overflows > self.xruns
+        if input_overflow:
+            self.xruns = input_overflows
+            self.logger.info("Stream overflow!")
+            self.underflow.emit()
+
+        self.queue_block(floatdata, stream_read_time, input_overflow)
+
+    # called from the capture thread
+    # input_time is the stream time at the end of the block
+    def queue_block(self, floatdata, input_time, input_overflow):
+        with self.pending_lock:
+            self.pending_blocks.append((floatdata, input_time, input_overflow))
+            self.pending_frames += floatdata.shape[1]
+            # a single delivery is scheduled for all the blocks that pile up
+            # until the GUI thread gets to it
+            schedule = not self.delivery_scheduled
+            self.delivery_scheduled = True
+
+        if schedule:
+            self.blocks_pending.emit()
+
+        self.chunk_number += 1
 
-            self.chunk_number += 1
+    # method
+    def discard_pending_blocks(self):
+        with self.pending_lock:
+            self.pending_blocks = []
+            self.pending_frames = 0
+
+    # slot
+    # runs in the GUI thread, emits all the pending blocks as one batch
+    def deliver_blocks(self):
+        with self.pending_lock:
+            blocks = self.pending_blocks
+            self.pending_blocks = []
+            self.pending_frames = 0
+            self.delivery_scheduled = False
+
+        for floatdata, input_time, input_overflow in batch_blocks(blocks, self.samplerate):
+            self.new_data_available.emit(floatdata, input_time, input_overflow)
 
     def set_single_input(self):
         self.duo_input = False
+        self.channels_changed.emit(self.get_selected_channels())
 
     def set_duo_input(self):
         self.duo_input = True
+        self.channels_changed.emit(self.get_selected_channels())
 
     def get_stream_time(self) -> float:
         """The current stream time in seconds.
@@ -505,6 +728,11 @@ class __AudioBackend(QtCore.QObject):
         audio stream.
         """
 
+        if self.source is not None:
+            if self.source_free_run or self.source_paused:
+                return self.source.position / self.samplerate
+            return (time.monotonic() - self.source_start_clock) * self.source_speed
+
         if self.stream is None:
             return 0
 
@@ -517,11 +745,38 @@ class __AudioBackend(QtCore.QObject):
             return 0
 
     def pause(self):
-        if self.stream is not None:
-            self.stream.stop()
+        with self.lock:
+            if self.source is not None:
+                self.source_paused = True
+            elif self.stream is not None:
+                self.stream.stop()
 
     def restart(self):
-        if self.stream is not None:
-            self.stream.start()
-            self.stream_start_time = self.stream.time
-            self.stream_read_index = 0
+        with self.lock:
+            if self.source is not None:
+                self.source_paused = False
+                # resume the real-time pacing from the current position
+                self.source_start_clock = time.monotonic() - self.source.position / (self.samplerate * self.source_speed)
+            elif self.stream is not None:
+                self.stream.start()
+                self.stream_start_time = self.stream.time
+                self.stream_read_index = 0
+
+
+class AudioCaptureThread(QtCore.QThread):
+    """Drain the rtmixer ringbuffer (or the input source) as soon as data arrives, outside of the GUI thread.
+
+    The drained blocks are only queued in the backend's pending_blocks from this
+    thread, and blocks_pending wakes the GUI thread up. There, deliver_blocks
+    emits new_data_available for the queued blocks, so the capture never waits
+    for the receivers (AudioBuffer).
+    """
+
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            self.backend.fetchAudioData()
+            self.msleep(CAPTURE_POLL_PERIOD_MS)
@@ -19,26 +19,108 @@
 
 from PyQt5 import QtCore
 import numpy as np
-from friture.ringbuffer import RingBuffer
+from friture.ringbuffer import RingBufferReader, SharedRingBuffer
+from friture.stft import StftService, stft_service
+from friture.audiobackend import SAMPLING_RATE
 
 FRAMES_PER_BUFFER = 1024
 
 
+def channel_selector(channels):
+    """Index that picks the given channels out of a channel-major array.
+
+    Whenever possible a slice is returned, so that the selection is a view
+    of the ringbuffer rather than a copy."""
+    channels = tuple(channels)
+    if len(channels) == 1:
+        return slice(channels[0], channels[0] + 1)
+
+    step = channels[1] - channels[0]
+    is_progression = all(b - a == step for a, b in zip(channels[:-1], channels[1:]))
+    if step == 0 or not is_progression:
+        # e.g. the same channel twice, fancy indexing makes a copy
+        return list(channels)
+
+    stop = channels[-1] + step
+    return slice(channels[0], stop if stop >= 0 else None, step)
+
+
+class AudioBufferReader(RingBufferReader):
+    """Frame reader that returns the channels selected on an AudioBuffer."""
+
+    def __init__(self, audiobuffer, frame_size, hop, position=None):
+        super().__init__(audiobuffer.ringbuffer, frame_size, hop, position)
+        self.audiobuffer = audiobuffer
+
+    def frames(self, max_frames=None):
+        frames, times = super().frames(max_frames)
+        return frames[self.audiobuffer.selector], times
+
+
 class AudioBuffer(QtCore.QObject):
     new_data_available = QtCore.pyqtSignal(np.ndarray)
+    sample_rate_changed = QtCore.pyqtSignal(int)
+    channels_changed = QtCore.pyqtSignal(tuple)
 
     def __init__(self):
         super().__init__()
 
-        self.ringbuffer = RingBuffer()
+        # the ringbuffer stores every captured channel, the data accessors
+        # return views of the selected channels only
+        self.ringbuffer = SharedRingBuffer()
         self.newpoints = 0
         self.lastDataTime = 0.
+        self.sample_rate = SAMPLING_RATE
+        self.channels = (0,)
+        self.selector = channel_selector(self.channels)
+
+    def set_sample_rate(self, sample_rate: int) -> None:
+        """Publish a new stream sample rate to the widgets that use this buffer."""
+        if sample_rate != self.sample_rate:
+            self.sample_rate = sample_rate
+            self.ringbuffer.set_sample_rate(sample_rate)
+            self.sample_rate_changed.emit(sample_rate)
+
+    def set_channels(self, channels) -> None:
+        """Select the captured channels returned by the data accessors.
+
+        Switching channels neither reopens the stream nor resets the history,
+        since the ringbuffer keeps all the captured channels."""
+        channels = tuple(channels)
+        if channels != self.channels:
+            self.channels = channels
+            self.selector = channel_selector(channels)
+            self.channels_changed.emit(channels)
+
+    @property
+    def channel_count(self) -> int:
+        """Number of captured channels stored in the ringbuffer."""
+        return self.ringbuffer.buffer.shape[0]
+
+    def reserve(self, reader, length: int) -> None:
+        """Declare the longest window that 'reader' will ask for, so that the
+        ringbuffer is sized once for all the widgets."""
+        self.ringbuffer.reserve(reader, length)
+
+    def reader(self, frame_size: int, hop: int) -> AudioBufferReader:
+        """Create a cursor that returns the frames of the selected channels
+        that are ready, starting from the current position."""
+        return AudioBufferReader(self, frame_size, hop)
+
+    @property
+    def stft(self) -> StftService:
+        """The STFT service shared by all the widgets that read this buffer."""
+        return stft_service(self.ringbuffer)
+
+    def channel_data(self, channel: int, length: int) -> np.ndarray:
+        """View of the last 'length' samples of one captured channel."""
+        return self.ringbuffer.data(length)[channel]
 
     def data(self, length):
-        return self.ringbuffer.data(length)
+        return self.ringbuffer.data(length)[self.selector]
 
     def data_older(self, length, delay_samples):
-        return self.ringbuffer.data_older(length, delay_samples)
+        return self.ringbuffer.data_older(length, delay_samples)[self.selector]
 
     def newdata(self):
         return self.data(self.newpoints)
@@ -47,7 +129,7 @@ class AudioBuffer(QtCore.QObject):
         self.newpoints = newpoints
 
     def data_indexed(self, start, length):
-        return self.ringbuffer.data_indexed(start, length)
+        return self.ringbuffer.data_indexed(start, length)[self.selector]
     
     def data_time(self, start: int) -> float:
         """The stream time in seconds at the position defined by 'start'."""
@@ -56,5 +138,5 @@ class AudioBuffer(QtCore.QObject):
     def handle_new_data(self, floatdata: np.ndarray, input_time: float, status) -> None:
         self.ringbuffer.push(floatdata, input_time)
         self.set_newdata(floatdata.shape[1])
-        self.new_data_available.emit(floatdata)
+        self.new_data_available.emit(floatdata[self.selector])
         self.lastDataTime = input_time
@@ -19,8 +19,9 @@
 
 import logging
 
-from numpy import linspace, log10, cos, arange, pi
-from numpy.fft import rfft
+from numpy import linspace, log10, arange, empty, multiply, square, complex128, float64
+from friture.signal.fft import rfft
+from friture.signal.windows import DEFAULT_WINDOW, get_window, window_gains
 from friture.audiobackend import SAMPLING_RATE
 
 
@@ -29,16 +30,25 @@ class audioproc():
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
-        self.freq = linspace(0, SAMPLING_RATE / 2, 10)
+        self.sample_rate = SAMPLING_RATE
+        self.freq = linspace(0, self.sample_rate / 2, 10)
         self.A = 0. * self.freq
         self.B = 0. * self.freq
         self.C = 0. * self.freq
         self.maxfreq = 1.
+        self.window_name = DEFAULT_WINDOW
         self.window = arange(0, 1)
         self.size_sq = 1.
 
         self.fft_size = 10
 
+        # work arrays of analyze_frames, reused from one call to the next
+        self.windowed = None
+        self.fft = None
+        self.spectra = None
+        # complex FFT of the frames of the last analyze_frames() call
+        self.transforms = None
+
     def analyzelive(self, samples):
         # FFT for a linear transformation in frequency scale
         fft = rfft(samples * self.window)
@@ -46,6 +56,40 @@ class audioproc():
 
         return spectrum
 
+    def analyze_frames(self, frames):
+        """Power spectra of a (..., frames, fft_size) stack of frames, as (..., frames, fft_size // 2 + 1).
+
+        All the frames are windowed into one work array and transformed with a
+        single multi-row FFT. The returned array is overwritten by the next call.
+        """
+        self.reserve_frames(frames.shape)
+        n = frames.shape[-2]
+
+        windowed = self.windowed[..., :n, :]
+        fft = self.fft[..., :n, :]
+        spectra = self.spectra[..., :n, :]
+
+        multiply(frames, self.window, out=windowed)
+        rfft(windowed, axis=-1, out=fft)
+        self.transforms = fft
+
+        square(fft.real, out=spectra)
+        spectra += square(fft.imag)
+        spectra /= self.size_sq
+
+        return spectra
+
+    # the work arrays only grow, so that a varying number of frames does not reallocate them
+    def reserve_frames(self, shape):
+        leading, n, N = shape[:-2], shape[-2], shape[-1]
+        if self.windowed is not None and self.windowed.shape[:-2] == leading \
+                and self.windowed.shape[-1] == N and self.windowed.shape[-2] >= n:
+            return
+
+        self.windowed = empty(leading + (n, N), dtype=float64)
+        self.fft = empty(leading + (n, N // 2 + 1), dtype=complex128)
+        self.spectra = empty(leading + (n, N // 2 + 1), dtype=float64)
+
     def norm_square(self, fft):
         return (fft*fft.conjugate()).real / self.size_sq
 
@@ -64,6 +108,17 @@ class audioproc():
             self.update_window()
             self.update_size()
 
+    def set_window(self, window_name):
+        if window_name != self.window_name:
+            self.window_name = window_name
+            self.update_window()
+            self.update_size()
+
+    def set_sample_rate(self, sample_rate):
+        if sample_rate != self.sample_rate:
+            self.sample_rate = sample_rate
+            self.compute_freq_cache()
+
     def get_freq_scale(self):
         return self.freq
 
@@ -71,29 +126,34 @@ class audioproc():
         return self.A, self.B, self.C
 
     def update_size(self):
-        self.size_sq = float(self.fft_size) ** 2
+        # the levels are corrected for the coherent gain of the window relative
+        # to the Hann window, so that a tone keeps the same level with every
+        # window, and the Hann levels are unchanged
+        gain = window_gains(self.window_name, self.fft_size).coherent_gain
+        hann_gain = window_gains(DEFAULT_WINDOW, self.fft_size).coherent_gain
+        self.size_sq = (float(self.fft_size) * gain / hann_gain) ** 2
 
     def update_window(self):
-        N = self.fft_size
-        n = arange(0, N)
-        # Hann window : better frequency resolution than the rectangular window
-        self.window = 0.5 * (1. - cos(2 * pi * n / (N - 1)))
-        self.logger.info("audioproc: updating window")
+        # the windows are cached, switching back and forth costs nothing
+        self.window = get_window(self.window_name, self.fft_size)
 
     def update_freq_cache(self):
         if len(self.freq) != self.fft_size / 2 + 1:
-            self.logger.info("audioproc: updating self.freq cache")
-            self.freq = linspace(0, SAMPLING_RATE // 2, self.fft_size // 2 + 1)
-
-            # compute psychoacoustic weighting. See http://en.wikipedia.org/wiki/A-weighting
-            f = self.freq
-            Rc = 12200. ** 2 * f ** 2 / ((f ** 2 + 20.6 ** 2) * (f ** 2 + 12200. ** 2))
-            Rb = 12200. ** 2 * f ** 3 / ((f ** 2 + 20.6 ** 2) * (f ** 2 + 12200. ** 2) * ((f ** 2 + 158.5 ** 2) ** 0.5))
-            Ra = 12200. ** 2 * f ** 4 / ((f ** 2 + 20.6 ** 2) * (f ** 2 + 12200. ** 2) * ((f ** 2 + 107.7 ** 2) ** 0.5) * ((f ** 2 + 737.9 ** 2) ** 0.5))
-            eps = 1e-50
-            self.C = 0.06 + 20. * log10(Rc + eps)
-            self.B = 0.17 + 20. * log10(Rb + eps)
-            self.A = 2.0 + 20. * log10(Ra + eps)
+            self.compute_freq_cache()
+
+    def compute_freq_cache(self):
+        self.logger.info("audioproc: updating self.freq cache")
+        self.freq = linspace(0, self.sample_rate / 2, self.fft_size // 2 + 1)
+
+        # compute psychoacoustic weighting. See http://en.wikipedia.org/wiki/A-weighting
+        f = self.freq
+        Rc = 12200. ** 2 * f ** 2 / ((f ** 2 + 20.6 ** 2) * (f ** 2 + 12200. ** 2))
+        Rb = 12200. ** 2 * f ** 3 / ((f ** 2 + 20.6 ** 2) * (f ** 2 + 12200. ** 2) * ((f ** 2 + 158.5 ** 2) ** 0.5))
+        Ra = 12200. ** 2 * f ** 4 / ((f ** 2 + 20.6 ** 2) * (f ** 2 + 12200. ** 2) * ((f ** 2 + 107.7 ** 2) ** 0.5) * ((f ** 2 + 737.9 ** 2) ** 0.5))
+        eps = 1e-50
+        self.C = 0.06 + 20. * log10(Rc + eps)
+        self.B = 0.17 + 20. * log10(Rb + eps)
+        self.A = 2.0 + 20. * log10(Ra + eps)
 
     # above is done a FFT of the signal. This is ok for linear frequency scale, but
     # not satisfying for logarithmic scale, which is much more adapted to voice or music
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Micro-benchmarks of the processing paths, run with 'friture-bench'."""
+
+import argparse
+import sys
+import time
+
+import numpy
+
+from friture.signal import fft as fft_facade
+
+# the FFT sizes offered by the spectrum and spectrogram settings
+DEFAULT_FFT_SIZES = [2 ** k * 32 for k in range(0, 10)]
+DEFAULT_FRAMES = 4
+DEFAULT_DURATION_S = 0.2
+
+
+def time_transform(transform, x, duration_s):
+    """Seconds per call of transform(x), averaged over at least 'duration_s'."""
+    # warm up: plan creation and caches are not measured
+    transform(x)
+
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.
+    while elapsed < duration_s:
+        transform(x)
+        calls += 1
+        elapsed = time.perf_counter() - start
+
+    return elapsed / calls
+
+
+def bench_fft(sizes, frames, duration_s, out=sys.stdout):
+    """Measure the batched real FFT of each backend, like the spectrum widgets do it.
+
+    Returns {size: {backend name: seconds per batch}}.
+    """
+    names = fft_facade.available_backends()
+    rng = numpy.random.default_rng(0)
+
+    out.write("Batched real FFT of %d frames, in mega-samples per second\n" % (frames))
+    out.write("%10s" % ("size") + "".join("%12s" % (name) for name in names) + "\n")
+
+    results = {}
+    for size in sizes:
+        x = rng.standard_normal((frames, size))
+        results[size] = {}
+        line = "%10d" % (size)
+        for name in names:
+            backend = fft_facade.create_backend(name)
+            seconds = time_transform(lambda data: backend.rfft(data, axis=-1), x, duration_s)
+            results[size][name] = seconds
+            line += "%12.1f" % (frames * size / seconds / 1e6)
+        out.write(line + "\n")
+
+    wins = {}
+    for timings in results.values():
+        fastest = min(timings, key=timings.get)
+        wins[fastest] = wins.get(fastest, 0) + 1
+    best = max(wins, key=wins.get)
+    out.write("Fastest backend on this machine: %s (set %s=%s to force it)\n"
+              % (best, fft_facade.BACKEND_ENV_VARIABLE, best))
+
+    return results
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="friture-bench", description="Friture processing benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fft_parser = commands.add_parser("fft", help="compare the throughput of the FFT backends")
+    fft_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_FFT_SIZES,
+                            help="FFT sizes to measure (default: the sizes of the settings)")
+    fft_parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES,
+                            help="frames transformed per call (default: %(default)d)")
+    fft_parser.add_argument("--duration", type=float, default=DEFAULT_DURATION_S,
+                            help="seconds spent on each measure (default: %(default)g)")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.command == "fft":
+        bench_fft(args.sizes, args.frames, args.duration)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Constant-Q transform, computed with sparse spectral kernels on the shared STFT.
+
+The kernels follow J. C. Brown and M. S. Puckette, "An efficient algorithm
+for the calculation of a constant Q transform", JASA 92(5), 1992: the
+transform of a frame is the product of its FFT with the (sparse) FFT of the
+temporal kernels.
+
+The temporal kernels of the low octaves are long, so the low octaves are
+computed on the decimated STFT streams: each octave down halves the sample
+rate and keeps the same kernel lengths in samples.
+"""
+
+import logging
+from functools import lru_cache
+from math import ceil, floor, log2
+
+import numpy
+
+from friture.signal.fft import fft
+from friture.signal.windows import get_window
+from friture.stft import DECIMATION_PASSBAND, MAX_DECIMATION, FrameAligner
+
+# window of the temporal kernels
+KERNEL_WINDOW = "hann"
+# the spectral kernel values below this fraction of their peak are dropped
+KERNEL_THRESHOLD = 0.0054
+MIN_KERNEL_FFT_SIZE = 32
+# the lowest analyzed frequency, the kernels get too long below
+MIN_FREQUENCY = 10.
+
+# kernels of the recently used configurations
+KERNEL_CACHE_SIZE = 8
+
+
+def cqt_frequencies(bins_per_octave, fmin, fmax):
+    """Center frequencies of the bins, geometrically spaced from 'fmin' up to 'fmax'."""
+    count = int(floor(bins_per_octave * log2(fmax / fmin))) + 1
+    return fmin * 2. ** (numpy.arange(count) / bins_per_octave)
+
+
+def quality_factor(bins_per_octave):
+    return 1. / (2. ** (1. / bins_per_octave) - 1.)
+
+
+class SpectralKernel:
+    """Sparse spectral kernels of a group of bins, for frames of 'fft_size' samples at 'sample_rate'.
+
+    The kernels are stored as the rows of a CSR matrix: the non-zero values
+    of row i are values[indptr[i]:indptr[i + 1]], at the FFT bins given by
+    the same slice of indices.
+    """
+
+    def __init__(self, freqs, sample_rate, fft_size, quality, threshold=KERNEL_THRESHOLD):
+        self.freqs = freqs
+        self.fft_size = fft_size
+
+        indices = []
+        values = []
+        indptr = [0]
+        for f in freqs:
+            length = min(fft_size, int(ceil(quality * sample_rate / f)))
+
+            # the kernels end with the frame, so that all the bins describe
+            # the most recent samples
+            n = numpy.arange(length)
+            temporal = numpy.zeros(fft_size, dtype=complex)
+            temporal[fft_size - length:] = get_window(KERNEL_WINDOW, length) / length * numpy.exp(2j * numpy.pi * f * n / sample_rate)
+
+            # the frames are real, so the positive frequencies are enough
+            spectral = numpy.conj(fft(temporal)[:fft_size // 2 + 1]) / fft_size
+            magnitude = numpy.abs(spectral)
+            kept = numpy.flatnonzero(magnitude >= threshold * magnitude.max())
+
+            indices.append(kept)
+            values.append(spectral[kept])
+            indptr.append(indptr[-1] + len(kept))
+
+        self.indices = numpy.concatenate(indices)
+        self.values = numpy.concatenate(values)
+        self.indptr = numpy.array(indptr)
+
+    def apply(self, transforms):
+        """Power of the bins, as (frames, bins), from the unnormalized (frames, fft_size // 2 + 1) rfft of the frames."""
+        products = transforms[:, self.indices] * self.values
+        cq = numpy.add.reduceat(products, self.indptr[:-1], axis=1)
+        return cq.real ** 2 + cq.imag ** 2
+
+
+class OctaveKernel:
+    """The bins [bottom, top) of the transform, computed on the STFT decimated 'decimation' times."""
+
+    def __init__(self, decimation, bottom, top, kernel):
+        self.decimation = decimation
+        self.bottom = bottom
+        self.top = top
+        self.kernel = kernel
+
+
+@lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def octave_kernels(bins_per_octave, fmin, fmax, sample_rate, max_decimation):
+    """The kernels of the octaves below 'fmax', highest first.
+
+    Octave d is computed at sample_rate / 2 ** d, so all the octaves have
+    kernels of the same length. The octaves below 'max_decimation' share
+    the lowest sample rate and one longer kernel.
+    """
+    freqs = cqt_frequencies(bins_per_octave, fmin, fmax)
+    quality = quality_factor(bins_per_octave)
+
+    octaves = []
+    top = len(freqs)
+    decimation = 0
+    while top > 0:
+        if decimation < max_decimation:
+            bottom = int(numpy.searchsorted(freqs, fmax / 2 ** (decimation + 1), side='right'))
+        else:
+            bottom = 0
+
+        if bottom < top:
+            rate = sample_rate / 2 ** decimation
+            longest = int(ceil(quality * rate / freqs[bottom]))
+            fft_size = max(MIN_KERNEL_FFT_SIZE, 1 << (longest - 1).bit_length())
+            kernel = SpectralKernel(freqs[bottom:top], rate, fft_size, quality)
+            octaves.append(OctaveKernel(decimation, bottom, top, kernel))
+
+        top = bottom
+        decimation += 1
+
+    return tuple(octaves)
+
+
+class ConstantQTransform:
+    """Constant-Q spectrogram of one channel, with 'bins_per_octave' bins from 'fmin' to 'fmax'.
+
+    Each octave is a subscription to the STFT service, with unwindowed
+    frames (the kernels carry their windows) and the same hop, so that all
+    the octaves produce their columns at the same rate.
+    """
+
+    def __init__(self, service, channel, bins_per_octave, fmin, fmax, sample_rate, hop):
+        self.logger = logging.getLogger(__name__)
+
+        # the decimated octaves must stay inside the passband of the decimation filter
+        self.fmax = min(fmax, DECIMATION_PASSBAND * sample_rate / 2.)
+        self.fmin = min(max(fmin, MIN_FREQUENCY), self.fmax / 2.)
+        self.sample_rate = sample_rate
+        self.hop = hop
+        self.freqs = cqt_frequencies(bins_per_octave, self.fmin, self.fmax)
+
+        # the decimated hops must be whole
+        max_decimation = min(MAX_DECIMATION, int(log2(hop)))
+        self.octaves = octave_kernels(bins_per_octave, self.fmin, self.fmax, sample_rate, max_decimation)
+
+        self.subscriptions = [
+            service.subscribe(channel, octave.kernel.fft_size * 2 ** octave.decimation, hop,
+                              "rectangular", octave.decimation)
+            for octave in self.octaves]
+
+        # the long frames of the low octaves are complete later than the short ones
+        self.aligner = FrameAligner([octave.top - octave.bottom for octave in self.octaves],
+                                    0.5 * hop / sample_rate)
+
+        self.logger.info("Constant-Q transform: %d bins from %g Hz to %g Hz, %d octave streams",
+                         len(self.freqs), self.fmin, self.fmax, len(self.octaves))
+
+    def process(self):
+        """Return the power of the new columns, as (bins, columns), and the time of each column."""
+        for i, (octave, subscription) in enumerate(zip(self.octaves, self.subscriptions)):
+            transforms, times = subscription.transforms()
+            self.aligner.push(i, octave.kernel.apply(transforms), times)
+
+        power, times = self.aligner.pop()
+        columns = numpy.empty((len(self.freqs), len(times)))
+        for octave, octave_power in zip(self.octaves, power):
+            columns[octave.bottom:octave.top] = octave_power.T
+
+        return columns, times
+
+    def close(self):
+        for subscription in self.subscriptions:
+            subscription.close()
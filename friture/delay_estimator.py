@@ -22,7 +22,7 @@ import numpy
 
 from friture import generated_filters
 from .audiobackend import SAMPLING_RATE
-from .ringbuffer import RingBuffer
+from .ringbuffer import RingBuffer, RingBufferReader
 from .signal.decimate import decimate_multiple, decimate_multiple_filtic
 from .signal.correlation import generalized_cross_correlation
 
@@ -93,22 +93,19 @@ class Delay_Estimator_Widget(QtWidgets.QWidget):
         # (actually, I could fit a gaussian on the cross-correlation peak to get
         # higher resolution even at low sample rates)
         self.Ndec = 2
-        self.subsampled_sampling_rate = SAMPLING_RATE / 2 ** (self.Ndec)
+        self.sample_rate = SAMPLING_RATE
+        self.subsampled_sampling_rate = self.sample_rate / 2 ** (self.Ndec)
         [self.bdec, self.adec] = generated_filters.PARAMS['dec']
         self.bdec = numpy.array(self.bdec)
         self.adec = numpy.array(self.adec)
         self.zfs0 = decimate_multiple_filtic(self.Ndec, self.bdec, self.adec)
         self.zfs1 = decimate_multiple_filtic(self.Ndec, self.bdec, self.adec)
 
-        # ringbuffers for the subsampled data
-        self.ringbuffer0 = RingBuffer()
-        self.ringbuffer1 = RingBuffer()
-
         self.delayrange_s = DEFAULT_DELAYRANGE  # confidence range
 
-        self.old_Xcorr = None
+        self.reset_history()
 
-        self.old_index = 0
+        self.old_Xcorr = None
 
         self.two_channels = False
         self.delay_ms = 0.
@@ -119,6 +116,22 @@ class Delay_Estimator_Widget(QtWidgets.QWidget):
     # method
     def set_buffer(self, buffer):
         self.audiobuffer = buffer
+        self.audiobuffer.sample_rate_changed.connect(self.set_sample_rate)
+        self.set_sample_rate(self.audiobuffer.sample_rate)
+
+    # slot
+    def set_sample_rate(self, sample_rate):
+        if sample_rate == self.sample_rate:
+            return
+        self.sample_rate = sample_rate
+        self.subsampled_sampling_rate = self.sample_rate / 2 ** (self.Ndec)
+
+        # the subsampled history was recorded at the previous rate and
+        # cannot be correlated with the new data, so start over
+        self.zfs0 = decimate_multiple_filtic(self.Ndec, self.bdec, self.adec)
+        self.zfs1 = decimate_multiple_filtic(self.Ndec, self.bdec, self.adec)
+        self.reset_history()
+        self.old_Xcorr = None
 
     def handle_new_data(self, floatdata):
         if floatdata.shape[0] == 1:
@@ -138,30 +151,14 @@ class Delay_Estimator_Widget(QtWidgets.QWidget):
             self.ringbuffer0.push(x0_dec, 0)
             self.ringbuffer1.push(x1_dec, 0)
 
-            # we need to maintain an index of where we are in the buffer
-            index = self.ringbuffer0.offset
-            available = index - self.old_index
-
-            if available < 0:
-                # ringbuffer must have grown or something...
-                available = 0
-                self.old_index = index
-
-            time = 2 * self.delayrange_s
-            length = time * self.subsampled_sampling_rate
-            overlap = 0.5
-            needed = int(overlap * length)
-
-            realizable = int(available / needed)
-
-            for i in range(realizable):
-                self.old_index += needed
+            # the two buffers are pushed together, so the readers stay in step
+            frames0, times0 = self.reader0.frames()
+            frames1, times1 = self.reader1.frames()
 
+            for i in range(frames0.shape[1]):
                 # retrieve data
-                d0 = self.ringbuffer0.data_indexed(self.old_index, int(length))
-                d1 = self.ringbuffer1.data_indexed(self.old_index, int(length))
-                d0.shape = (d0.size)
-                d1.shape = (d1.size)
+                d0 = frames0[0, i]
+                d1 = frames1[0, i]
                 std0 = numpy.std(d0)
                 std1 = numpy.std(d1)
                 if std0 > 0. and std1 > 0.:
@@ -254,6 +251,26 @@ in the setup window."""
 
     def set_delayrange(self, delay_s):
         self.delayrange_s = delay_s
+        length, hop = self.correlation_frame()
+        self.reader0.set_frame(length, hop)
+        self.reader1.set_frame(length, hop)
+
+    # method
+    # the correlation window spans twice the delay range, with 50% overlap
+    def correlation_frame(self):
+        length = 2 * self.delayrange_s * self.subsampled_sampling_rate
+        return int(length), int(0.5 * length)
+
+    # method
+    def reset_history(self):
+        # ringbuffers for the subsampled data
+        self.ringbuffer0 = RingBuffer()
+        self.ringbuffer1 = RingBuffer()
+
+        # the first window ends one hop after the start
+        length, hop = self.correlation_frame()
+        self.reader0 = RingBufferReader(self.ringbuffer0, length, hop, position=hop)
+        self.reader1 = RingBufferReader(self.ringbuffer1, length, hop, position=hop)
 
     # slot
     def settings_called(self, checked):
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""On-disk cache of the input formats supported by the audio devices."""
+
+import json
+import logging
+import os
+import threading
+
+import platformdirs
+
+CACHE_FILE_NAME = "device_capabilities.json"
+
+# bumped when the probed formats change, so that stale caches are ignored
+CACHE_VERSION = 2
+
+
+def capability_key(device, api_name):
+    """Identify a device across runs: the PortAudio index is not stable, its name and host API are."""
+    return "%s|%s|%d" % (api_name, device['name'], device['max_input_channels'])
+
+
+class DeviceCapabilityCache:
+    """Supported input formats of each device, as lists of (samplerate, dtype name).
+
+    The cache is loaded once and written back explicitly with save(), so that
+    probing all the devices only costs a single write. It is safe to use from
+    the probing thread and the GUI thread at the same time.
+    """
+
+    def __init__(self, path=None):
+        self.logger = logging.getLogger(__name__)
+
+        if path is None:
+            path = os.path.join(platformdirs.user_cache_dir("Friture", ""), CACHE_FILE_NAME)
+
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = self.load()
+
+    def get(self, key):
+        with self.lock:
+            formats = self.entries.get(key)
+        if formats is None:
+            return None
+        return [(samplerate, dtype) for samplerate, dtype in formats]
+
+    def set(self, key, formats):
+        with self.lock:
+            self.entries[key] = [[samplerate, dtype] for samplerate, dtype in formats]
+
+    def invalidate(self):
+        self.logger.info("Invalidating the device capability cache")
+        with self.lock:
+            self.entries = {}
+        self.save()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                content = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            self.logger.exception("Failed to read the device capability cache, ignoring it")
+            return {}
+
+        if not isinstance(content, dict) or content.get("version") != CACHE_VERSION:
+            self.logger.info("Ignoring a device capability cache from another version")
+            return {}
+
+        return content.get("devices", {})
+
+    def save(self):
+        with self.lock:
+            content = {"version": CACHE_VERSION, "devices": dict(self.entries)}
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # write to a temporary file first, so that a concurrent run never
+            # reads a partial cache
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(content, f, indent=1)
+            os.replace(temp_path, self.path)
+        except OSError:
+            self.logger.exception("Failed to write the device capability cache")
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Catalog of the PortAudio devices, queried once and probed in the background."""
+
+import logging
+import threading
+
+import numpy as np
+import sounddevice
+
+from friture.devicecache import DeviceCapabilityCache, capability_key
+
+# the input formats that are probed for each device: the sample rates that
+# can be selected in the settings, with the float32 samples of the stream
+PROBED_SAMPLE_RATES = [44100, 48000, 96000, 192000]
+PROBED_DTYPES = [np.float32]
+
+
+class DeviceCatalog:
+    """The input and output devices, each list starting with the system default.
+
+    Querying PortAudio is done once, in scan(), instead of once per lookup.
+    Each device dict carries its PortAudio 'index', and the position of a
+    device in the input list is found through an index map.
+
+    Probing the formats supported by a device takes one PortAudio call per
+    format, which is slow on systems with many (virtual) devices, so it is
+    only done by a background thread and the results are cached on disk.
+    'on_probed' is called from that thread when it is done.
+    """
+
+    def __init__(self, cache=None, on_probed=None):
+        self.logger = logging.getLogger(__name__)
+
+        self.cache = DeviceCapabilityCache() if cache is None else cache
+        self.on_probed = on_probed
+
+        # serializes the format probes with the stream opening, since PortAudio
+        # is not meant to be used from several threads at once
+        self.lock = threading.Lock()
+
+        self.probe_thread = None
+        self.probe_abort = threading.Event()
+
+        self.scan()
+
+    def scan(self):
+        devices = sounddevice.query_devices()
+        self.hostapi_names = [hostapi['name'] for hostapi in sounddevice.query_hostapis()]
+
+        for index, device in enumerate(devices):
+            device['index'] = index
+
+        self.default_input_index = self.query_default_index(devices, 'input')
+        self.default_output_index = self.query_default_index(devices, 'output')
+
+        self.input_devices = self.sorted_devices(devices, 'max_input_channels', self.default_input_index)
+        self.output_devices = self.sorted_devices(devices, 'max_output_channels', self.default_output_index)
+
+        self.input_positions = {device['index']: position for position, device in enumerate(self.input_devices)}
+
+    def query_default_index(self, devices, kind):
+        # query_devices(kind=...) fails when there is no device of that kind
+        if not any(device['max_%s_channels' % (kind)] > 0 for device in devices):
+            return None
+
+        try:
+            default_device = sounddevice.query_devices(kind=kind)
+        except sounddevice.PortAudioError:
+            self.logger.exception("Failed to query the default %s device", kind)
+            return None
+
+        for device in devices:
+            if device['name'] == default_device['name'] and device['hostapi'] == default_device['hostapi']:
+                return device['index']
+
+        return None
+
+    # returns the devices that have channels of the given kind, starting with the default one
+    def sorted_devices(self, devices, channels_key, default_index):
+        selected = [device for device in devices if device[channels_key] > 0]
+        default = [device for device in selected if device['index'] == default_index]
+        others = [device for device in selected if device['index'] != default_index]
+        return default + others
+
+    def hostapi_name(self, device):
+        return self.hostapi_names[device['hostapi']]
+
+    # returns the position of an input device in the input devices list
+    # (not the same as the PortAudio index, since the latter is the index
+    # in the list of *all* devices, not only input ones)
+    def input_position(self, device):
+        return self.input_positions[device['index']]
+
+    # returns the input device that has the same PortAudio index and name, after a re-scan
+    # (the indexes are shifted when a device is removed)
+    def find_input_device(self, device):
+        position = self.input_positions.get(device['index'])
+        if position is None or self.input_devices[position]['name'] != device['name']:
+            return None
+        return self.input_devices[position]
+
+    def readable_input_devices(self):
+        return [self.readable_device(device, device['max_input_channels'], self.default_input_index)
+                for device in self.input_devices]
+
+    def readable_output_devices(self):
+        return [self.readable_device(device, device['max_output_channels'], self.default_output_index)
+                for device in self.output_devices]
+
+    def readable_device(self, device, nchannels, default_index):
+        if device['index'] == default_index:
+            extra_info = ' (default)'
+        else:
+            extra_info = ''
+
+        return "%s (%d channels) (%s) %s" % (device['name'], nchannels, self.hostapi_name(device), extra_info)
+
+    # returns the supported input formats of the device, as (samplerate, dtype name),
+    # or None if the device has not been probed yet, in which case it is
+    # probed in the background
+    def supported_input_formats(self, device):
+        formats = self.cache.get(capability_key(device, self.hostapi_name(device)))
+        if formats is None:
+            self.start_probing()
+        return formats
+
+    def probe_input_formats(self, device):
+        supported_formats = []
+        for samplerate in PROBED_SAMPLE_RATES:
+            for dtype in PROBED_DTYPES:
+                with self.lock:
+                    try:
+                        sounddevice.check_input_settings(
+                            device=device['index'],
+                            channels=device['max_input_channels'],
+                            dtype=dtype,
+                            extra_settings=None,
+                            samplerate=samplerate)
+                        supported_formats += [(samplerate, np.dtype(dtype).name)]
+                    except Exception:
+                        pass # check_input_settings throws when the format is not supported
+
+        self.logger.info("Supported formats for '%s' on '%s': %s",
+                         device['name'], self.hostapi_name(device), supported_formats)
+
+        return supported_formats
+
+    # probe the devices that are not in the cache, from a background thread
+    def start_probing(self):
+        if self.probe_thread is not None and self.probe_thread.is_alive():
+            return
+
+        devices = [device for device in self.input_devices
+                   if self.cache.get(capability_key(device, self.hostapi_name(device))) is None]
+
+        if len(devices) == 0:
+            return
+
+        self.logger.info("Probing the formats of %d input devices in the background", len(devices))
+        self.probe_thread = threading.Thread(target=self.probe_devices, args=(devices,), name="DeviceProbe", daemon=True)
+        self.probe_thread.start()
+
+    def probe_devices(self, devices):
+        for device in devices:
+            if self.probe_abort.is_set():
+                return
+
+            key = capability_key(device, self.hostapi_name(device))
+            if self.cache.get(key) is None:
+                self.cache.set(key, self.probe_input_formats(device))
+
+        self.cache.save()
+
+        if self.on_probed is not None:
+            self.on_probed()
+
+    # re-query the device list and forget the probed formats
+    def refresh(self):
+        self.logger.info("Refreshing the device catalog")
+        if self.probe_thread is not None:
+            # the thread stops after the device that it is probing
+            self.probe_abort.set()
+            self.probe_thread.join()
+            self.probe_abort.clear()
+        self.cache.invalidate()
+        self.scan()
+        self.start_probing()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Memory-mapped WAV and raw PCM reader, used as an input source by the audio backend."""
+
+import logging
+import os
+import struct
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# sample formats of headerless files, little-endian
+RAW_FORMATS = ["uint8", "int16", "int24", "int32", "float32", "float64"]
+
+
+class FileSource:
+    """Stream the samples of a WAV or raw PCM file, block by block.
+
+    The file is memory-mapped, so that only the blocks that are read are
+    actually loaded from disk. Each block is returned channel-major, as
+    float64 in [-1, 1], like the data drained from the input stream.
+    """
+
+    def __init__(self, path, raw_format=None, samplerate=None, channels=None):
+        self.logger = logging.getLogger(__name__)
+
+        self.path = path
+        self.name = os.path.basename(path)
+
+        if raw_format is None:
+            with open(path, "rb") as f:
+                sample_format, self.nchannels, self.samplerate, data_offset, data_size = parse_wav_header(f)
+        else:
+            if samplerate is None or channels is None:
+                raise ValueError("The sample rate and the channel count of a raw file must be given")
+            sample_format = raw_format
+            self.nchannels = channels
+            self.samplerate = samplerate
+            data_offset = 0
+            data_size = os.path.getsize(path)
+
+        if sample_format not in RAW_FORMATS:
+            raise ValueError("Unsupported sample format: %s" % (sample_format))
+
+        self.sample_format = sample_format
+        sample_size = 3 if sample_format == "int24" else np.dtype(sample_format).itemsize
+        frame_size = sample_size * self.nchannels
+
+        # streamed recordings often leave the data size unset, and the file
+        # may have been truncated, so the size is bounded by the file itself
+        data_size = min(data_size, os.path.getsize(path) - data_offset)
+        self.frames = data_size // frame_size
+
+        if self.frames == 0:
+            raise ValueError("No audio data in file: %s" % (path))
+
+        if sample_format == "int24":
+            self.data = np.memmap(path, dtype=np.uint8, mode="r", offset=data_offset, shape=(self.frames, self.nchannels, 3))
+        else:
+            self.data = np.memmap(path, dtype=np.dtype(sample_format).newbyteorder("<"), mode="r", offset=data_offset, shape=(self.frames, self.nchannels))
+
+        self.position = 0
+
+        self.logger.info("Opened '%s': %d channels, %d Hz, %s, %.1f s",
+                         self.name, self.nchannels, self.samplerate, sample_format, self.frames / self.samplerate)
+
+    def exhausted(self):
+        return self.position >= self.frames
+
+    def rewind(self):
+        self.position = 0
+
+    def read(self, frames):
+        """Return the next block of at most 'frames' frames, as a (channels, frames) array."""
+        start = self.position
+        stop = min(start + frames, self.frames)
+        self.position = stop
+        return to_float(self.data[start:stop], self.sample_format)
+
+
+def to_float(block, sample_format):
+    """Convert an interleaved (frames, channels) block to channel-major float64."""
+    if sample_format == "int24":
+        # assemble the little-endian bytes in the top of an int32, so that the
+        # sign is extended by the arithmetic shift
+        raw = block.astype(np.int32)
+        samples = (raw[:, :, 0] << 8 | raw[:, :, 1] << 16 | raw[:, :, 2] << 24) >> 8
+        return samples.T * (1. / 2 ** 23)
+    elif sample_format == "uint8":
+        return (block.T - 128.) * (1. / 128)
+    elif sample_format in ("float32", "float64"):
+        return block.T.astype(np.float64)
+    else:
+        return block.T * (1. / 2 ** (8 * block.dtype.itemsize - 1))
+
+
+def parse_wav_header(f):
+    """Find the format and the position of the samples in a RIFF/WAVE file.
+
+    Returns the sample format (one of RAW_FORMATS), the channel count, the
+    sample rate, and the offset and size of the data chunk in bytes.
+    """
+    riff, riff_size, wave = struct.unpack("<4sI4s", f.read(12))
+    if riff != b"RIFF" or wave != b"WAVE":
+        raise ValueError("Not a WAV file")
+
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("No data chunk in WAV file")
+
+        chunk_id, chunk_size = struct.unpack("<4sI", header)
+
+        if chunk_id == b"fmt ":
+            chunk = f.read(chunk_size)
+            format_tag, nchannels, samplerate, byte_rate_unused, block_align_unused, bits = struct.unpack("<HHIIHH", chunk[:16])
+            if format_tag == WAVE_FORMAT_EXTENSIBLE:
+                # the actual format is given by the first two bytes of the sub-format GUID
+                format_tag = struct.unpack("<H", chunk[24:26])[0]
+            fmt = (format_tag, nchannels, samplerate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk found before the format chunk")
+            format_tag, nchannels, samplerate, bits = fmt
+            return wav_sample_format(format_tag, bits), nchannels, samplerate, f.tell(), chunk_size
+        else:
+            f.seek(chunk_size, os.SEEK_CUR)
+
+        # chunks are word-aligned
+        if chunk_size % 2 == 1:
+            f.seek(1, os.SEEK_CUR)
+
+
+def wav_sample_format(format_tag, bits):
+    if format_tag == WAVE_FORMAT_PCM and bits in (8, 16, 24, 32):
+        return {8: "uint8", 16: "int16", 24: "int24", 32: "int32"}[bits]
+    elif format_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        return {32: "float32", 64: "float64"}[bits]
+    else:
+        raise ValueError("Unsupported WAV format: tag %d, %d bits" % (format_tag, bits))
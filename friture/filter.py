@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from numpy import arange, sqrt, zeros, array
-from friture_extensions.lfilter import pyx_lfilter_float64_1D
+from friture_extensions.lfilter import pyx_lfilter_float64_1D, pyx_lfilter_float64_2D
 from .signal.decimate import decimate
 
 NOCTAVE = 9
@@ -87,6 +87,14 @@ def octave_filter_bank_decimation(blow, alow, forward, feedback, x, zis):
     # specified by the forward and feedback parameters. Each row
     # of the forward and feedback parameters are the parameters
     # to the Matlab builtin function "filter".
+    # x can also be a channel-major (channels, samples) array, in which case
+    # all the channels go through the bank together (see the 'channels'
+    # argument of octave_filter_bank_decimation_filtic).
+    if x.ndim == 2:
+        lfilter = pyx_lfilter_float64_2D
+    else:
+        lfilter = pyx_lfilter_float64_1D
+
     bands_per_octave = len(forward)
     filter_count = NOCTAVE * bands_per_octave
 
@@ -102,7 +110,7 @@ def octave_filter_bank_decimation(blow, alow, forward, feedback, x, zis):
 
     for j in range(0, NOCTAVE):
         for i in range(0, bands_per_octave)[::-1]:
-            filt, zf = pyx_lfilter_float64_1D(forward[i], feedback[i], x_dec, zis[m])
+            filt, zf = lfilter(forward[i], feedback[i], x_dec, zis[m])
             m += 1
             # zf can be reused to restart the filter
             zfs += [zf]
@@ -117,16 +125,19 @@ def octave_filter_bank_decimation(blow, alow, forward, feedback, x, zis):
     return y, dec, zfs
 
 
-def octave_filter_bank_decimation_filtic(blow, alow, forward, feedback):
-    '''build a proper array of zero initial conditions to start the filters.'''
+def octave_filter_bank_decimation_filtic(blow, alow, forward, feedback, channels=None):
+    '''build a proper array of zero initial conditions to start the filters.
+
+    When 'channels' is given, the initial conditions are built for a
+    channel-major input with that many channels.'''
     bands_per_octave = len(forward)
     zfs = []
 
     for j in range(0, NOCTAVE):
         for i in range(0, bands_per_octave)[::-1]:
             l = max(len(forward[i]), len(feedback[i])) - 1
-            zfs += [zeros(l)]
+            zfs += [zeros(l if channels is None else (channels, l))]
         l = max(len(blow), len(alow)) - 1
-        zfs += [zeros(l)]
+        zfs += [zeros(l if channels is None else (channels, l))]
 
     return zfs
@@ -18,7 +18,7 @@ sys.path.insert(0, '.')
 from friture.filter import (octave_frequencies, octave_filter_bank,
                             octave_filter_bank_decimation, NOCTAVE)
 
-from friture.audiobackend import SAMPLING_RATE
+from friture.audiobackend import SAMPLING_RATE, SAMPLE_RATES
 
 # bank of filters for any other kind of frequency scale
 # http://cobweb.ecn.purdue.edu/~malcolm/apple/tr35/PattersonsEar.pdf
@@ -30,6 +30,9 @@ EAR_Q = 9.26449  # Glasberg and Moore Parameters
 MIN_BW = 24.7
 ORDER = 1.
 
+# upper bound for the normalized band edges of the octave filters
+MAX_NORMALIZED_FREQ = 0.99
+
 
 def frequencies(fs, num_channels, low_freq):
     channels = arange(0, num_channels)
@@ -94,7 +97,7 @@ def MakeERBFilters(fs, num_channels, low_freq):
     return [forward, feedback]
 
 
-def octave_filters(total_band_count, bands_per_octave):
+def octave_filters(total_band_count, bands_per_octave, fs=SAMPLING_RATE):
     # Bandpass Filter Generation
     pbrip = .5      # Pass band ripple
     sbrip = 50      # Stop band rejection
@@ -103,7 +106,6 @@ def octave_filters(total_band_count, bands_per_octave):
 
     fi, f_low, f_high = octave_frequencies(total_band_count, bands_per_octave)
 
-    fs = SAMPLING_RATE
     wi = fi / (fs / 2.)  # normalized frequencies
     w_low = f_low / (fs / 2.)
     w_high = f_high / (fs / 2.)
@@ -126,7 +128,7 @@ def octave_filters(total_band_count, bands_per_octave):
     return [B, A, fi, f_low, f_high]
 
 
-def octave_filters_oneoctave(total_band_count, bands_per_octave):
+def octave_filters_oneoctave(total_band_count, bands_per_octave, fs=SAMPLING_RATE):
     # Bandpass Filter Generation
     pbrip = .5      # Pass band ripple
     sbrip = 50      # Stop band rejection
@@ -139,11 +141,12 @@ def octave_filters_oneoctave(total_band_count, bands_per_octave):
     f_low = f_low[-bands_per_octave:]
     f_high = f_high[-bands_per_octave:]
 
-    fs = SAMPLING_RATE
     wi = fi / (fs / 2.)  # normalized frequencies
     w_low = f_low / (fs / 2.)
     w_high = f_high / (fs / 2.)
-    w_high = (w_high < 1.) * w_high + (w_high >= 1.) * 1.
+    # the highest band can exceed the Nyquist frequency (at 44.1 kHz),
+    # and the filter design needs normalized frequencies strictly below 1
+    w_high = (w_high < MAX_NORMALIZED_FREQ) * w_high + (w_high >= MAX_NORMALIZED_FREQ) * MAX_NORMALIZED_FREQ
 
     B = []
     A = []
@@ -190,6 +193,18 @@ def generate_filters_params():
         [boct, aoct, fi, flow, fhigh] = octave_filters_oneoctave(total_band_count, bands_per_octave)
         params['%d' % bands_per_octave] = [boct, aoct, fi.tolist(), flow.tolist(), fhigh.tolist()]
 
+    # the octave filters are designed for a given sample rate
+    # (the decimation filter is not, since it is defined relative to the Nyquist frequency)
+    # so generate them for all the sample rates that can be selected
+    params['rates'] = {}
+    for fs in SAMPLE_RATES:
+        rate_params = {}
+        for bands_per_octave in [1, 3, 6, 12, 24]:
+            total_band_count = NOCTAVE * bands_per_octave
+            [boct, aoct, fi, flow, fhigh] = octave_filters_oneoctave(total_band_count, bands_per_octave, fs)
+            rate_params['%d' % bands_per_octave] = [boct, aoct, fi.tolist(), flow.tolist(), fhigh.tolist()]
+        params['rates']['%d' % fs] = rate_params
+
     out = """\
 # Filters parameters generated from filter_design.py
 
@@ -57,7 +57,8 @@ class Generator_Widget(QtWidgets.QWidget):
         self.generators.append(WhiteGenerator(self))
         self.generators.append(PinkGenerator(self))
         self.generators.append(SweepGenerator(self))
-        self.generators.append(BurstGenerator(self))
+        self.burst_generator = BurstGenerator(self)
+        self.generators.append(self.burst_generator)
 
         self.combobox_generator_kind = QtWidgets.QComboBox(self)
         self.combobox_generator_kind.setObjectName("combobox_generator_kind")
@@ -79,6 +80,7 @@ class Generator_Widget(QtWidgets.QWidget):
 
         self.device = None
         self.stream = None
+        self.sample_rate = SAMPLING_RATE
 
         # we will try to open all the output devices until one
         # works, starting by the default input device
@@ -89,6 +91,7 @@ class Generator_Widget(QtWidgets.QWidget):
                 self.stream.start()
                 self.stream.stop()
                 self.device = device
+                self.set_sample_rate(self.stream.samplerate)
                 self.logger.info("Stream opened successfully")
                 break
             except Exception:
@@ -159,6 +162,7 @@ class Generator_Widget(QtWidgets.QWidget):
         try:
             self.stream = AudioBackend().open_output_stream(device, self.audio_callback)
             self.device = device
+            self.set_sample_rate(self.stream.samplerate)
             self.stream.start()
             if self.state not in [STARTING, PLAYING]:
                 self.stream.stop()
@@ -171,6 +175,13 @@ class Generator_Widget(QtWidgets.QWidget):
 
         self.settings_dialog.combobox_output_device.setCurrentIndex(AudioBackend().output_devices.index(self.device))
 
+    # method
+    def set_sample_rate(self, sample_rate):
+        # the output stream is opened at the sample rate of the backend
+        # at the time it is created, so it is queried from the stream
+        self.sample_rate = int(sample_rate)
+        self.burst_generator.set_sample_rate(self.sample_rate)
+
     def on_device_change_error(self, previous_stream, previous_device, message):
         self.logger.exception(message)
 
@@ -180,6 +191,8 @@ class Generator_Widget(QtWidgets.QWidget):
         # restore previous stream
         self.stream = previous_stream
         self.device = previous_device
+        if self.stream is not None:
+            self.set_sample_rate(self.stream.samplerate)
 
         # Note: the error message is a child of the settings dialog, so that
         # that dialog remains on top when the error message is closed
@@ -232,7 +245,7 @@ class Generator_Widget(QtWidgets.QWidget):
         if N == 0:
             return
 
-        t = self.t + np.arange(0, N / float(SAMPLING_RATE), 1. / float(SAMPLING_RATE))
+        t = self.t + np.arange(0, N / float(self.sample_rate), 1. / float(self.sample_rate))
 
         name = self.combobox_generator_kind.currentText()
 
@@ -254,20 +267,20 @@ class Generator_Widget(QtWidgets.QWidget):
         # add smooth ramps at start/stop to avoid undesirable bursts
         if self.state == STARTING:
             # add a ramp at the start
-            t_ramp = self.t_start + np.arange(0, N / float(SAMPLING_RATE), 1. / float(SAMPLING_RATE))
+            t_ramp = self.t_start + np.arange(0, N / float(self.sample_rate), 1. / float(self.sample_rate))
             t_ramp = np.clip(t_ramp, 0., RAMP_LENGTH)
             floatdata *= t_ramp / RAMP_LENGTH
-            self.t_start += N / float(SAMPLING_RATE)
+            self.t_start += N / float(self.sample_rate)
             if self.t_start > RAMP_LENGTH:
                 self.state = PLAYING
 
         if self.state == STOPPING:
             self.logger.info("stopping %f %d", self.t_stop, N)
             # add a ramp at the end
-            t_ramp = self.t_stop - np.arange(0, N / float(SAMPLING_RATE), 1. / float(SAMPLING_RATE))
+            t_ramp = self.t_stop - np.arange(0, N / float(self.sample_rate), 1. / float(self.sample_rate))
             t_ramp = np.clip(t_ramp, 0., RAMP_LENGTH)
             floatdata *= t_ramp / RAMP_LENGTH
-            self.t_stop -= N / float(SAMPLING_RATE)
+            self.t_stop -= N / float(self.sample_rate)
 
             if self.t_stop < 0.:
                 self.state = STOPPED
@@ -283,7 +296,7 @@ class Generator_Widget(QtWidgets.QWidget):
         intdata = (np.clip(floatdata, int16info.min, int16info.max) * norm_coeff).astype(np.int16)
 
         # update the time counter
-        self.t += N / float(SAMPLING_RATE)
+        self.t += N / float(self.sample_rate)
 
         # data copy
         out_data[:] = intdata
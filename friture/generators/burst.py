@@ -29,6 +29,7 @@ class BurstGenerator:
 
     def __init__(self, parent):
         self.T = 1.
+        self.sample_rate = SAMPLING_RATE
 
         self.settings = SettingsWidget(parent)
         self.settings.spinBox_burst_period.valueChanged.connect(self.setT)
@@ -36,12 +37,15 @@ class BurstGenerator:
     def setT(self, T):
         self.T = T
 
+    def set_sample_rate(self, sample_rate):
+        self.sample_rate = sample_rate
+
     def settingsWidget(self):
         return self.settings
 
     def signal(self, t):
         floatdata = np.zeros(t.shape)
-        i = (t * SAMPLING_RATE) % (self.T * SAMPLING_RATE)
+        i = (t * self.sample_rate) % (self.T * self.sample_rate)
         n = 1
         ind_plus = np.where(i < n)
         floatdata[ind_plus] = 1.
@@ -76,8 +76,8 @@ class ImagePlot(QtWidgets.QWidget):
             for error in self.quickWidget.errors():
                 self.logger.error("QML error: " + error.toString())
 
-    def push(self, data, last_data_time):
-        self._spectrogram_item.push(data, last_data_time)
+    def push(self, data, last_data_time, color_transform=None):
+        self._spectrogram_item.push(data, last_data_time, color_transform)
 
     def spectrogram_screen_width(self):
         return self._spectrogram_item.screen_width()
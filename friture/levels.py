@@ -29,7 +29,7 @@ from friture.levels_settings import Levels_Settings_Dialog  # settings dialog
 from friture.audioproc import audioproc
 from friture.level_view_model import LevelViewModel
 from friture.iec import dB_to_IEC
-from friture_extensions.exp_smoothing_conv import pyx_exp_smoothed_value
+from friture_extensions.exp_smoothing_conv import pyx_exp_smoothed_value_numpy
 from friture.audiobackend import SAMPLING_RATE
 from friture.qml_tools import qml_url, raise_if_error
 
@@ -38,6 +38,8 @@ LEVEL_TEXT_LABEL_PERIOD_MS = 250
 
 LEVEL_TEXT_LABEL_STEPS = LEVEL_TEXT_LABEL_PERIOD_MS / SMOOTH_DISPLAY_TIMER_PERIOD_MS
 
+DISPLAYED_CHANNELS = 2
+
 class Levels_Widget(QtWidgets.QWidget):
 
     def __init__(self, parent, engine):
@@ -81,20 +83,12 @@ class Levels_Widget(QtWidgets.QWidget):
         # time = 0.125 #FAST setting for a sound level meter
         # time = 1. #SLOW setting for a sound level meter
         self.response_time = 0.300  # 300ms is a common value for VU meters
-        # an exponential smoothing filter is a simple IIR filter
-        # s_i = alpha*x_i + (1-alpha)*s_{i-1}
-        # we compute alpha so that the n most recent samples represent 100*w percent of the output
         w = 0.65
-        n = self.response_time * SAMPLING_RATE
-        N = 5*n
-        self.alpha = 1. - (1. - w) ** (1. / (n + 1))
-        self.kernel = (1. - self.alpha) ** (np.arange(0, N)[::-1])
-        # first channel
-        self.old_rms = 1e-30
-        self.old_max = 1e-30
-        # second channel
-        self.old_rms_2 = 1e-30
-        self.old_max_2 = 1e-30
+        self.sample_rate = SAMPLING_RATE
+        self.update_kernel()
+        # smoothed RMS and peak values, one entry per displayed channel
+        self.old_rms = np.full(DISPLAYED_CHANNELS, 1e-30)
+        self.old_max = np.full(DISPLAYED_CHANNELS, 1e-30)
 
         response_time_peaks = 0.025  # 25ms for instantaneous peaks
         n2 = response_time_peaks / (SMOOTH_DISPLAY_TIMER_PERIOD_MS / 1000.)
@@ -107,9 +101,27 @@ class Levels_Widget(QtWidgets.QWidget):
     def onWidthChanged(self):
         self.quickWidget.setFixedWidth(int(self.qmlObject.width()))
 
+    def update_kernel(self):
+        # an exponential smoothing filter is a simple IIR filter
+        # s_i = alpha*x_i + (1-alpha)*s_{i-1}
+        # we compute alpha so that the n most recent samples represent 100*w percent of the output
+        w = 0.65
+        n = self.response_time * self.sample_rate
+        N = 5*n
+        self.alpha = 1. - (1. - w) ** (1. / (n + 1))
+        self.kernel = (1. - self.alpha) ** (np.arange(0, N)[::-1])
+
     # method
     def set_buffer(self, buffer):
         self.audiobuffer = buffer
+        self.audiobuffer.sample_rate_changed.connect(self.set_sample_rate)
+        self.set_sample_rate(self.audiobuffer.sample_rate)
+
+    # slot
+    def set_sample_rate(self, sample_rate):
+        if sample_rate != self.sample_rate:
+            self.sample_rate = sample_rate
+            self.update_kernel()
 
     def handle_new_data(self, floatdata):
         if floatdata.shape[0] > 1 and not self.two_channels:
@@ -119,45 +131,32 @@ class Levels_Widget(QtWidgets.QWidget):
             self.two_channels = False
             self.level_view_model.two_channels = False
 
-        # first channel
-        y1 = floatdata[0, :]
+        # all the displayed channels are processed at once
+        y = floatdata[:DISPLAYED_CHANNELS, :]
+        n = y.shape[0]
 
         # exponential smoothing for max
-        if len(y1) > 0:
-            value_max = np.abs(y1).max()
-            if value_max > self.old_max * (1. - self.alpha2):
-                self.old_max = value_max
-            else:
-                # exponential decrease
-                self.old_max *= (1. - self.alpha2)
+        if y.shape[1] > 0:
+            value_max = np.abs(y).max(axis=1)
+            decayed_max = self.old_max[:n] * (1. - self.alpha2)
+            # follow the rising peaks, exponential decrease otherwise
+            self.old_max[:n] = np.where(value_max > decayed_max, value_max, decayed_max)
 
         # exponential smoothing for RMS
-        value_rms = pyx_exp_smoothed_value(self.kernel, self.alpha, y1 ** 2, self.old_rms)
-        self.old_rms = value_rms
+        self.old_rms[:n] = pyx_exp_smoothed_value_numpy(self.kernel, self.alpha, y ** 2, self.old_rms[:n])
 
-        self.level_view_model.level_data.level_rms = 10. * np.log10(value_rms + 0. * 1e-80)
-        self.level_view_model.level_data.level_max = 20. * np.log10(self.old_max + 0. * 1e-80)
+        level_rms = 10. * np.log10(self.old_rms[:n] + 0. * 1e-80)
+        level_max = 20. * np.log10(self.old_max[:n] + 0. * 1e-80)
+
+        # first channel
+        self.level_view_model.level_data.level_rms = level_rms[0]
+        self.level_view_model.level_data.level_max = level_max[0]
         self.level_view_model.level_data_ballistic.peak_iec = dB_to_IEC(max(self.level_view_model.level_data.level_max, self.level_view_model.level_data.level_rms))
 
         if self.two_channels:
             # second channel
-            y2 = floatdata[1, :]
-
-            # exponential smoothing for max
-            if len(y2) > 0:
-                value_max = np.abs(y2).max()
-                if value_max > self.old_max_2 * (1. - self.alpha2):
-                    self.old_max_2 = value_max
-                else:
-                    # exponential decrease
-                    self.old_max_2 *= (1. - self.alpha2)
-
-            # exponential smoothing for RMS
-            value_rms = pyx_exp_smoothed_value(self.kernel, self.alpha, y2 ** 2, self.old_rms_2)
-            self.old_rms_2 = value_rms
-
-            self.level_view_model.level_data_2.level_rms = 10. * np.log10(value_rms + 0. * 1e-80)
-            self.level_view_model.level_data_2.level_max = 20. * np.log10(self.old_max_2 + 0. * 1e-80)
+            self.level_view_model.level_data_2.level_rms = level_rms[1]
+            self.level_view_model.level_data_2.level_max = level_max[1]
             self.level_view_model.level_data_ballistic_2.peak_iec = dB_to_IEC(max(self.level_view_model.level_data_2.level_max, self.level_view_model.level_data_2.level_rms))
 
     # method
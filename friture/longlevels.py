@@ -152,41 +152,44 @@ class LongLevelWidget(QtWidgets.QWidget):
 
         self.i = 0
 
-        self.old_index = 0
+        # frame cursor on the audio buffer
+        self.reader = None
 
-        #Set the initial timespan and response time
-        self.length_seconds = DEFAULT_MAXTIME
-        self.setresptime(DEFAULT_RESPONSE_TIME)
+        self.sample_rate = SAMPLING_RATE
 
         # ringbuffer for the subsampled data
         self.ringbuffer = RingBuffer()
 
+        #Set the initial timespan and response time
+        self.length_seconds = DEFAULT_MAXTIME
+        self.setresptime(DEFAULT_RESPONSE_TIME)
+
     # method
     def set_buffer(self, buffer):
         self.audiobuffer = buffer
+        self.reader = self.audiobuffer.reader(2 ** self.Ndec, 2 ** self.Ndec)
+        self.audiobuffer.sample_rate_changed.connect(self.set_sample_rate)
+        self.set_sample_rate(self.audiobuffer.sample_rate)
+
+    # slot
+    def set_sample_rate(self, sample_rate):
+        if sample_rate == self.sample_rate:
+            return
+        self.sample_rate = sample_rate
+        # the decimation depth and the subsampled rate depend on the input rate
+        self.setresptime(self.response_time)
 
     def handle_new_data(self, floatdata):
-        # we need to maintain an index of where we are in the buffer
-        index = self.audiobuffer.ringbuffer.offset
         self.last_data_time = self.audiobuffer.lastDataTime
 
-        available = index - self.old_index
-
-        if available < 0:
-            # ringbuffer must have grown or something...
-            available = 0
-            self.old_index = index
-
-        # if we have enough data to add a frequency column in the time-frequency plane, compute it
-        needed = int(2**self.Ndec)
-        realizable = int(np.floor(available / needed))
+        # all the blocks of 2**Ndec samples that are ready
+        frames, times = self.reader.frames()
+        realizable = frames.shape[1]
 
         if realizable > 0:
             for i in range(realizable):
-                floatdata = self.audiobuffer.data_indexed(self.old_index, needed)
-
                 # first channel
-                y0 = floatdata[0, :]
+                y0 = frames[0, i]
 
                 y0_squared = y0**2
 
@@ -202,8 +205,6 @@ class LongLevelWidget(QtWidgets.QWidget):
 
                 self.ringbuffer.push(l, 0)
 
-                self.old_index += needed
-
             self.time = np.arange(self.length_samples) / self.subsampled_sampling_rate
 
             levels = self.ringbuffer.data(self.length_samples)
@@ -233,12 +234,13 @@ class LongLevelWidget(QtWidgets.QWidget):
     def setduration(self, value):
         self.length_seconds = value
         self.length_samples = int(self.length_seconds * self.subsampled_sampling_rate)
+        self.ringbuffer.reserve(self, self.length_samples)
         self._long_levels_data.horizontal_axis.setRange(0., self.length_seconds)
 
     def setresptime(self, value):
         self.response_time = value
         # how many times we should decimate to end up with 100 points in the kernel
-        self.Ndec = int(max(0, np.floor((np.log2(self.response_time * SAMPLING_RATE/100.)))))
+        self.Ndec = int(max(0, np.floor((np.log2(self.response_time * self.sample_rate/100.)))))
 
         Ngauss = 4
         self.b = np.array(gauss(10*Ngauss+1, 2.*Ngauss))
@@ -246,8 +248,10 @@ class LongLevelWidget(QtWidgets.QWidget):
         self.a[0] = 1.
         self.zf = np.zeros(max(len(self.b), len(self.a)) - 1)
 
-        self.subsampled_sampling_rate = SAMPLING_RATE / 2 ** (self.Ndec)
+        self.subsampled_sampling_rate = self.sample_rate / 2 ** (self.Ndec)
         self.subsampler = Subsampler(self.Ndec)
+        if self.reader is not None:
+            self.reader.set_frame(2 ** self.Ndec, 2 ** self.Ndec)
 
         if self.length_seconds: 
             self.setduration(self.length_seconds)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Float64 buffers whose rows are mapped twice back-to-back in virtual memory.
+
+Element i + length of a row is the same memory as element i, so a circular
+buffer can be written with a single copy and still be read as contiguous
+slices across the wrap point.
+"""
+
+import ctypes
+import logging
+import mmap
+import os
+import tempfile
+
+import numpy as np
+
+ITEM_SIZE = np.dtype(np.float64).itemsize
+
+# the row length of a mirrored buffer must be a multiple of this many items,
+# since each row is mapped with page granularity
+MIRROR_GRANULE = mmap.PAGESIZE // ITEM_SIZE
+
+PROT_NONE = 0
+# same value on Linux and macOS, not exposed by the mmap module
+MAP_FIXED = 0x10
+MAP_FAILED = ctypes.c_void_p(-1).value
+
+logger = logging.getLogger(__name__)
+
+_libc = None
+if os.name == "posix" and hasattr(mmap, "MAP_ANONYMOUS"):
+    try:
+        _libc = ctypes.CDLL(None, use_errno=True)
+        _libc.mmap.restype = ctypes.c_void_p
+        _libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int64]
+        _libc.munmap.restype = ctypes.c_int
+        _libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+    except (OSError, AttributeError):
+        _libc = None
+
+# cleared after the first failure, so that the fallback is not retried every time
+mirroring_supported = _libc is not None
+
+
+class MirroredMapping:
+    """Owner of a mirrored mapping, exposed to numpy as a (rows, 2 * length) array.
+
+    Numpy keeps this object as the base of the arrays created from it, so the
+    memory is only unmapped when no view of it is left.
+    """
+
+    def __init__(self, rows, length):
+        self.address = None
+
+        if length % MIRROR_GRANULE != 0:
+            raise ValueError("The length of a mirrored buffer must be a multiple of %d" % (MIRROR_GRANULE))
+
+        row_size = length * ITEM_SIZE
+        self.size = 2 * rows * row_size
+
+        fd = anonymous_file(rows * row_size)
+        try:
+            # reserve the whole address range first, then map each row twice inside it
+            address = _libc.mmap(None, self.size, PROT_NONE, mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS, -1, 0)
+            if address is None or address == MAP_FAILED:
+                raise OSError(ctypes.get_errno(), "Failed to reserve %d bytes" % (self.size))
+            self.address = address
+
+            for row in range(rows):
+                for copy in range(2):
+                    target = address + (2 * row + copy) * row_size
+                    result = _libc.mmap(target, row_size, mmap.PROT_READ | mmap.PROT_WRITE, mmap.MAP_SHARED | MAP_FIXED, fd, row * row_size)
+                    if result != target:
+                        raise OSError(ctypes.get_errno(), "Failed to map the row %d of a mirrored buffer" % (row))
+        finally:
+            # the mappings keep the memory alive
+            os.close(fd)
+
+        self.__array_interface__ = {
+            'version': 3,
+            'shape': (rows, 2 * length),
+            'typestr': np.dtype(np.float64).str,
+            'data': (self.address, False),
+        }
+
+    def __del__(self):
+        if self.address is not None and _libc is not None:
+            _libc.munmap(self.address, self.size)
+            self.address = None
+
+
+def anonymous_file(size):
+    """Return the descriptor of an unnamed, zero-filled file of 'size' bytes."""
+    if hasattr(os, "memfd_create"):
+        fd = os.memfd_create("friture-ringbuffer")
+    else:
+        # the temporary file is already unlinked, the descriptor keeps it alive
+        with tempfile.TemporaryFile() as f:
+            fd = os.dup(f.fileno())
+
+    try:
+        os.ftruncate(fd, size)
+    except OSError:
+        os.close(fd)
+        raise
+
+    return fd
+
+
+def mirrored_length(length):
+    """Round 'length' up to a valid row length for a mirrored buffer."""
+    return -(-length // MIRROR_GRANULE) * MIRROR_GRANULE
+
+
+def mirrored_zeros(rows, length):
+    """Return a zero-filled (rows, 2 * length) float64 array whose halves share their memory.
+
+    Returns None when mirrored mappings are not available on this system, in
+    which case the caller has to keep the two halves in sync itself.
+    """
+    global mirroring_supported
+
+    if not mirroring_supported:
+        return None
+
+    try:
+        return np.asarray(MirroredMapping(rows, length))
+    except OSError:
+        logger.exception("Failed to create a mirrored buffer, falling back to double writes")
+        mirroring_supported = False
+        return None
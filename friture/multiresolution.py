@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Multi-resolution STFT: short frames for the treble, long frames for the bass.
+
+The spectrum is split in bands. Each band down is analyzed on a signal
+decimated 2 ** MULTIRES_DECIMATION_STEP more times, with frames of the same
+number of samples, so the frames get longer (in time) and the frequency
+resolution finer, for the same FFT cost per band.
+"""
+
+import logging
+
+import numpy
+
+from friture.stft import DECIMATION_PASSBAND, MAX_DECIMATION, MIN_DECIMATED_FFT_SIZE, FrameAligner
+
+# decimations between two successive bands
+MULTIRES_DECIMATION_STEP = 2
+
+
+def multiresolution_bands(fft_size, overlap):
+    """Return the decimation of each band, from the highest band down, and the hop.
+
+    The lowest band has frames of 'fft_size' samples of the original signal,
+    so it keeps the frequency resolution of a single FFT of that size. The
+    hop is set by the frames of the highest band, and must be a whole number
+    of samples in all the bands.
+    """
+    lowest = MAX_DECIMATION - MAX_DECIMATION % MULTIRES_DECIMATION_STEP
+    while lowest > 0:
+        frame = fft_size // 2 ** lowest
+        hop = int(frame * (1. - overlap))
+        if frame >= MIN_DECIMATED_FFT_SIZE and hop > 0 and hop % 2 ** lowest == 0:
+            return list(range(0, lowest + 1, MULTIRES_DECIMATION_STEP)), hop
+        lowest -= MULTIRES_DECIMATION_STEP
+
+    return [0], int(fft_size * (1. - overlap))
+
+
+class MultiResolutionStft:
+    """Multi-resolution spectrogram of one channel, stitched into one column per hop.
+
+    Each band is a subscription to the STFT service, and keeps the FFT bins
+    between its passband and the passband of the band below.
+    """
+
+    def __init__(self, service, channel, fft_size, overlap, window, sample_rate):
+        self.logger = logging.getLogger(__name__)
+
+        self.decimations, self.hop = multiresolution_bands(fft_size, overlap)
+        frame = fft_size // 2 ** self.decimations[-1]
+
+        self.subscriptions = [service.subscribe(channel, frame * 2 ** decimation, self.hop, window, decimation)
+                              for decimation in self.decimations]
+
+        # the bins of each band, from the highest band down
+        self.bins = []
+        freqs = []
+        upper = sample_rate / 2.
+        for i, decimation in enumerate(self.decimations):
+            rate = sample_rate / 2 ** decimation
+            band_freqs = numpy.arange(frame // 2 + 1) * rate / frame
+            if i + 1 < len(self.decimations):
+                lower = DECIMATION_PASSBAND * sample_rate / 2 ** (self.decimations[i + 1] + 1)
+            else:
+                lower = 0.
+            # the Nyquist bin is kept in the highest band only
+            kept = numpy.flatnonzero((band_freqs >= lower) & ((band_freqs < upper) | (i == 0)))
+            self.bins.append(slice(kept[0], kept[-1] + 1))
+            freqs.append(band_freqs[self.bins[-1]])
+            upper = lower
+
+        self.freqs = numpy.concatenate(freqs[::-1])
+
+        self.aligner = FrameAligner([len(band_freqs) for band_freqs in freqs], 0.5 * self.hop / sample_rate)
+
+        self.logger.info("Multi-resolution STFT: %d bands, frames of %d samples, hop %d",
+                         len(self.decimations), frame, self.hop)
+
+    def process(self):
+        """Return the power of the new columns, as (bins, columns) with ascending frequencies, and their times."""
+        for i, (subscription, bins) in enumerate(zip(self.subscriptions, self.bins)):
+            spectra, times = subscription.spectra()
+            self.aligner.push(i, spectra[:, bins], times)
+
+        power, times = self.aligner.pop()
+        columns = numpy.concatenate([band_power.T for band_power in power[::-1]])
+        return columns, times
+
+    def close(self):
+        for subscription in self.subscriptions:
+            subscription.close()
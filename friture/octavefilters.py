@@ -22,19 +22,34 @@ from numpy import log10, array, where
 from friture.filter import (octave_filter_bank_decimation, octave_frequencies,
                             octave_filter_bank_decimation_filtic, NOCTAVE)
 from friture import generated_filters
+from friture.audiobackend import SAMPLING_RATE
 import friture.renard as renard
 
 class Octave_Filters():
 
-    def __init__(self, bandsperoctave):
+    def __init__(self, bandsperoctave, sample_rate=SAMPLING_RATE):
         [self.bdec, self.adec] = generated_filters.PARAMS['dec']
 
         self.bdec = array(self.bdec)
         self.adec = array(self.adec)
 
+        self.sample_rate = sample_rate
+        self.channels = 1
         self.setbandsperoctave(bandsperoctave)
 
+    def set_sample_rate(self, sample_rate):
+        if sample_rate != self.sample_rate:
+            self.sample_rate = sample_rate
+            # the band filters coefficients are specific to each sample rate
+            self.setbandsperoctave(self.bandsperoctave)
+
     def filter(self, floatdata):
+        # floatdata is channel-major (channels, samples), all the channels
+        # go through the filter bank in a single pass
+        if floatdata.shape[0] != self.channels:
+            self.channels = floatdata.shape[0]
+            self.reset_filter_states()
+
         y, dec, zfs = octave_filter_bank_decimation(self.bdec, self.adec,
                                                     self.boct, self.aoct,
                                                     floatdata, zis=self.zfs)
@@ -43,6 +58,10 @@ class Octave_Filters():
 
         return y, dec
 
+    def reset_filter_states(self):
+        self.zfs = octave_filter_bank_decimation_filtic(self.bdec, self.adec, self.boct, self.aoct,
+                                                        channels=self.channels)
+
     def get_decs(self):
         decs = [2 ** j for j in range(0, NOCTAVE)[::-1] for i in range(0, self.bandsperoctave)]
 
@@ -52,7 +71,10 @@ class Octave_Filters():
         self.bandsperoctave = bandsperoctave
         self.nbands = NOCTAVE * self.bandsperoctave
         self.fi, self.flow, self.fhigh = octave_frequencies(self.nbands, self.bandsperoctave)
-        [self.boct, self.aoct, fi, flow, fhigh] = generated_filters.PARAMS['%d' % bandsperoctave]
+        rate_params = generated_filters.PARAMS['rates'].get('%d' % self.sample_rate)
+        if rate_params is None:
+            raise Exception("No octave filters for sample rate: %d" % (self.sample_rate))
+        [self.boct, self.aoct, fi, flow, fhigh] = rate_params['%d' % bandsperoctave]
 
         self.boct = [array(f) for f in self.boct]
         self.aoct = [array(f) for f in self.aoct]
@@ -66,7 +88,7 @@ class Octave_Filters():
         self.C = 0.06 + 20. * log10(Rc)
         self.B = 0.17 + 20. * log10(Rb)
         self.A = 2.0 + 20. * log10(Ra)
-        self.zfs = octave_filter_bank_decimation_filtic(self.bdec, self.adec, self.boct, self.aoct)
+        self.reset_filter_states()
 
         if bandsperoctave == 1:
             # with 1 band per octave, we would need the "R3.33" Renard series, but it does not exist.
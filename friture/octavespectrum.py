@@ -18,7 +18,7 @@
 # along with Friture.  If not, see <http://www.gnu.org/licenses/>.
 
 from PyQt5 import QtWidgets, QtCore
-from numpy import log10, array, arange
+from numpy import log10, array, arange, zeros
 
 from friture.histplot import HistPlot
 from friture.octavefilters import Octave_Filters
@@ -41,11 +41,10 @@ from friture import udp_sender
 
 from friture.filter import NOCTAVE
 
-from friture_extensions.exp_smoothing_conv import pyx_exp_smoothed_value
-
-from friture.audiobackend import SAMPLING_RATE
+from friture_extensions.exp_smoothing_conv import pyx_exp_smoothed_value_numpy
 
 SMOOTH_DISPLAY_TIMER_PERIOD_MS = 25
+DISPLAYED_CHANNELS = 1
 
 
 class OctaveSpectrum_Widget(QtWidgets.QWidget):
@@ -81,7 +80,7 @@ class OctaveSpectrum_Widget(QtWidgets.QWidget):
         self.PlotZoneSpect.setweighting(self.weighting)
 
         self.filters = Octave_Filters(DEFAULT_BANDSPEROCTAVE)
-        self.dispbuffers = [0] * DEFAULT_BANDSPEROCTAVE * NOCTAVE
+        self.dispbuffers = self.empty_dispbuffers(DEFAULT_BANDSPEROCTAVE)
 
         # set kernel and parameters for the smoothing filter
         self.setresponsetime(self.response_time)
@@ -100,6 +99,18 @@ class OctaveSpectrum_Widget(QtWidgets.QWidget):
 
     def set_buffer(self, buffer):
         self.audiobuffer = buffer
+        self.audiobuffer.sample_rate_changed.connect(self.set_sample_rate)
+        self.set_sample_rate(self.audiobuffer.sample_rate)
+
+    # slot
+    def set_sample_rate(self, sample_rate):
+        if sample_rate != self.filters.sample_rate:
+            self.filters.set_sample_rate(sample_rate)
+            # reset kernel and parameters for the smoothing filter
+            self.setresponsetime(self.response_time)
+
+    def empty_dispbuffers(self, bandsperoctave):
+        return [zeros(DISPLAYED_CHANNELS) for i in range(bandsperoctave * NOCTAVE)]
 
     def compute_kernels(self, alphas, Ns):
         kernels = []
@@ -122,15 +133,18 @@ class OctaveSpectrum_Widget(QtWidgets.QWidget):
         if floatdata.shape[1] == 0:
             return
 
-        # for now, take the first channel only
-        floatdata = floatdata[0, :]
+        # the histogram and the UDP packets hold a single spectrum, so only
+        # the first selected channel is analyzed. The filter bank and the
+        # smoothing work on channel-major blocks, a view that displays more
+        # channels only has to pass more rows.
+        floatdata = floatdata[:DISPLAYED_CHANNELS, :]
 
         # compute the filters' output
         y, decs_unused = self.filters.filter(floatdata)
 
         # compute the widget data
         sp = [
-            pyx_exp_smoothed_value(kernel, alpha, bankdata**2, old)
+            pyx_exp_smoothed_value_numpy(kernel, alpha, bankdata**2, old)
             for bankdata, kernel, alpha, old in zip(
                 y, self.kernels, self.alphas, self.dispbuffers
             )
@@ -139,7 +153,7 @@ class OctaveSpectrum_Widget(QtWidgets.QWidget):
         # store result for next computation
         self.dispbuffers = sp
 
-        sp = array(sp)
+        sp = array(sp)[:, 0]
 
         if self.weighting == 0:
             w = 0.0
@@ -247,7 +261,7 @@ class OctaveSpectrum_Widget(QtWidgets.QWidget):
         # we compute alpha so that the N most recent samples represent 100*w percent of the output
         w = 0.65
         decs = self.filters.get_decs()
-        ns = [self.response_time * SAMPLING_RATE / dec for dec in decs]
+        ns = [self.response_time * self.filters.sample_rate / dec for dec in decs]
         Ns = [2 * 4096 / dec for dec in decs]
         self.alphas = [1.0 - (1.0 - w) ** (1.0 / (n + 1)) for n in ns]
         # print(ns, Ns)
@@ -256,7 +270,7 @@ class OctaveSpectrum_Widget(QtWidgets.QWidget):
     def setbandsperoctave(self, bandsperoctave):
         self.filters.setbandsperoctave(bandsperoctave)
         # recreate the ring buffers
-        self.dispbuffers = [0] * bandsperoctave * NOCTAVE
+        self.dispbuffers = self.empty_dispbuffers(bandsperoctave)
         # reset kernel and parameters for the smoothing filter
         self.setresponsetime(self.response_time)
 
@@ -27,7 +27,7 @@ from PyQt5.QtCore import QObject, QSettings, Qt
 from PyQt5.QtQuick import QQuickWindow
 from PyQt5.QtQuickWidgets import QQuickWidget
 from PyQt5.QtQml import QQmlComponent, QQmlEngine
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
 
 from friture.audiobackend import SAMPLING_RATE
 from friture.audiobuffer import AudioBuffer
@@ -45,6 +45,7 @@ from friture.plotting.coordinateTransform import CoordinateTransform
 import friture.plotting.frequency_scales as fscales
 from friture.ringbuffer import RingBuffer
 from friture.scope_data import Scope_Data
+from friture.stft import StftSubscription, stft_service
 from friture.store import GetStore
 from friture.qml_tools import qml_url, raise_if_error
 
@@ -155,6 +156,20 @@ class PitchTrackerWidget(QtWidgets.QWidget):
     def set_buffer(self, buffer: AudioBuffer) -> None:
         self.audiobuffer = buffer
         self.tracker.set_input_buffer(buffer.ringbuffer)
+        buffer.sample_rate_changed.connect(self.set_sample_rate)
+        self.set_sample_rate(buffer.sample_rate)
+        buffer.channels_changed.connect(self.set_channels)
+        self.set_channels(buffer.channels)
+
+    # slot
+    def set_channels(self, channels: Tuple[int, ...]) -> None:
+        # the pitch is tracked on the first selected channel
+        self.tracker.set_input_channel(channels[0])
+
+    # slot
+    def set_sample_rate(self, sample_rate: int) -> None:
+        self.tracker.set_sample_rate(sample_rate)
+        self.settings_dialog.set_sample_rate(sample_rate)
 
     def handle_new_data(self, floatdata: np.ndarray) -> None:
         if self.tracker.update():
@@ -258,45 +273,70 @@ class PitchTracker:
         self.sample_rate = sample_rate
         self.min_db = min_db
 
-        self.input_buf = input_buf
-        self.input_buf.grow_if_needed(fft_size)
-        self.next_in_offset = self.input_buf.offset
+        self.input_channel = 0
+        self.subscription: Optional[StftSubscription] = None
+        self.set_input_buffer(input_buf)
 
         self.out_buf = RingBuffer()
         self.out_offset = self.out_buf.offset
 
         self.proc = audioproc()
+        self.proc.set_sample_rate(self.sample_rate)
         self.proc.set_fftsize(self.fft_size)
 
+    def set_sample_rate(self, sample_rate: int) -> None:
+        self.sample_rate = sample_rate
+        self.proc.set_sample_rate(sample_rate)
+
+    def set_input_channel(self, channel: int) -> None:
+        if channel != self.input_channel:
+            self.input_channel = channel
+            self.subscribe()
+
     def set_input_buffer(self, new_buf: RingBuffer) -> None:
         self.input_buf = new_buf
-        self.input_buf.grow_if_needed(self.fft_size)
-        self.next_in_offset = self.input_buf.offset
+        self.subscribe()
+
+    def subscribe(self) -> None:
+        # the spectra are shared with the other widgets that use the same
+        # FFT settings, the first frame starts at the current offset
+        if self.subscription is not None:
+            self.subscription.close()
+        self.subscription = stft_service(self.input_buf).subscribe(
+            self.input_channel, self.fft_size, self.hop())
+
+    def hop(self) -> int:
+        return m.floor(self.fft_size * (1.0 - self.overlap))
 
     def update(self) -> bool:
-        new = [self.estimate_pitch(f) for f in self.new_frames()]
+        if self.subscription is None:
+            return False
+        spectra, _ = self.subscription.spectra()
+        new = [self.estimate_pitch_from_spectrum(sp) for sp in spectra]
         self.out_buf.push(np.array([new]), 0)
         self.out_offset = self.out_buf.offset
         return len(new) != 0
 
     def get_estimates(self, time_s: float) -> np.ndarray:
-        step_size = m.floor(self.fft_size * (1.0 - self.overlap))
-        num_results = m.floor(time_s / (step_size / self.sample_rate)) + 1
+        num_results = m.floor(time_s / (self.hop() / self.sample_rate)) + 1
         return self.out_buf.data_indexed(self.out_offset, num_results)[0,:]
 
     def get_latest_estimate(self) -> float:
         return self.out_buf.data_indexed(self.out_offset, 1)[0,0]
 
     def new_frames(self) -> Generator[np.ndarray, None, None]:
-        assert self.input_buf.offset >= self.next_in_offset
-        while self.next_in_offset + self.fft_size <= self.input_buf.offset:
-            # data_indexed is (end_index, length) for some reason
-            yield self.input_buf.data_indexed(
-                self.next_in_offset + self.fft_size, self.fft_size)
-            self.next_in_offset += m.floor(self.fft_size * (1.0 - self.overlap))
+        if self.subscription is None:
+            return
+        frames, _, _ = self.subscription.read()
+        for i in range(frames.shape[1]):
+            yield frames[:, i]
 
     def estimate_pitch(self, frame: np.ndarray) -> Optional[float]:
-        spectrum = np.abs(np.fft.rfft(frame[0, :] * self.proc.window))
+        return self.estimate_pitch_from_spectrum(self.proc.analyzelive(frame[self.input_channel, :]))
+
+    def estimate_pitch_from_spectrum(self, power: np.ndarray) -> Optional[float]:
+        # the power spectrum is normalized by the squared FFT size
+        spectrum = np.sqrt(power) * self.fft_size
 
         # Compute harmonic product spectrum; the frequency with the largest
         # value is quite likely to be a fundamental frequency.
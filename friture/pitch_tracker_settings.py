@@ -78,6 +78,11 @@ class PitchTrackerSettingsDialog(QtWidgets.QDialog):
 
         self.setLayout(self.form_layout)
 
+    def set_sample_rate(self, sample_rate: int) -> None:
+        # the frequency range is bounded by the Nyquist frequency
+        self.min_freq.setMaximum(sample_rate // 2)
+        self.max_freq.setMaximum(sample_rate // 2)
+
     def save_state(self, settings: QSettings) -> None:
         settings.setValue("min_freq", self.min_freq.value())
         settings.setValue("max_freq", self.max_freq.value())
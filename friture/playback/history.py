@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import os
+import tempfile
+from typing import IO, Optional, Tuple
+
+import numpy as np
+import platformdirs
+
+log = logging.getLogger(__name__)
+
+# playback is int16, so the history is stored at that resolution
+SAMPLE_DTYPE = np.int16
+SAMPLE_SCALE = np.iinfo(np.int16).max
+
+# history is moved by chunks when it is resized, to keep the memory use flat
+COPY_CHUNK_FRAMES = 2 ** 20
+
+
+def history_dir() -> str:
+    return os.path.join(platformdirs.user_data_dir("Friture", ""), "playback")
+
+
+class SampleHistory:
+    """Circular history of the recorded samples, in a memory-mapped file.
+
+    Samples are stored as int16, time-major like the output stream, so
+    that a playback block is at most two slices of the file. The file is a
+    temporary file in the user data dir. The OS pages it in and out as
+    needed, so the memory use does not depend on the history length.
+
+    Like the RingBuffer, 'offset' counts the frames pushed since the start.
+
+    The history is written from the GUI thread and read from the playback
+    callback, without locks: the mapping and its capacity are published
+    together, as a single tuple, once the new mapping is complete.
+    """
+
+    def __init__(self, capacity: int, directory: Optional[str] = None) -> None:
+        self.directory = history_dir() if directory is None else directory
+        self.offset = 0
+        self.file: Optional[IO[bytes]] = None
+        self.ring: Tuple[np.ndarray, int] = (np.zeros((0, 1), dtype=SAMPLE_DTYPE), 0)
+        self.allocate(max(1, capacity), 1)
+
+    @property
+    def samples(self) -> np.ndarray:
+        return self.ring[0]
+
+    @property
+    def capacity(self) -> int:
+        return self.ring[1]
+
+    @property
+    def channels(self) -> int:
+        return int(self.ring[0].shape[1])
+
+    def create_mapping(self, capacity: int, channels: int) -> Tuple[IO[bytes], np.ndarray]:
+        os.makedirs(self.directory, exist_ok=True)
+
+        # the file is deleted when it is closed (or right away on POSIX)
+        new_file = tempfile.TemporaryFile(prefix="history-", suffix=".raw", dir=self.directory)
+        new_file.truncate(capacity * channels * np.dtype(SAMPLE_DTYPE).itemsize)
+        samples = np.memmap(new_file, dtype=SAMPLE_DTYPE, mode="r+", shape=(capacity, channels))
+
+        log.info("Playback history: %d frames of %d channels in %s", capacity, channels, self.directory)
+
+        return new_file, samples
+
+    def publish(self, new_file: IO[bytes], samples: np.ndarray) -> None:
+        old_file = self.file
+        # a single assignment, so that the playback callback never sees a
+        # mapping with the capacity of another one
+        self.ring = (samples, samples.shape[0])
+        self.file = new_file
+        # a reader of the old mapping keeps it alive, closing the file only releases its disk space
+        if old_file is not None:
+            old_file.close()
+
+    def allocate(self, capacity: int, channels: int) -> None:
+        new_file, samples = self.create_mapping(capacity, channels)
+        self.publish(new_file, samples)
+
+    def close(self) -> None:
+        # the memmap holds the mapping, the file holds the disk space
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def reset(self, capacity: int) -> None:
+        """Discard the recorded frames and change the capacity.
+
+        Nothing is copied, the new mapping is allocated empty.
+        """
+        self.offset = 0
+        self.allocate(max(1, capacity), self.channels)
+
+    def resize(self, capacity: int) -> None:
+        """Change the capacity, keeping the most recent frames.
+
+        The kept frames are copied synchronously, by chunks, so resizing a
+        long history stalls the caller: a 4-hour stereo history at 48 kHz is
+        about 2.7 GB to copy. The playback reads the old mapping until the
+        new one is complete.
+        """
+        capacity = max(1, capacity)
+        old_samples, old_capacity = self.ring
+        if capacity == old_capacity:
+            return
+
+        kept = min(old_capacity, capacity, self.offset)
+        new_file, samples = self.create_mapping(capacity, self.channels)
+
+        for start in range(self.offset - kept, self.offset, COPY_CHUNK_FRAMES):
+            count = min(COPY_CHUNK_FRAMES, self.offset - start)
+            write_ring(samples, capacity, start, read_ring(old_samples, old_capacity, start, count))
+
+        self.publish(new_file, samples)
+
+    def push(self, floatdata: np.ndarray) -> None:
+        """Append (channels, frames) float data in [-1, 1]."""
+        channels, frames = floatdata.shape
+
+        if channels != self.channels:
+            # the recorded frames cannot be mixed with the new ones
+            self.offset = 0
+            self.allocate(self.capacity, channels)
+
+        samples, capacity = self.ring
+
+        # only the most recent frames fit
+        skipped = max(0, frames - capacity)
+        block = np.clip(floatdata[:, skipped:].T, -1., 1.) * SAMPLE_SCALE
+        write_ring(samples, capacity, self.offset + skipped, block.astype(SAMPLE_DTYPE))
+        self.offset += frames
+
+    def read_into(self, out: np.ndarray, start: int, count: int) -> None:
+        """Copy 'count' frames from 'start' to the first rows of the int16 (frames, channels) 'out'.
+
+        A mono history is duplicated to all the output channels, extra
+        output channels of a multichannel history are left untouched.
+        """
+        # read the mapping once, it can be replaced by the GUI thread meanwhile
+        samples, capacity = self.ring
+        block = read_ring(samples, capacity, start, count)
+        channels = samples.shape[1]
+        if channels == 1:
+            out[:count] = block
+        else:
+            copy_channels = min(out.shape[1], channels)
+            out[:count, :copy_channels] = block[:, :copy_channels]
+
+
+def write_ring(samples: np.ndarray, capacity: int, start: int, block: np.ndarray) -> None:
+    """Write 'block' at frame 'start' of a circular (capacity, channels) array."""
+    position = start % capacity
+    direct = min(block.shape[0], capacity - position)
+    samples[position:position + direct] = block[:direct]
+    samples[:block.shape[0] - direct] = block[direct:]
+
+
+def read_ring(samples: np.ndarray, capacity: int, start: int, count: int) -> np.ndarray:
+    """Return frames [start, start + count) of a circular (capacity, channels) array.
+
+    The frames are a view of the array, unless they wrap around its end.
+    """
+    position = start % capacity
+    if position + count <= capacity:
+        return samples[position:position + count]
+    return np.concatenate((samples[position:], samples[:position + count - capacity]))
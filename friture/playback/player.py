@@ -25,7 +25,7 @@ import numpy as np
 from sounddevice import OutputStream
 
 from friture.audiobackend import AudioBackend, SAMPLING_RATE
-from friture.ringbuffer import RingBuffer
+from friture.playback.history import SampleHistory
 
 log = logging.getLogger(__name__)
 
@@ -45,9 +45,9 @@ class Player(QObject):
     def __init__(self, parent: QObject):
         super().__init__(parent)
         self.history_sec = DEFAULT_HISTORY_LENGTH_S
-        self.history_samples = self.history_sec * SAMPLING_RATE
-        self.buffer = RingBuffer()
-        self.buffer.grow_if_needed(self.history_samples)
+        self.sample_rate = SAMPLING_RATE
+        self.history_samples = self.history_sec * self.sample_rate
+        self.history = SampleHistory(self.history_samples)
         self.recorded_len = 0
         self.stopping.connect(self.on_stopping)
 
@@ -65,16 +65,16 @@ class Player(QObject):
             raise ValueError("History must have positive length")
 
         self.history_sec = new_len
-        self.history_samples = self.history_sec * SAMPLING_RATE
-        self.buffer.grow_if_needed(self.history_samples)
+        self.history_samples = self.history_sec * self.sample_rate
+        self.history.resize(self.history_samples)
 
         # Handle the case where the current play position is truncated out
         # (will result in a skip in playback)
         if self.state == PlayState.PLAYING:
-            if self.play_offset < (self.buffer.offset - self.history_samples):
-                self.play_offset = self.buffer.offset - self.history_samples
+            if self.play_offset < (self.history.offset - self.history_samples):
+                self.play_offset = self.history.offset - self.history_samples
                 self.playback_time_changed.emit(
-                    (self.play_offset - self.buffer.offset) / SAMPLING_RATE)
+                    (self.play_offset - self.history.offset) / self.sample_rate)
 
         # Handle the case where the selected start time is truncated
         if self.play_start_time < -self.history_sec:
@@ -87,17 +87,31 @@ class Player(QObject):
         # position will have been adjusted to fit, above.
         if self.history_samples < self.recorded_len:
             self.recorded_len = self.history_samples
-            self.recorded_length_changed.emit(self.recorded_len / SAMPLING_RATE)
+            self.recorded_length_changed.emit(self.recorded_len / self.sample_rate)
+
+    def set_sample_rate(self, sample_rate: int) -> None:
+        if sample_rate == self.sample_rate:
+            return
+
+        # the recorded history was captured at the previous rate and would
+        # play back at the wrong speed, so it is discarded
+        self.stop()
+        self.sample_rate = sample_rate
+        self.history_samples = self.history_sec * self.sample_rate
+        self.history.reset(self.history_samples)
+        self.play_offset = 0
+        self.recorded_len = 0
+        self.recorded_length_changed.emit(0.0)
 
     def handle_new_data(self, data: np.ndarray) -> None:
         # this will zero out history if channel count changes, not ideal but
         # probably doesn't matter
-        self.buffer.push(data, 0)
+        self.history.push(data)
         new_len = min(
             self.recorded_len + data.shape[1], self.history_samples)
         if new_len != self.recorded_len:
             self.recorded_len = new_len
-            self.recorded_length_changed.emit(self.recorded_len / SAMPLING_RATE)
+            self.recorded_length_changed.emit(self.recorded_len / self.sample_rate)
 
     def play(self) -> None:
         if self.state != PlayState.STOPPED:
@@ -120,13 +134,13 @@ class Player(QObject):
                     break
 
         if self.play_start_time == 0.0:
-            self.play_offset = self.buffer.offset - self.recorded_len
+            self.play_offset = self.history.offset - self.recorded_len
         else:
             start_offset = max(
                 -self.recorded_len,
-                int(self.play_start_time * SAMPLING_RATE)
+                int(self.play_start_time * self.sample_rate)
             )
-            self.play_offset = self.buffer.offset + start_offset
+            self.play_offset = self.history.offset + start_offset
 
     def stop(self) -> None:
         if self.state == PlayState.PLAYING:
@@ -145,43 +159,25 @@ class Player(QObject):
         if status:
             log.info(status)
 
-        out_channels = AudioBackend().get_device_outputchannels_count(self.device)
-        res = np.zeros((out_channels, samples))
-        available = self.buffer.offset - self.play_offset
-        to_copy = min(available, samples)
+        available = self.history.offset - self.play_offset
+        to_copy = max(0, min(available, samples))
+
+        # the history is already int16 and time-major, like the output
+        out_data[to_copy:] = 0
+        self.history.read_into(out_data, self.play_offset, to_copy)
+        if self.history.channels > 1:
+            # Stereo+ recording, leave higher out channels zero if present
+            out_data[:to_copy, self.history.channels:] = 0
+
         self.play_offset += to_copy
         self.playback_time_changed.emit(
-            (self.play_offset - self.buffer.offset) / SAMPLING_RATE)
+            (self.play_offset - self.history.offset) / self.sample_rate)
 
         if available < samples and self.state == PlayState.PLAYING:
             log.info("Reached end of playback")
             self.state = PlayState.STOPPING
             self.stopping.emit()
 
-        in_channels = self.buffer.buffer.shape[0]
-        if in_channels == 1:
-            # Mono recording, duplicate to all output channels:
-            for i in range(out_channels):
-                res[i,0:to_copy] = self.buffer.data_indexed(
-                    self.play_offset, samples)[0,0:to_copy]
-        else:
-            # Stereo+ recording, leave higher out channels zero if present
-            copy_channels = min(out_channels, self.buffer.buffer.shape[0])
-            res[0:copy_channels,0:to_copy] = self.buffer.data_indexed(
-                self.play_offset, samples)[0:copy_channels,0:to_copy]
-
-        # Buffer is float in [-1, 1], output is int16, need to convert scales
-        int16info = np.iinfo(np.int16)
-        scale = min(abs(int16info.min), int16info.max)
-        res = scale * np.clip(res, -1.0, 1.0)
-        res = res.astype(np.int16)
-
-        # Buffer is channel-major, output is time-major
-        res = res.transpose()
-
-        out_data[:] = res
-
-
     def on_stopping(self) -> None:
         assert self.stream is not None
         self.stream.stop()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""The QML engine of the application, and the Python types that the QML files use."""
+
+from typing import Optional
+
+from PyQt5.QtQml import QQmlEngine, qmlRegisterSingletonType, qmlRegisterType
+
+from friture.axis import Axis
+from friture.colorBar import ColorBar
+from friture.curve import Curve
+from friture.filled_curve import FilledCurve
+from friture.level_data import LevelData
+from friture.level_view_model import LevelViewModel
+from friture.plotCurve import PlotCurve
+from friture.plotFilledCurve import PlotFilledCurve
+from friture.plotting.coordinateTransform import CoordinateTransform
+from friture.plotting.scaleDivision import ScaleDivision, Tick
+from friture.scope_data import Scope_Data
+from friture.spectrogram_item import SpectrogramItem
+from friture.spectrogram_item_data import SpectrogramImageData
+from friture.spectrum_data import Spectrum_Data
+from friture.store import GetStore, Store
+
+_engine: Optional[QQmlEngine] = None
+
+
+def register_qml_types() -> None:
+    # Register the ScaleDivision type.  Its URI is 'ScaleDivision', it's v1.0 and the type
+    # will be called 'Person' in QML.
+    qmlRegisterType(ScaleDivision, "Friture", 1, 0, "ScaleDivision")
+    qmlRegisterType(CoordinateTransform, "Friture", 1, 0, "CoordinateTransform")
+    qmlRegisterType(Scope_Data, "Friture", 1, 0, "ScopeData")
+    qmlRegisterType(Spectrum_Data, "Friture", 1, 0, "SpectrumData")
+    qmlRegisterType(LevelData, "Friture", 1, 0, "LevelData")
+    qmlRegisterType(LevelViewModel, "Friture", 1, 0, "LevelViewModel")
+    qmlRegisterType(Axis, "Friture", 1, 0, "Axis")
+    qmlRegisterType(Curve, "Friture", 1, 0, "Curve")
+    qmlRegisterType(FilledCurve, "Friture", 1, 0, "FilledCurve")
+    qmlRegisterType(PlotCurve, "Friture", 1, 0, "PlotCurve")
+    qmlRegisterType(PlotFilledCurve, "Friture", 1, 0, "PlotFilledCurve")
+    qmlRegisterType(SpectrogramItem, "Friture", 1, 0, "SpectrogramItem")
+    qmlRegisterType(SpectrogramImageData, "Friture", 1, 0, "SpectrogramImageData")
+    qmlRegisterType(ColorBar, "Friture", 1, 0, "ColorBar")
+    qmlRegisterType(Tick, "Friture", 1, 0, "Tick")
+    qmlRegisterSingletonType(
+        Store, "Friture", 1, 0, "Store", lambda engine, script_engine: GetStore()
+    )
+
+
+def qml_engine() -> QQmlEngine:
+    """Return the QML engine, created on the first call.
+
+    There is a single engine, since the Store singleton can only belong to
+    one QML context.
+    """
+    global _engine
+
+    if _engine is None:
+        # set the store as the parent of the QML engine
+        # so that the store outlives the engine
+        # otherwise the store gets destroyed before the engine
+        # which refreshes the QML bindings to undefined values
+        # and QML errors are raised
+        _engine = QQmlEngine(GetStore())
+        register_qml_types()
+
+    return _engine
@@ -17,24 +17,88 @@
 # You should have received a copy of the GNU General Public License
 # along with Friture.  If not, see <http://www.gnu.org/licenses/>.
 
-# FIXME problem when self.offset overflows the MAXINT limit !
-
 import logging
+import threading
+import weakref
 
-from numpy import zeros, ndarray
+from numpy import zeros, ndarray, arange, ceil
+from numpy.lib.stride_tricks import as_strided
 from friture.audiobackend import SAMPLING_RATE
+from friture.mirroredbuffer import mirrored_zeros, mirrored_length
+
+
+# the initial length is enough for the default settings of all the widgets
+INITIAL_LENGTH = 2 ** 14
+
+
+def capacity_for(length):
+    """The power of two (and valid mirrored length) that holds 'length' samples."""
+    return mirrored_length(1 << max(0, int(length) - 1).bit_length())
 
 
 class RingBuffer():
+    """Circular buffer of (channels, samples) float data, read as contiguous views.
+
+    The storage is a (channels, 2 * buffer_length) array whose second half
+    repeats the first one, so that any window of up to buffer_length samples
+    is a contiguous slice. When the system supports it, the two halves are
+    the same memory mapped twice, so each sample is written once. Otherwise
+    each sample is written to both halves.
+
+    The offsets count the samples pushed since the start. They are Python
+    integers, so they never wrap around, and they are only reduced modulo the
+    buffer length to index the storage.
+
+    Readers declare the longest window they will ask for with reserve(). The
+    storage is resized once for all the pending reservations, before the next
+    push, instead of once per reader. Any growth rounds the length up to a
+    power of two, so that unreserved requests only trigger a few resizes.
+    """
 
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
         # buffer length is dynamic based on the needs
-        self.buffer_length = 10000
-        self.buffer = zeros((1, 2 * self.buffer_length))
+        self.buffer_length = capacity_for(INITIAL_LENGTH)
+        self.buffer, self.mirrored = self.allocate(1, self.buffer_length)
+
+        # the longest window of each reader, forgotten when the reader is deleted
+        self.reservations = weakref.WeakKeyDictionary()
+        self.reservations_changed = False
+        # number of resizes, to spot the readers that do not reserve
+        self.growth_count = 0
+
         self.offset = 0
         self.offset_time = 0
+        self.sample_rate = SAMPLING_RATE
+
+    def allocate(self, dim, length):
+        buffer = mirrored_zeros(dim, length)
+        if buffer is not None:
+            return buffer, True
+        return zeros((dim, 2 * length)), False
+
+    def set_sample_rate(self, sample_rate: int) -> None:
+        self.sample_rate = sample_rate
+
+    def reserve(self, reader, length: int) -> None:
+        """Declare that 'reader' will ask for windows of up to 'length' samples."""
+        if self.reservations.get(reader) != length:
+            self.reservations[reader] = length
+            self.reservations_changed = True
+
+    def release(self, reader) -> None:
+        """Withdraw the reservation of 'reader'. The storage does not shrink."""
+        self.reservations.pop(reader, None)
+
+    def apply_reservations(self) -> None:
+        if not self.reservations_changed:
+            return
+        self.reservations_changed = False
+
+        reserved = max(self.reservations.values(), default=0)
+        if reserved > self.buffer_length:
+            self.grow(reserved)
 
     def push(self, floatdata: ndarray, input_time: float) -> None:
         # update the circular buffer
@@ -44,18 +108,21 @@ class RingBuffer():
 
         if dim != self.buffer.shape[0]:
             # switched from single to dual channels or vice versa
-            self.buffer = zeros((dim, 2 * self.buffer_length))
+            self.buffer, self.mirrored = self.allocate(dim, self.buffer_length)
 
+        self.apply_reservations()
         self.grow_if_needed(l)
 
         # first copy, always complete
         offset = self.offset % self.buffer_length
         self.buffer[:, offset: offset + l] = floatdata[:, :]
-        # second copy, can be folded
-        direct = min(l, self.buffer_length - offset)
-        folded = l - direct
-        self.buffer[:, offset + self.buffer_length: offset + self.buffer_length + direct] = floatdata[:, 0: direct]
-        self.buffer[:, :folded] = floatdata[:, direct:]
+
+        if not self.mirrored:
+            # second copy, can be folded
+            direct = min(l, self.buffer_length - offset)
+            folded = l - direct
+            self.buffer[:, offset + self.buffer_length: offset + self.buffer_length + direct] = floatdata[:, 0: direct]
+            self.buffer[:, :folded] = floatdata[:, direct:]
 
         self.offset += l
         self.offset_time = input_time
@@ -80,7 +147,7 @@ class RingBuffer():
     def data_older(self, length, delay_samples):
         self.grow_if_needed(length + delay_samples)
 
-        start = (self.offset - length - delay_samples) % self.buffer_length + self.buffer_length
+        start = (self.offset - length - delay_samples) % self.buffer_length
         stop = start + length
         return self.buffer[:, start: stop]
 
@@ -100,31 +167,262 @@ class RingBuffer():
 
     def data_time(self, start: int) -> float:
         """The stream time in seconds at the position defined by 'start'."""
-        return self.offset_time + (start - self.offset) / SAMPLING_RATE
+        return self.offset_time + (start - self.offset) / self.sample_rate
+
+    def published_offset(self) -> int:
+        """The offset up to which the samples can be read."""
+        return self.offset
+
+    def oldest_available(self) -> int:
+        """The index of the oldest sample that has not been overwritten."""
+        return self.offset - self.buffer_length
 
     def grow_if_needed(self, length):
         if length > self.buffer_length:
-            # let the buffer grow according to our needs
-            old_length = self.buffer_length
-            new_length = int(1.5 * length)
-
-            self.logger.info("Ringbuffer: growing buffer for length %d", new_length)
-
-            # create new buffer
-            newbuffer = zeros((self.buffer.shape[0], 2 * new_length))
-            # copy existing data so that self.offset does not have to be changed
-            old_offset_mod = self.offset % old_length
-            new_offset_mod = self.offset % new_length
-            shift = new_offset_mod - old_offset_mod
-            # shift can be negative, computing modulo again
-            shift %= new_length
-            # first copy, always complete
-            newbuffer[:, shift:shift + old_length] = self.buffer[:, :old_length]
+            reserved = max(self.reservations.values(), default=0)
+            if length > reserved:
+                self.logger.info("Ringbuffer: unreserved request for %d samples", length)
+            # the pending reservations are served by the same resize
+            self.reservations_changed = False
+            self.grow(max(length, reserved))
+
+    def grown_storage(self, length):
+        return self.allocate(self.buffer.shape[0], length)
+
+    def grow(self, length):
+        old_length = self.buffer_length
+        new_length = capacity_for(length)
+
+        self.growth_count += 1
+        self.logger.info("Ringbuffer: growing buffer from %d to %d samples (growth #%d)", old_length, new_length, self.growth_count)
+
+        # create new buffer
+        newbuffer, mirrored = self.grown_storage(new_length)
+        # copy the existing data, oldest sample first, at the positions
+        # that it has in the larger buffer, so that self.offset does not
+        # have to be changed
+        old_offset_mod = self.offset % old_length
+        history = self.buffer[:, old_offset_mod:old_offset_mod + old_length]
+        start = (self.offset - old_length) % new_length
+        # first copy, always complete
+        newbuffer[:, start:start + old_length] = history
+        if not mirrored:
             # second copy, can be folded
-            direct = min(old_length, new_length - shift)
+            direct = min(old_length, new_length - start)
             folded = old_length - direct
-            newbuffer[:, new_length + shift:new_length + shift + direct] = self.buffer[:, :direct]
-            newbuffer[:, :folded] = self.buffer[:, direct:direct + folded]
-            # assign self.butter to the new larger buffer
-            self.buffer = newbuffer
-            self.buffer_length = new_length
+            newbuffer[:, new_length + start:new_length + start + direct] = history[:, :direct]
+            newbuffer[:, :folded] = history[:, direct:]
+        # assign self.butter to the new larger buffer
+        self.buffer = newbuffer
+        self.mirrored = mirrored
+        self.buffer_length = new_length
+
+
+class RingBufferReader():
+    """Cursor on a RingBuffer that returns the ready frames all at once.
+
+    Frames of 'frame_size' samples are taken every 'hop' samples. The cursor
+    is the end index of the next frame, it defaults to the current offset of
+    the buffer. frames() returns all the frames that are complete as a
+    (channels, frames, frame_size) strided view of the buffer (overlapping
+    frames share their memory), together with the stream time at the end of
+    each frame, and moves the cursor past them. Like the other views of the
+    buffer, the frames are only valid until the next push.
+
+    When the reader falls so far behind that its next frames have been
+    overwritten, it skips ahead to the oldest frame still available and
+    counts an overrun. On a SharedRingBuffer, read from another thread than
+    the producer, valid() tells whether the frames returned last are still
+    intact after they have been processed.
+
+    The reader reserves the frame size on the buffer.
+    """
+
+    def __init__(self, ringbuffer: RingBuffer, frame_size: int, hop: int, position=None):
+        self.logger = logging.getLogger(__name__)
+        self.ringbuffer = ringbuffer
+        self.position = ringbuffer.published_offset() if position is None else position
+        self.window_start = self.position
+        self.overruns = 0
+        self.set_frame(frame_size, hop)
+
+    def set_frame(self, frame_size: int, hop: int) -> None:
+        if frame_size <= 0 or hop <= 0:
+            raise ValueError("The frame size and the hop must be positive")
+        self.frame_size = int(frame_size)
+        self.hop = int(hop)
+        self.ringbuffer.reserve(self, self.frame_size)
+
+    def reset(self, position=None) -> None:
+        """Skip to 'position', or to the current offset of the buffer."""
+        self.position = self.ringbuffer.published_offset() if position is None else position
+
+    @property
+    def ready(self) -> int:
+        """Number of frames that are complete."""
+        offset = self.ringbuffer.published_offset()
+        if self.position > offset:
+            return 0
+        return (offset - self.position) // self.hop + 1
+
+    def valid(self) -> bool:
+        """Whether the frames returned by the last call to frames() have not been overwritten since."""
+        return self.window_start >= self.ringbuffer.oldest_available()
+
+    def skip_overwritten(self) -> None:
+        oldest = self.ringbuffer.oldest_available()
+        start = self.position - self.frame_size
+        if start < oldest:
+            skipped = int(ceil((oldest - start) / self.hop))
+            self.position += skipped * self.hop
+            self.overruns += 1
+            self.logger.warning("Ringbuffer reader overrun: skipped %d frames (overrun #%d)", skipped, self.overruns)
+
+    def frames(self, max_frames=None):
+        self.skip_overwritten()
+
+        n = self.ready
+        if max_frames is not None:
+            n = min(n, max_frames)
+
+        if n == 0:
+            channels = self.ringbuffer.buffer.shape[0]
+            return zeros((channels, 0, self.frame_size)), zeros(0)
+
+        # one contiguous window spans all the frames
+        stop = self.position + (n - 1) * self.hop
+        length = self.frame_size + (n - 1) * self.hop
+        data = self.ringbuffer.data_indexed(stop, length)
+        self.window_start = stop - length
+
+        channels = data.shape[0]
+        channel_stride, sample_stride = data.strides
+        frames = as_strided(data, shape=(channels, n, self.frame_size),
+                            strides=(channel_stride, self.hop * sample_stride, sample_stride),
+                            writeable=False)
+
+        ends = self.position + self.hop * arange(n)
+        times = self.ringbuffer.data_time(ends)
+
+        self.position += n * self.hop
+
+        return frames, times
+
+
+class UnreservedReads():
+    """Reservation key for the reads that were not reserved beforehand."""
+
+
+class SharedRingBuffer(RingBuffer):
+    """RingBuffer written by one producer thread and read from any thread.
+
+    The producer copies the new samples in, then publishes the offset, the
+    time and the storage together, with a single attribute assignment. The
+    readers work from one snapshot of that published state, so they never
+    take a lock. Before it writes, the producer announces the index up to
+    which it writes, so that a reader can tell when the samples it reads
+    are being overwritten (see RingBufferReader).
+
+    Only the producer resizes the storage. A read that does not fit is
+    reserved for the next push, and the samples that are not available are
+    zeros meanwhile. The larger storage is allocated by the thread that
+    reserves, so the producer only copies the kept samples into it.
+    """
+
+    def __init__(self):
+        # the storage allocated ahead of the producer: (buffer, mirrored, length)
+        self.spare = None
+
+        super().__init__()
+
+        # the reservations are only changed when widgets are configured,
+        # the lock keeps the producer from iterating them meanwhile
+        self.reservations_lock = threading.Lock()
+        self.unreserved = UnreservedReads()
+        self.reservations[self.unreserved] = 0
+
+        self.write_end = 0
+        self.publish()
+
+    def publish(self) -> None:
+        self.state = (self.offset, self.offset_time, self.buffer, self.buffer_length)
+
+    def reserve(self, reader, length: int) -> None:
+        with self.reservations_lock:
+            super().reserve(reader, length)
+        self.prepare_storage(length)
+
+    def prepare_storage(self, length: int) -> None:
+        """Allocate the storage for 'length' samples, before the producer needs it."""
+        new_length = capacity_for(length)
+        spare = self.spare
+        if new_length <= self.buffer_length or (spare is not None and spare[2] >= new_length):
+            return
+
+        # allocated outside of the lock, the producer takes it at every push
+        buffer, mirrored = self.allocate(self.buffer.shape[0], new_length)
+        with self.reservations_lock:
+            if self.spare is None or self.spare[2] < new_length:
+                self.spare = (buffer, mirrored, new_length)
+
+    # called with self.reservations_lock held
+    def grown_storage(self, length):
+        spare = self.spare
+        self.spare = None
+        if spare is not None and spare[2] == length and spare[0].shape[0] == self.buffer.shape[0]:
+            return spare[0], spare[1]
+        return super().grown_storage(length)
+
+    def release(self, reader) -> None:
+        with self.reservations_lock:
+            super().release(reader)
+
+    def apply_reservations(self) -> None:
+        with self.reservations_lock:
+            super().apply_reservations()
+
+    def grow_if_needed(self, length):
+        with self.reservations_lock:
+            super().grow_if_needed(length)
+
+    def push(self, floatdata: ndarray, input_time: float) -> None:
+        # announce the samples that are about to be overwritten
+        self.write_end = self.offset + floatdata.shape[1]
+        super().push(floatdata, input_time)
+        self.publish()
+
+    def published_offset(self) -> int:
+        return self.state[0]
+
+    def oldest_available(self) -> int:
+        # the samples that the producer is writing over are lost already
+        return self.write_end - self.state[3]
+
+    def window(self, stop, length):
+        offset, offset_time, buffer, buffer_length = self.state
+
+        oldest = max(0, offset - buffer_length)
+        if stop - length < oldest:
+            self.reserve(self.unreserved, offset - (stop - length))
+            window = zeros((buffer.shape[0], length))
+            kept = stop - oldest
+            if kept > 0:
+                start0 = oldest % buffer_length
+                window[:, length - kept:] = buffer[:, start0:start0 + kept]
+            return window
+
+        start0 = (stop - length) % buffer_length
+        return buffer[:, start0:start0 + length]
+
+    def data(self, length):
+        return self.window(self.state[0], length)
+
+    def data_older(self, length, delay_samples):
+        return self.window(self.state[0] - delay_samples, length)
+
+    def data_indexed(self, start, length):
+        return self.window(start, length)
+
+    def data_time(self, start: int) -> float:
+        offset, offset_time, buffer, buffer_length = self.state
+        return offset_time + (start - offset) / self.sample_rate
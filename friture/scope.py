@@ -25,7 +25,6 @@ from PyQt5.QtQuickWidgets import QQuickWidget
 from numpy import log10, where, sign, arange, zeros
 
 from friture.store import GetStore
-from friture.audiobackend import SAMPLING_RATE
 from friture.scope_data import Scope_Data
 from friture.curve import Curve
 from friture.qml_tools import qml_url, raise_if_error
@@ -91,10 +90,12 @@ class Scope_Widget(QtWidgets.QWidget):
     # method
     def set_buffer(self, buffer):
         self.audiobuffer = buffer
+        self.reserve_history()
 
     def handle_new_data(self, floatdata):
+        sample_rate = self.audiobuffer.sample_rate
         time = self.timerange * 1e-3
-        width = int(time * SAMPLING_RATE)
+        width = int(time * sample_rate)
         # basic trigger capability on leading edge
         floatdata = self.audiobuffer.data(2 * width)
 
@@ -143,7 +144,7 @@ class Scope_Widget(QtWidgets.QWidget):
             else:
                 self.y2 = None
 
-        self.time = (arange(len(self.y)) - datarange // 2) / float(SAMPLING_RATE)
+        self.time = (arange(len(self.y)) - datarange // 2) / float(sample_rate)
 
         scaled_t = (self.time * 1e3 + self.timerange/2.) / self.timerange
         scaled_y = 1. - (self.y + 1) / 2.
@@ -163,9 +164,17 @@ class Scope_Widget(QtWidgets.QWidget):
     def restart(self):
         return
 
+    # method
+    def reserve_history(self):
+        if self.audiobuffer is not None:
+            # twice the displayed range, for the trigger search
+            width = int(self.timerange * 1e-3 * self.audiobuffer.sample_rate)
+            self.audiobuffer.reserve(self, 2 * width)
+
     # slot
     def set_timerange(self, timerange):
         self.timerange = timerange
+        self.reserve_history()
         self._scope_data.horizontal_axis.setRange(-self.timerange/2., self.timerange/2.)
 
     # slot
@@ -48,6 +48,18 @@ class Settings_Dialog(QtWidgets.QDialog, Ui_Settings_Dialog):
         # Setup the user interface
         self.setupUi(self)
 
+        # re-query the devices and probe their formats again
+        self.pushButton_refreshDevices = QtWidgets.QPushButton("Refresh devices", self.inputGroup)
+        self.pushButton_refreshDevices.setObjectName("pushButton_refreshDevices")
+        self.verticalLayout_6.insertWidget(2, self.pushButton_refreshDevices)
+
+        # sample rate selection, below the input device selection
+        self.label_sampleRate = QtWidgets.QLabel("Sample rate:", self.inputGroup)
+        self.comboBox_sampleRate = QtWidgets.QComboBox(self.inputGroup)
+        self.comboBox_sampleRate.setObjectName("comboBox_sampleRate")
+        self.verticalLayout_6.insertWidget(3, self.label_sampleRate)
+        self.verticalLayout_6.insertWidget(4, self.comboBox_sampleRate)
+
         devices = AudioBackend().get_readable_devices_list()
 
         if devices == []:
@@ -60,21 +72,20 @@ class Settings_Dialog(QtWidgets.QDialog, Ui_Settings_Dialog):
         for device in devices:
             self.comboBox_inputDevice.addItem(device)
 
-        channels = AudioBackend().get_readable_current_channels()
-        for channel in channels:
-            self.comboBox_firstChannel.addItem(channel)
-            self.comboBox_secondChannel.addItem(channel)
-
         current_device = AudioBackend().get_readable_current_device()
         self.comboBox_inputDevice.setCurrentIndex(current_device)
 
-        first_channel = AudioBackend().get_current_first_channel()
-        self.comboBox_firstChannel.setCurrentIndex(first_channel)
-        second_channel = AudioBackend().get_current_second_channel()
-        self.comboBox_secondChannel.setCurrentIndex(second_channel)
+        self.update_channels()
+
+        # the formats of the devices are probed in the background,
+        # only the default sample rate is listed until then
+        self.update_sample_rates()
+        AudioBackend().device_formats_probed.connect(self.update_sample_rates)
 
         # signals
         self.comboBox_inputDevice.currentIndexChanged.connect(self.input_device_changed)
+        self.pushButton_refreshDevices.clicked.connect(self.refresh_devices)
+        self.comboBox_sampleRate.activated.connect(self.sample_rate_changed)
         self.comboBox_firstChannel.activated.connect(self.first_channel_changed)
         self.comboBox_secondChannel.activated.connect(self.second_channel_changed)
         self.radioButton_single.toggled.connect(self.single_input_type_selected)
@@ -106,7 +117,31 @@ class Settings_Dialog(QtWidgets.QDialog, Ui_Settings_Dialog):
             error_message.setWindowTitle("Input device error")
             error_message.showMessage("Impossible to use the selected input device, reverting to the previous one")
 
-        # reset the channels
+        self.update_channels()
+        self.update_sample_rates()
+
+        self.parent().ui.actionStart.setChecked(True)
+
+    # slot
+    def refresh_devices(self):
+        device_changed = AudioBackend().refresh_devices()
+
+        # repopulate the list without switching the device
+        self.comboBox_inputDevice.blockSignals(True)
+        self.comboBox_inputDevice.clear()
+        for device in AudioBackend().get_readable_devices_list():
+            self.comboBox_inputDevice.addItem(device)
+        self.comboBox_inputDevice.setCurrentIndex(AudioBackend().get_readable_current_device())
+        self.comboBox_inputDevice.blockSignals(False)
+
+        if device_changed:
+            self.update_channels()
+
+        self.update_sample_rates()
+
+    # method
+    # list the channels of the current input device
+    def update_channels(self):
         channels = AudioBackend().get_readable_current_channels()
 
         self.comboBox_firstChannel.clear()
@@ -121,7 +156,39 @@ class Settings_Dialog(QtWidgets.QDialog, Ui_Settings_Dialog):
         second_channel = AudioBackend().get_current_second_channel()
         self.comboBox_secondChannel.setCurrentIndex(second_channel)
 
-        self.parent().ui.actionStart.setChecked(True)
+    # method
+    # list the sample rates supported by the current input device
+    def update_sample_rates(self):
+        self.comboBox_sampleRate.clear()
+
+        device = AudioBackend().device
+        if device is None:
+            return
+
+        current = AudioBackend().get_sample_rate()
+        samplerates = AudioBackend().get_supported_sample_rates(device)
+        if current not in samplerates:
+            samplerates = sorted(samplerates + [current])
+
+        for samplerate in samplerates:
+            self.comboBox_sampleRate.addItem("%d Hz" % samplerate, samplerate)
+
+        self.comboBox_sampleRate.setCurrentIndex(samplerates.index(current))
+
+    # slot
+    def sample_rate_changed(self, index):
+        samplerate = self.comboBox_sampleRate.itemData(index)
+
+        success, samplerate = AudioBackend().select_sample_rate(samplerate)
+
+        self.comboBox_sampleRate.setCurrentIndex(self.comboBox_sampleRate.findData(samplerate))
+
+        if not success:
+            # Note: the error message is a child of the settings dialog, so that
+            # that dialog remains on top when the error message is closed
+            error_message = QtWidgets.QErrorMessage(self)
+            error_message.setWindowTitle("Input device error")
+            error_message.showMessage("Impossible to use the selected sample rate, reverting to the previous one")
 
     # slot
     def first_channel_changed(self, index):
@@ -184,6 +251,7 @@ class Settings_Dialog(QtWidgets.QDialog, Ui_Settings_Dialog):
         # for the input device, we search by name instead of index, since
         # we do not know if the device order stays the same between sessions
         settings.setValue("deviceName", self.comboBox_inputDevice.currentText())
+        settings.setValue("sampleRate", AudioBackend().get_sample_rate())
         settings.setValue("firstChannel", self.comboBox_firstChannel.currentIndex())
         settings.setValue("secondChannel", self.comboBox_secondChannel.currentIndex())
         settings.setValue("duoInput", self.inputTypeButtonGroup.checkedId())
@@ -203,6 +271,12 @@ class Settings_Dialog(QtWidgets.QDialog, Ui_Settings_Dialog):
             self.comboBox_secondChannel.setCurrentIndex(channel)
             duo_input_id = settings.value("duoInput", 0, type=int)
             self.inputTypeButtonGroup.button(duo_input_id).setChecked(True)
+            # the sample rates of the device may not be probed yet, so the
+            # saved one is selected directly instead of from the combo box
+            samplerate = settings.value("sampleRate", 0, type=int)
+            if samplerate > 0:
+                AudioBackend().select_sample_rate(samplerate)
+                self.update_sample_rates()
         self.checkbox_showPlayback.setCheckState(settings.value("showPlayback", 0, type=int))
         self.spinBox_historyLength.setValue(settings.value("historyLength", 30, type=int))
         # need to emit this because setValue doesn't emit editFinished
@@ -22,14 +22,26 @@ import logging
 
 import numpy as np
 from friture.plotting import generated_cmrmap
-from friture_extensions.lookup_table import pyx_color_from_float_2D
+from friture_extensions.lookup_table import pyx_color_from_power_2D
 from PyQt5.QtGui import QColor
 
 class Color_Transform:
+    """Convert a power spectrogram to colors.
 
-    def __init__(self) -> None:
+    The conversion to dB, the weighting, the scaling to the color range, the
+    clipping and the color lookup are done in a single compiled pass, into the
+    given output, or into a buffer that is reused across pushes.
+    """
+
+    def __init__(self, spec_min: float = -140., spec_max: float = 0.) -> None:
         self.logger = logging.getLogger(__name__)
 
+        self.spec_min = spec_min
+        self.spec_max = spec_max
+        # dB added to each row
+        self.weighting = np.zeros(1)
+        self.output = np.zeros((1, 1), dtype=np.uint32)
+
         # prepare a custom colormap
         self.prepare_palette()
 
@@ -45,7 +57,26 @@ class Color_Transform:
                                     int(cmap[i, 1] * 255),
                                     int(cmap[i, 2] * 255)).rgb()
 
-    def push(self, data):
-        # clip in [0..1] before using the fast lookup function
-        data = np.clip(data, 0., 1.)
-        return pyx_color_from_float_2D(self.colors, data)
+    def setspecrange(self, spec_min: float, spec_max: float) -> None:
+        self.spec_min = spec_min
+        self.spec_max = spec_max
+
+    def setweighting(self, weighting: np.ndarray) -> None:
+        self.weighting = np.ascontiguousarray(weighting, dtype=np.float64)
+
+    # the colors are written to 'out' when given, otherwise the returned
+    # colors are only valid until the next push
+    def push(self, data, out=None):
+        rows, columns = data.shape
+
+        if out is None:
+            if self.output.shape[0] != rows or self.output.shape[1] < columns:
+                self.output = np.empty((rows, max(columns, 2 * self.output.shape[1])), dtype=np.uint32)
+            out = self.output[:, :columns]
+
+        weighting = self.weighting
+        if weighting.shape[0] != rows:
+            # the weighting has not been resampled to the new height yet
+            weighting = np.zeros(rows)
+
+        return pyx_color_from_power_2D(self.colors, data, weighting, self.spec_min, self.spec_max, out)
@@ -18,7 +18,8 @@
 # along with Friture.  If not, see <http://www.gnu.org/licenses/>.
 
 import numpy
-from numpy.fft import rfft, irfft
+from friture.signal.fft import rfft, irfft
+from friture.signal.windows import get_window
 
 
 def generalized_cross_correlation(d0, d1):
@@ -28,7 +29,7 @@ def generalized_cross_correlation(d0, d1):
     d1 -= d1.mean()
 
     # Hann window to mitigate non-periodicity effects
-    window = numpy.hanning(len(d0))
+    window = get_window("hann", len(d0))
 
     # compute the cross-correlation
     D0 = rfft(d0 * window)
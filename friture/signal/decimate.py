@@ -18,17 +18,21 @@
 # along with Friture.  If not, see <http://www.gnu.org/licenses/>.
 
 import numpy
-from friture_extensions.lfilter import pyx_lfilter_float64_1D
+from friture_extensions.lfilter import pyx_lfilter_float64_1D, pyx_lfilter_float64_2D
 
 
 def decimate(bdec, adec, x, zi):
-    if len(x) == 0:
+    if x.shape[-1] == 0:
         raise Exception("Filter input is too small")
 
     # could use a polyphase decimator here
-    x_dec, zf = pyx_lfilter_float64_1D(bdec, adec, x, zi)
+    # channel-major (channels, samples) inputs are decimated along the last axis
+    if x.ndim == 2:
+        x_dec, zf = pyx_lfilter_float64_2D(bdec, adec, x, zi)
+    else:
+        x_dec, zf = pyx_lfilter_float64_1D(bdec, adec, x, zi)
 
-    x_dec = x_dec[::2]
+    x_dec = x_dec[..., ::2]
     return x_dec, zf
 
 
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""FFT facade, backed by numpy.fft, scipy.fft or pyFFTW.
+
+The backend is picked when the module is imported: the FRITURE_FFT_BACKEND
+environment variable if it is set, otherwise the preferred backend that is
+installed (pyFFTW, then scipy, then numpy). That order is fixed, use
+'friture-bench fft' to find the fastest backend on the current machine and
+select it with the environment variable.
+
+All the backends compute the same unnormalized forward transforms and
+1/n-normalized inverse transforms as numpy.fft.
+"""
+
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+
+import numpy
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ENV_VARIABLE = "FRITURE_FFT_BACKEND"
+
+# preferred first
+BACKEND_NAMES = ["pyfftw", "scipy", "numpy"]
+
+# plans are kept per (transform, shape, dtype, axis), the least recently
+# used ones are dropped first
+PLAN_CACHE_SIZE = 32
+
+WORKERS = os.cpu_count() or 1
+
+
+class NumpyBackend:
+    """numpy.fft, always available. Its pocketfft implementation caches its own twiddle factors."""
+
+    name = "numpy"
+
+    def rfft(self, x, n=None, axis=-1, out=None):
+        return numpy.fft.rfft(x, n=n, axis=axis, out=out)
+
+    def irfft(self, x, n=None, axis=-1, out=None):
+        return numpy.fft.irfft(x, n=n, axis=axis, out=out)
+
+    def fft(self, x, n=None, axis=-1, out=None):
+        return numpy.fft.fft(x, n=n, axis=axis, out=out)
+
+    def ifft(self, x, n=None, axis=-1, out=None):
+        return numpy.fft.ifft(x, n=n, axis=axis, out=out)
+
+
+class ScipyBackend:
+    """scipy.fft, which splits the batched transforms over several threads."""
+
+    name = "scipy"
+
+    def __init__(self, workers=WORKERS):
+        import scipy.fft
+        self.scipy_fft = scipy.fft
+        self.workers = workers
+
+    def call(self, transform, x, n, axis, out):
+        result = transform(x, n=n, axis=axis, workers=self.workers)
+        if out is None:
+            return result
+        out[...] = result
+        return out
+
+    def rfft(self, x, n=None, axis=-1, out=None):
+        return self.call(self.scipy_fft.rfft, x, n, axis, out)
+
+    def irfft(self, x, n=None, axis=-1, out=None):
+        return self.call(self.scipy_fft.irfft, x, n, axis, out)
+
+    def fft(self, x, n=None, axis=-1, out=None):
+        return self.call(self.scipy_fft.fft, x, n, axis, out)
+
+    def ifft(self, x, n=None, axis=-1, out=None):
+        return self.call(self.scipy_fft.ifft, x, n, axis, out)
+
+
+class PyfftwBackend:
+    """pyFFTW, with one plan and one pair of aligned buffers per transform shape.
+
+    The plans are made with FFTW_ESTIMATE, since the batched transforms see a
+    varying number of frames and measuring each new shape would stall the GUI.
+    """
+
+    name = "pyfftw"
+
+    def __init__(self, workers=WORKERS, cache_size=PLAN_CACHE_SIZE):
+        import pyfftw
+        self.pyfftw = pyfftw
+        self.workers = workers
+        self.cache_size = cache_size
+        self.plans = OrderedDict()
+        self.lock = Lock()
+
+    def plan(self, kind, input_shape, input_dtype, output_shape, output_dtype, axis):
+        # an inverse real transform of n and n + 1 points has the same input shape
+        key = (kind, input_shape, input_dtype, output_shape, output_dtype, axis)
+        with self.lock:
+            plan = self.plans.get(key)
+            if plan is not None:
+                self.plans.move_to_end(key)
+                return plan
+
+            input_array = self.pyfftw.empty_aligned(input_shape, dtype=input_dtype)
+            output_array = self.pyfftw.empty_aligned(output_shape, dtype=output_dtype)
+            direction = "FFTW_BACKWARD" if kind in ("irfft", "ifft") else "FFTW_FORWARD"
+            plan = self.pyfftw.FFTW(input_array, output_array, axes=(axis,), direction=direction,
+                                    flags=("FFTW_ESTIMATE",), threads=self.workers)
+
+            self.plans[key] = plan
+            if len(self.plans) > self.cache_size:
+                self.plans.popitem(last=False)
+            return plan
+
+    def execute(self, kind, x, n, axis, out, real_input, real_output):
+        x = numpy.asarray(x)
+        axis = axis % x.ndim
+
+        if n is None:
+            n = 2 * (x.shape[axis] - 1) if kind == "irfft" else x.shape[axis]
+
+        # crop or zero-pad the input like numpy does
+        input_length = n // 2 + 1 if kind == "irfft" else n
+        if x.shape[axis] != input_length:
+            padded_shape = x.shape[:axis] + (input_length,) + x.shape[axis + 1:]
+            padded = numpy.zeros(padded_shape, dtype=x.dtype)
+            kept = min(input_length, x.shape[axis])
+            index = (slice(None),) * axis + (slice(0, kept),)
+            padded[index] = x[index]
+            x = padded
+
+        input_dtype = numpy.float64 if real_input else numpy.complex128
+        output_dtype = numpy.float64 if real_output else numpy.complex128
+        output_length = n // 2 + 1 if kind == "rfft" else n
+        output_shape = x.shape[:axis] + (output_length,) + x.shape[axis + 1:]
+
+        plan = self.plan(kind, x.shape, input_dtype, output_shape, output_dtype, axis)
+        with self.lock:
+            plan.input_array[...] = x
+            plan.execute()
+            result = plan.output_array
+            if plan.direction == "FFTW_BACKWARD":
+                # FFTW does not normalize the inverse transforms
+                result /= n
+
+            # the plan buffers are reused by the next call
+            if out is None:
+                return result.copy()
+            out[...] = result
+            return out
+
+    def rfft(self, x, n=None, axis=-1, out=None):
+        return self.execute("rfft", x, n, axis, out, True, False)
+
+    def irfft(self, x, n=None, axis=-1, out=None):
+        return self.execute("irfft", x, n, axis, out, False, True)
+
+    def fft(self, x, n=None, axis=-1, out=None):
+        return self.execute("fft", x, n, axis, out, False, False)
+
+    def ifft(self, x, n=None, axis=-1, out=None):
+        return self.execute("ifft", x, n, axis, out, False, False)
+
+
+BACKEND_CLASSES = {
+    "numpy": NumpyBackend,
+    "scipy": ScipyBackend,
+    "pyfftw": PyfftwBackend,
+}
+
+
+def create_backend(name):
+    """Return a new backend, or raise ImportError if it is not installed."""
+    if name not in BACKEND_CLASSES:
+        raise ValueError("Unknown FFT backend: %s" % (name))
+    return BACKEND_CLASSES[name]()
+
+
+def available_backends():
+    """The names of the installed backends, preferred first."""
+    names = []
+    for name in BACKEND_NAMES:
+        try:
+            create_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def default_backend():
+    requested = os.environ.get(BACKEND_ENV_VARIABLE)
+    if requested:
+        try:
+            return create_backend(requested)
+        except (ImportError, ValueError):
+            logger.exception("Cannot use the FFT backend '%s', falling back to the default one", requested)
+
+    for name in BACKEND_NAMES:
+        try:
+            return create_backend(name)
+        except ImportError:
+            pass
+
+    # numpy is always installed
+    return NumpyBackend()
+
+
+backend = default_backend()
+logger.info("FFT backend: %s", backend.name)
+
+
+def set_backend(name):
+    """Switch all the transforms to another backend."""
+    global backend
+    backend = create_backend(name)
+    logger.info("FFT backend: %s", backend.name)
+
+
+def get_backend():
+    return backend
+
+
+def rfft(x, n=None, axis=-1, out=None):
+    return backend.rfft(x, n=n, axis=axis, out=out)
+
+
+def irfft(x, n=None, axis=-1, out=None):
+    return backend.irfft(x, n=n, axis=axis, out=out)
+
+
+def fft(x, n=None, axis=-1, out=None):
+    return backend.fft(x, n=n, axis=axis, out=out)
+
+
+def ifft(x, n=None, axis=-1, out=None):
+    return backend.ifft(x, n=n, axis=axis, out=out)
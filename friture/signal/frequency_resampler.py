@@ -19,20 +19,46 @@
 
 
 import logging
+from typing import Dict
 
 import numpy as np
 import friture.plotting.frequency_scales as fscales
 
+# how the pixels that cover several bins combine them
+REDUCTIONS = ["max", "mean"]
+
+
 class Frequency_Resampler:
+    """Resample the spectrogram columns from the analysis bins to the screen pixels.
+
+    The bins read by each pixel are found once for each frequency grid,
+    scale, frequency range and height. There are two kinds of pixels:
+    - a pixel that covers a single bin or less is linearly interpolated
+      between two bins,
+    - a pixel that covers several bins (at the top of a Mel or log scale)
+      shows the max or the mean of the bins [first, last), so that narrow
+      tones do not fall between the pixels.
 
-    def __init__(self, scale=fscales.Linear, minfreq: float = 20., maxfreq: float = 20000., nsamples: int = 1) -> None:
+    Each push handles all the columns at once, without any matrix product:
+    the interpolated pixels are two gathers and a blend, the means are
+    differences of a prefix sum along the bins, and the maxima are read from
+    a sparse table of the range maxima. The prefix sum and the sparse table
+    are work arrays that are reused across pushes.
+    """
+
+    def __init__(self, scale=fscales.Linear, minfreq: float = 20., maxfreq: float = 20000., nsamples: int = 1, reduction: str = "max") -> None:
         self.logger = logging.getLogger(__name__)
 
+        if reduction not in REDUCTIONS:
+            raise ValueError("Unknown reduction: %s" % (reduction))
+
         self.scale = scale 
         self.minfreq: float = minfreq
         self.maxfreq: float = maxfreq
         self.nsamples: int = nsamples
+        self.reduction = reduction
         self.freq = np.zeros((1))
+        self.work_arrays: Dict[str, np.ndarray] = {}
         self.update_xscale()
 
     def setfreqrange(self, minfreq: float, maxfreq: float) -> None:
@@ -47,6 +73,8 @@ class Frequency_Resampler:
                 self.scale.transform(self.minfreq),
                 self.scale.transform(self.maxfreq),
                 self.nsamples))
+        # rebuilt on the next push
+        self.first = None
 
     def setnsamples(self, nsamples):
         if self.nsamples != nsamples:
@@ -64,20 +92,84 @@ class Frequency_Resampler:
         self.freq = freq
         self.update_xscale()
 
+    def update_pixel_bins(self) -> None:
+        freq = np.asarray(self.freq, dtype=float)
+        nbins = freq.size
+        npixels = self.xscaled.size
+
+        # bins [first, last) are inside each pixel, whose edges are halfway
+        # to the next pixels on the screen scale
+        centers = np.linspace(self.scale.transform(self.minfreq), self.scale.transform(self.maxfreq), npixels)
+        half_step = 0.5 * abs(centers[1] - centers[0]) if npixels > 1 else 0.
+        edges = np.sort(self.scale.inverse(np.stack((centers - half_step, centers + half_step))), axis=0)
+        first = np.searchsorted(freq, edges[0], side='left')
+        last = np.searchsorted(freq, edges[1], side='left')
+        count = last - first
+        banded = count >= 2
+
+        # linear interpolation between bins 'below' and 'below + 1', clamped at the ends like np.interp
+        interpolated = ~banded
+        self.interpolated_rows = np.flatnonzero(interpolated)
+        x = self.xscaled[interpolated]
+        if nbins > 1:
+            self.below = np.clip(np.searchsorted(freq, x, side='right') - 1, 0, nbins - 2)
+            self.fraction = np.clip((x - freq[self.below]) / (freq[self.below + 1] - freq[self.below]), 0., 1.)[:, np.newaxis]
+            self.above = self.below + 1
+        else:
+            self.below = np.zeros(len(x), dtype=int)
+            self.fraction = np.zeros((len(x), 1))
+            self.above = self.below
+
+        self.banded_rows = np.flatnonzero(banded)
+        self.first = first[banded]
+        self.last = last[banded]
+        self.count = count[banded][:, np.newaxis]
+        # the max of [first, last) is the max of two overlapping ranges of 2 ** level bins
+        self.level = np.floor(np.log2(count[banded])).astype(int) if len(self.banded_rows) > 0 else np.zeros(0, dtype=int)
+
+        # the work arrays depend on the number of bins and levels
+        self.work_arrays = {}
+
+        self.logger.info("frequency resampling: %d bins to %d pixels, %d pixels combine several bins",
+                         nbins, npixels, len(self.banded_rows))
+
     def push(self, data):
-        # f = interp1d(freq, data) # construct an interpolant
-        # return f(self.xscaled)
-        # s = UnivariateSpline(freq, data, s=0, k=1) # construct the spline
-        # return s(self.xscaled)
-        # Note : interp1d and UnivariateSpline are both slower than interp
-        # interp is still not optimal because it involved a search whereas
-        # the data is already completely sorted so an running interpolation
-        # could be done faster
-        n = data.shape[1]
-        resampled_data = np.zeros((self.xscaled.size, n))
-
-        for j in range(n):
-            interpolated = np.interp(self.xscaled, self.freq, data[:, j])
-            resampled_data[:, j] = interpolated
+        # all the columns at once, instead of one np.interp per column
+        if self.first is None:
+            self.update_pixel_bins()
+
+        resampled_data = np.empty((self.xscaled.size, data.shape[1]))
+
+        below = data[self.below]
+        resampled_data[self.interpolated_rows] = below + (data[self.above] - below) * self.fraction
+
+        if len(self.banded_rows) > 0:
+            if self.reduction == "max":
+                resampled_data[self.banded_rows] = self.range_max(data)
+            else:
+                cumulated = self.work_array("cumulated", (data.shape[0] + 1,), data.shape[1])
+                cumulated[0] = 0.
+                np.cumsum(data, axis=0, out=cumulated[1:])
+                resampled_data[self.banded_rows] = (cumulated[self.last] - cumulated[self.first]) / self.count
 
         return resampled_data
+
+    def work_array(self, name, shape, columns):
+        # reused across pushes, with room for more columns than asked, like Color_Transform.output
+        array = self.work_arrays.get(name)
+        if array is None or array.shape[:-1] != shape or array.shape[-1] < columns:
+            previous_columns = array.shape[-1] if array is not None and array.shape[:-1] == shape else 0
+            array = np.empty(shape + (max(columns, 2 * previous_columns),))
+            self.work_arrays[name] = array
+        return array[..., :columns]
+
+    def range_max(self, data):
+        # levels[k][i] is the max of data[i:i + 2 ** k]
+        levels = self.work_array("levels", (self.level.max() + 1, data.shape[0]), data.shape[1])
+        levels[0] = data
+        for k in range(1, len(levels)):
+            width = 2 ** (k - 1)
+            levels[k] = levels[k - 1]
+            np.maximum(levels[k - 1, :-width], levels[k - 1, width:], out=levels[k, :-width])
+
+        return np.maximum(levels[self.level, self.first], levels[self.level, self.last - 2 ** self.level])
@@ -8,7 +8,6 @@ Created on Sat Apr 21 16:12:12 2012
 import numpy as np
 
 from .scipy_resample import resample
-from friture_extensions.linear_interp import pyx_linear_interp_2D
 
 
 class Online_Linear_2D_resampler:
@@ -29,9 +28,8 @@ class Online_Linear_2D_resampler:
         self.resampled_index = 0.
 
         self.old_data = np.zeros((self.height))
-        self.buffer = None
 
-        self.resampled_data = np.zeros((self.height, 1))
+        self.work_arrays = {}
 
     def set_ratio(self, interp_factor_L, decim_factor_M):
         if self.interp_factor_L != interp_factor_L or self.decim_factor_M != decim_factor_M:
@@ -52,46 +50,61 @@ class Online_Linear_2D_resampler:
             # we resample here instead of just restarting with zeros to avoid black vertical lines
             # in the spectrogram
             self.old_data = resample(self.old_data, self.height)
-            self.resampled_data = resample(self.resampled_data, self.height)  # resample on the first axis
 
     def processable(self, m):
         return int(np.ceil((self.orig_index + m - (self.resampled_index + self.resampling_ratio)) / self.resampling_ratio))
 
     # will return as much resampled data as possible
+    # the returned array is reused, it is only valid until the next push
     def push(self, data):
         self.set_height(data.shape[0])
 
         time_sample_count = data.shape[1]
-
-        processable_time_sample_count = self.processable(time_sample_count)
-
-        output_data = np.zeros((self.height, processable_time_sample_count))
-        output_data_index = 0
-
-        for j in range(time_sample_count):
-            self.orig_index += 1.
-            n = self.processable(0)
-            if n <= 0:
-                # shift
-                self.old_data = data[:, j]
-                continue
-
-            if self.resampled_data.shape[1] < n:
-                self.resampled_data = np.zeros((self.height, n))
-
-            self.resampled_index = pyx_linear_interp_2D(
-                self.resampled_data,
-                data[:, j],
-                self.old_data,
-                self.orig_index,
-                self.resampled_index,
-                self.resampling_ratio,
-                n)
-            
-            # shift
-            self.old_data = data[:, j]
-
-            output_data[:, output_data_index:output_data_index+n] = self.resampled_data[:, :n]
-            output_data_index += n
-
-        return output_data
+        if time_sample_count == 0:
+            return np.zeros((self.height, 0))
+
+        # input column j is at index orig_index + j + 1
+        last_orig_index = self.orig_index + time_sample_count
+
+        # the output columns are at resampled_index + k * resampling_ratio,
+        # accumulated one step at a time like the index that is carried across calls
+        count = max(0, self.processable(time_sample_count))
+        steps = np.full(count + 1, self.resampling_ratio)
+        steps[0] = self.resampled_index
+        positions = np.cumsum(steps)[1:]
+
+        # each output column is between the input columns 'right' - 1 and 'right',
+        # where column -1 is the last one of the previous push
+        right = np.clip(np.floor(positions - self.orig_index).astype(int), 0, time_sample_count - 1)
+        a = (self.orig_index + right + 1) - positions
+
+        # blended time-major, so that the gathered columns are contiguous rows
+        previous = self.work_array("previous", time_sample_count + 1)
+        previous[0] = self.old_data
+        previous[1:] = data.T
+        output_data = self.work_array("output", count)
+        older = self.work_array("older", count)
+        np.take(previous, right + 1, axis=0, out=output_data)
+        np.take(previous, right, axis=0, out=older)
+        older -= output_data
+        older *= a[:, np.newaxis]
+        output_data += older
+
+        if len(positions) > 0:
+            self.resampled_index = positions[-1]
+        self.orig_index = last_orig_index
+        self.old_data = data[:, -1]
+
+        return output_data.T
+
+    # returns the first 'rows' rows of a time-major work array, grown as needed,
+    # to avoid allocating large temporaries on every push
+    def work_array(self, name, rows):
+        array = self.work_arrays.get(name)
+        if array is None or array.shape[1] != self.height:
+            array = np.empty((rows, self.height))
+            self.work_arrays[name] = array
+        elif array.shape[0] < rows:
+            array = np.empty((max(rows, 2 * array.shape[0]), self.height))
+            self.work_arrays[name] = array
+        return array[:rows]
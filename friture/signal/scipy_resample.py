@@ -43,7 +43,8 @@
 # IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED
 # OF THE POSSIBILITY OF SUCH DAMAGE.
 
-from numpy.fft import fft, ifft, ifftshift, fftfreq
+from numpy.fft import ifftshift, fftfreq
+from friture.signal.fft import fft, ifft
 from numpy import (arange, asarray, ndarray, zeros)
 import numpy as np
 
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Registry of the analysis windows, with cached read-only window arrays."""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy
+
+# the Kaiser window with this beta has a main lobe close to Blackman-Harris
+KAISER_BETA = 8.6
+# fraction of the Tukey window that is tapered
+TUKEY_ALPHA = 0.5
+
+# windows kept in the cache, for all the sizes and widgets together
+WINDOW_CACHE_SIZE = 64
+
+DEFAULT_WINDOW = "hann"
+
+WindowGains = namedtuple("WindowGains", ["coherent_gain", "enbw"])
+WindowGains.__doc__ = """Gain corrections of a window.
+
+coherent_gain is the amplitude gain of the window on a tone, sum(w) / N.
+enbw is the equivalent noise bandwidth, in bins, N * sum(w**2) / sum(w)**2.
+"""
+
+
+def cosine_sum(size, coefficients):
+    # symmetric window, like numpy.hanning: both ends are included
+    if size == 1:
+        return numpy.ones(1)
+    phase = 2. * numpy.pi * numpy.arange(size) / (size - 1)
+    window = numpy.zeros(size)
+    for k, a in enumerate(coefficients):
+        window += (-1) ** k * a * numpy.cos(k * phase)
+    return window
+
+
+def tukey(size, alpha=TUKEY_ALPHA):
+    if size == 1:
+        return numpy.ones(1)
+    x = numpy.linspace(0., 1., size)
+    window = numpy.ones(size)
+    taper = x < alpha / 2.
+    window[taper] = 0.5 * (1. - numpy.cos(2. * numpy.pi * x[taper] / alpha))
+    window[::-1][taper] = window[taper]
+    return window
+
+
+# name: (label, function of the size)
+WINDOWS = {
+    "hann": ("Hann", lambda size: cosine_sum(size, [0.5, 0.5])),
+    "hamming": ("Hamming", lambda size: cosine_sum(size, [0.54, 0.46])),
+    "blackmanharris": ("Blackman-Harris", lambda size: cosine_sum(size, [0.35875, 0.48829, 0.14128, 0.01168])),
+    "flattop": ("Flat top", lambda size: cosine_sum(size, [0.21557895, 0.41663158, 0.277263158, 0.083578947, 0.006947368])),
+    "kaiser": ("Kaiser (β = %g)" % (KAISER_BETA), lambda size: numpy.kaiser(size, KAISER_BETA)),
+    "tukey": ("Tukey (α = %g)" % (TUKEY_ALPHA), lambda size: tukey(size, TUKEY_ALPHA)),
+    "rectangular": ("Rectangular", lambda size: numpy.ones(size)),
+}
+
+WINDOW_NAMES = list(WINDOWS)
+
+
+def window_label(name):
+    return WINDOWS[name][0]
+
+
+@lru_cache(maxsize=WINDOW_CACHE_SIZE)
+def get_window(name, size, dtype=numpy.float64):
+    """Return the window array, shared by all the callers: it is read-only."""
+    if name not in WINDOWS:
+        raise ValueError("Unknown window: %s" % (name))
+
+    window = WINDOWS[name][1](size).astype(dtype)
+    window.setflags(write=False)
+    return window
+
+
+@lru_cache(maxsize=WINDOW_CACHE_SIZE)
+def window_gains(name, size):
+    window = get_window(name, size)
+    total = window.sum()
+    return WindowGains(total / size, size * (window ** 2).sum() / total ** 2)
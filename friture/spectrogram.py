@@ -20,7 +20,7 @@
 """Spectrogram widget, that displays a rolling 2D image of the time-frequency spectrum."""
 
 from PyQt5 import QtWidgets
-from numpy import log10, floor, zeros, float64, tile, array, ndarray
+from numpy import array, ndarray, interp, zeros
 from friture.audiobuffer import AudioBuffer
 from friture.imageplot import ImagePlot
 from friture.audioproc import audioproc
@@ -36,12 +36,21 @@ from friture.spectrogram_settings import (Spectrogram_Settings_Dialog,  # settin
                                           DEFAULT_SPEC_MIN,
                                           DEFAULT_SPEC_MAX,
                                           DEFAULT_TIMERANGE,
-                                          DEFAULT_WEIGHTING)
+                                          DEFAULT_WEIGHTING,
+                                          DEFAULT_WINDOW,
+                                          DEFAULT_BAND_LIMITED,
+                                          DEFAULT_TRANSFORM)
 import friture.plotting.frequency_scales as fscales
+from friture.cqt import ConstantQTransform
+from friture.multiresolution import MultiResolutionStft, multiresolution_bands
+from friture.stft import band_decimation
 
 from friture.audiobackend import SAMPLING_RATE, FRAMES_PER_BUFFER, AudioBackend
 from fractions import Fraction
 
+# resolution of the constant-Q transform
+CQT_BINS_PER_OCTAVE = 24
+
 
 class Spectrogram_Widget(QtWidgets.QWidget):
 
@@ -62,18 +71,19 @@ class Spectrogram_Widget(QtWidgets.QWidget):
 
         self.frequency_resampler = Frequency_Resampler()
         self.screen_resampler = Online_Linear_2D_resampler()
-        self.color_transform = Color_Transform()
+        self.color_transform = Color_Transform(DEFAULT_SPEC_MIN, DEFAULT_SPEC_MAX)
 
         self.audio_pipeline = Transform_Pipeline(
             [
                 self.frequency_resampler,
                 self.screen_resampler,
-                self.color_transform,
             ]
         )
 
         self.sfft_rate_frac = Fraction(1, 1)
 
+        self.sample_rate = SAMPLING_RATE
+
         self.maxfreq = DEFAULT_MAXFREQ
         self.proc.set_maxfreq(self.maxfreq)
         self.minfreq = DEFAULT_MINFREQ
@@ -82,7 +92,20 @@ class Spectrogram_Widget(QtWidgets.QWidget):
         self.spec_min = DEFAULT_SPEC_MIN
         self.spec_max = DEFAULT_SPEC_MAX
         self.weighting = DEFAULT_WEIGHTING
-
+        self.window_name = DEFAULT_WINDOW
+        self.band_limited = DEFAULT_BAND_LIMITED
+        # number of times the signal is decimated before the FFT
+        self.decimation = 0
+        # 0 for the FFT, 1 for the constant-Q transform, 2 for the multi-resolution FFT
+        self.transform = DEFAULT_TRANSFORM
+
+        # shared STFT of the displayed channel
+        self.subscription = None
+        # constant-Q or multi-resolution transform of the displayed channel, when enabled
+        self.analyzer = None
+
+        # the weighting of each screen pixel, and the pixel and weighting grids it was computed for
+        self.pixel_weighting_source = None
         self.update_weighting()
         self.freq = self.proc.get_freq_scale()
         self.frequency_resampler.setfreq(self.freq)
@@ -92,10 +115,9 @@ class Spectrogram_Widget(QtWidgets.QWidget):
 
         self.timerange_s = DEFAULT_TIMERANGE
 
-        self.old_index = 0
         self.overlap = 3. / 4.
         self.overlap_frac = Fraction(3, 4)
-        self.dT_s = self.fft_size * (1. - self.overlap) / float(SAMPLING_RATE)
+        self.dT_s = self.fft_size * (1. - self.overlap) / float(self.sample_rate)
 
         self.PlotZoneImage.setfreqrange(self.minfreq, self.maxfreq)
         self.PlotZoneImage.setspecrange(self.spec_min, self.spec_max)
@@ -103,7 +125,7 @@ class Spectrogram_Widget(QtWidgets.QWidget):
         self.PlotZoneImage.settimerange(self.timerange_s, self.dT_s)
         self.update_jitter()
 
-        self.sfft_rate_frac = Fraction(SAMPLING_RATE, self.fft_size) / (Fraction(1) - self.overlap_frac) / 1000
+        self.sfft_rate_frac = Fraction(self.sample_rate, self.fft_size) / (Fraction(1) - self.overlap_frac) / 1000
 
         # initialize the settings dialog
         self.settings_dialog = Spectrogram_Settings_Dialog(self)
@@ -113,63 +135,103 @@ class Spectrogram_Widget(QtWidgets.QWidget):
     # method
     def set_buffer(self, buffer: AudioBuffer) -> None:
         self.audiobuffer = buffer
-        self.old_index = self.audiobuffer.ringbuffer.offset
-
-    def log_spectrogram(self, sp):
-        # Note: implementing the log10 of the array in Cython did not bring
-        # any speedup.
-        # Idea: Instead of computing the log of the data, I could pre-compute
-        # a list of values associated with the colormap, and then do a search...
-        epsilon = 1e-30
-        return 10. * log10(sp + epsilon)
-
-    # scale the db spectrum from [- spec_range db ... 0 db] to [0..1] (do not clip, will be down after resampling)
-    def scale_spectrogram(self, sp):
-        return (sp - self.spec_min) / (self.spec_max - self.spec_min)
-
-    def handle_new_data(self, floatdata: ndarray) -> None:
-        # we need to maintain an index of where we are in the buffer
-        index = self.audiobuffer.ringbuffer.offset
-
-        available = index - self.old_index
+        self.subscribe()
+        self.audiobuffer.sample_rate_changed.connect(self.set_sample_rate)
+        self.set_sample_rate(self.audiobuffer.sample_rate)
+        self.audiobuffer.channels_changed.connect(self.set_channels)
 
-        if available < 0:
-            # ringbuffer must have grown or something...
-            available = 0
-            self.old_index = index
+    # slot
+    def set_channels(self, channels: tuple) -> None:
+        self.subscribe()
 
-        # if we have enough data to add a frequency column in the time-frequency plane, compute it
-        needed = self.fft_size * (1. - self.overlap)
-        realizable = int(floor(available / needed))
+    # method
+    def subscribe(self) -> None:
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
+
+        if self.analyzer is not None:
+            self.analyzer.close()
+            self.analyzer = None
+
+        if self.audiobuffer is not None:
+            # for now, take the first selected channel only
+            channel = self.audiobuffer.channels[0]
+            if self.transform == 1:
+                # same hop as the FFT, so that the column rate does not change
+                self.analyzer = ConstantQTransform(self.audiobuffer.stft, channel, CQT_BINS_PER_OCTAVE,
+                                                   min(self.minfreq, self.maxfreq), max(self.minfreq, self.maxfreq),
+                                                   self.sample_rate, self.hop())
+            elif self.transform == 2:
+                self.analyzer = MultiResolutionStft(self.audiobuffer.stft, channel, self.fft_size, self.overlap,
+                                                    self.window_name, self.sample_rate)
+            else:
+                self.subscription = self.audiobuffer.stft.subscribe(channel, self.fft_size, self.hop(), self.window_name, self.decimation)
 
-        if realizable > 0:
-            spn = zeros((len(self.freq), realizable), dtype=float64)
+    # method
+    def update_analysis(self) -> None:
+        # when only a low band is displayed, the signal is decimated so that a
+        # shorter FFT gives the same frequency resolution
+        realmax = max(self.minfreq, self.maxfreq)
+        self.decimation = band_decimation(realmax, self.sample_rate, self.fft_size) if self.band_limited else 0
+
+        factor = 2 ** self.decimation
+        self.proc.set_sample_rate(self.sample_rate / factor)
+        self.proc.set_fftsize(self.fft_size // factor)
+        self.subscribe()
+
+        if self.analyzer is not None:
+            self.freq = self.analyzer.freqs
+        else:
+            self.freq = self.proc.get_freq_scale()
+        self.frequency_resampler.setfreq(self.freq)
+        self.update_weighting()
+        self.update_column_rate()
 
-            for i in range(realizable):
-                floatdata = self.audiobuffer.data_indexed(self.old_index, self.fft_size)
-                data_time = self.audiobuffer.data_time(self.old_index)
+    # method
+    def update_column_rate(self) -> None:
+        # one column per hop
+        self.dT_s = self.hop() / float(self.sample_rate)
+        self.PlotZoneImage.settimerange(self.timerange_s, self.dT_s)
+        self.sfft_rate_frac = Fraction(self.sample_rate, self.hop()) / 1000
+        self.update_jitter()
 
-                # for now, take the first channel only
-                floatdata = floatdata[0, :]
+    # slot
+    def set_sample_rate(self, sample_rate: int) -> None:
+        if sample_rate == self.sample_rate:
+            return
 
-                # FFT transform
-                spn[:, i] = self.proc.analyzelive(floatdata)
+        self.sample_rate = sample_rate
+        self.settings_dialog.set_sample_rate(sample_rate)
+        # the frequency grid and the column duration both depend on the sample rate
+        self.setfftsize(self.fft_size)
 
-                self.old_index += int(needed)
+    def handle_new_data(self, floatdata: ndarray) -> None:
+        # the power spectra of all the frames that are ready, computed once
+        # for all the widgets that use the same FFT settings
+        if self.analyzer is not None:
+            spn, times = self.analyzer.process()
+        else:
+            spectra, times = self.subscription.spectra()
+            spn = spectra.T
+        realizable = spn.shape[1]
 
-            w = tile(self.w, (1, realizable))
-            norm_spectrogram = self.scale_spectrogram(self.log_spectrogram(spn) + w)
+        if realizable > 0:
+            data_time = times[-1]
 
             self.screen_resampler.set_height(self.PlotZoneImage.spectrogram_screen_height())
             screen_rate_frac = Fraction(self.PlotZoneImage.spectrogram_screen_width(), int(self.timerange_s * 1000))
             self.screen_resampler.set_ratio(self.sfft_rate_frac, screen_rate_frac)
             self.frequency_resampler.setnsamples(self.PlotZoneImage.spectrogram_screen_height())
+            self.update_pixel_weighting()
 
-            data = self.audio_pipeline.push(norm_spectrogram)
+            # the power is resampled to the screen, and converted to dB and
+            # colors in a single pass, written directly in the image
+            data = self.audio_pipeline.push(spn)
 
             # ideally we would use the time of the last frame that is really consumed by the FFT processor.
             # it may not be the current time if we don't have enough to compute a FFT window
-            self.PlotZoneImage.push(data, data_time)
+            self.PlotZoneImage.push(data, data_time, self.color_transform)
 
             if self.mustRestart:
                 self.PlotZoneImage.restart()
@@ -190,11 +252,18 @@ class Spectrogram_Widget(QtWidgets.QWidget):
         self.PlotZoneImage.draw()
 
     def update_jitter(self):
-        audio_jitter = 2 * float(FRAMES_PER_BUFFER) / SAMPLING_RATE
-        analysis_jitter = self.fft_size * (1. - self.overlap) / SAMPLING_RATE
+        audio_jitter = 2 * float(FRAMES_PER_BUFFER) / self.sample_rate
+        analysis_jitter = self.hop() / self.sample_rate
         total_jitter = audio_jitter + analysis_jitter
         self.PlotZoneImage.set_jitter(total_jitter)
 
+    # method
+    def hop(self):
+        if self.transform == 2:
+            # the hop of the shortest frames
+            return multiresolution_bands(self.fft_size, self.overlap)[1]
+        return int(self.fft_size * (1. - self.overlap))
+
     def pause(self):
         self.PlotZoneImage.pause()
 
@@ -206,15 +275,14 @@ class Spectrogram_Widget(QtWidgets.QWidget):
         self.minfreq = freq
         self.PlotZoneImage.setfreqrange(self.minfreq, self.maxfreq)
         self.frequency_resampler.setfreqrange(self.minfreq, self.maxfreq)
+        self.update_analysis()
 
     def setmaxfreq(self, freq):
         self.maxfreq = freq
         self.PlotZoneImage.setfreqrange(self.minfreq, self.maxfreq)
         self.frequency_resampler.setfreqrange(self.minfreq, self.maxfreq)
         self.proc.set_maxfreq(freq)
-        self.update_weighting()
-        self.freq = self.proc.get_freq_scale()
-        self.frequency_resampler.setfreq(self.freq)
+        self.update_analysis()
     
     def setfreqscale(self, freqscale):
         self.PlotZoneImage.setfreqscale(freqscale)
@@ -222,26 +290,29 @@ class Spectrogram_Widget(QtWidgets.QWidget):
 
     def setfftsize(self, fft_size):
         self.fft_size = fft_size
-
-        self.proc.set_fftsize(fft_size)
-        self.update_weighting()
-        self.freq = self.proc.get_freq_scale()
-        self.frequency_resampler.setfreq(self.freq)
-
-        self.dT_s = self.fft_size * (1. - self.overlap) / float(SAMPLING_RATE)
-        self.PlotZoneImage.settimerange(self.timerange_s, self.dT_s)
-
-        self.sfft_rate_frac = Fraction(SAMPLING_RATE, self.fft_size) / (Fraction(1) - self.overlap_frac) / 1000
-
-        self.update_jitter()
+        self.update_analysis()
 
     def setmin(self, value):
         self.spec_min = value
         self.PlotZoneImage.setspecrange(self.spec_min, self.spec_max)
+        self.color_transform.setspecrange(self.spec_min, self.spec_max)
 
     def setmax(self, value):
         self.spec_max = value
         self.PlotZoneImage.setspecrange(self.spec_min, self.spec_max)
+        self.color_transform.setspecrange(self.spec_min, self.spec_max)
+
+    def setbandlimited(self, band_limited):
+        self.band_limited = band_limited
+        self.update_analysis()
+
+    def settransform(self, transform):
+        self.transform = transform
+        self.update_analysis()
+
+    def setwindow(self, window_name):
+        self.window_name = window_name
+        self.subscribe()
 
     def setweighting(self, weighting):
         self.weighting = weighting
@@ -251,14 +322,37 @@ class Spectrogram_Widget(QtWidgets.QWidget):
     def update_weighting(self):
         A, B, C = self.proc.get_freq_weighting()
         if self.weighting == 0:
-            self.w = array([0.])
+            w = array([0.])
         elif self.weighting == 1:
-            self.w = A
+            w = A
         elif self.weighting == 2:
-            self.w = B
+            w = B
+        else:
+            w = C
+
+        if self.analyzer is not None and self.weighting != 0:
+            # the weightings are given on the FFT frequency grid
+            w = interp(self.analyzer.freqs, self.proc.get_freq_scale(), w)
+
+        # a column view, the weightings of audioproc are left 1-D
+        self.w = w.reshape(-1, 1)
+
+    # method
+    def update_pixel_weighting(self) -> None:
+        # the frequency grid of the pixels changes with the scale, the range and the height
+        source = (self.frequency_resampler.xscaled, self.w)
+        if self.pixel_weighting_source is not None \
+                and all(new is old for new, old in zip(source, self.pixel_weighting_source)):
+            return
+
+        if self.w.shape[0] == len(self.freq):
+            pixel_weighting = self.frequency_resampler.push(self.w)[:, 0]
         else:
-            self.w = C
-        self.w.shape = (len(self.w), 1)
+            # no weighting
+            pixel_weighting = zeros(self.frequency_resampler.xscaled.size)
+
+        self.color_transform.setweighting(pixel_weighting)
+        self.pixel_weighting_source = source
 
     def settings_called(self, checked):
         self.settings_dialog.show()
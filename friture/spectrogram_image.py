@@ -18,21 +18,25 @@
 # along with Friture.  If not, see <http://www.gnu.org/licenses/>.
 
 import logging
+from typing import Optional
 
 import numpy
 from PyQt5 import QtCore, QtGui
 
+from friture.signal.color_tranform import Color_Transform
+
 
 class CanvasScaledSpectrogram(QtCore.QObject):
     """
     A 2D image that is meant to hold the spectrogram data, in a ringbuffer-style.
 
     Architecture:
-    1. quickly convert each piece of data to a pixmap,
-    (with the right pixel size, since QImage to QPixmap conversion is slow, and scaling is slow too)
-    2. use a cache of size M=2*N
-    3. write in the cache at the position j and j+N
+    1. the image is a persistent RGB32 numpy array, wrapped once in a QImage
+    over the same memory, so the new columns are written in place,
+    2. the image is twice as wide as the canvas, M=2*N,
+    3. write in the image at the position j and j+N,
     4. the data part that is to be drawn can be read contiguously from j+1 to j+1+N
+    5. the written columns are marked dirty, so that a renderer can upload only those
     """
     canvasWidthChanged = QtCore.pyqtSignal(int)
 
@@ -44,25 +48,37 @@ class CanvasScaledSpectrogram(QtCore.QObject):
         self.canvas_height = canvas_height
         self.canvas_width = canvas_width
 
-        self.pixmap = QtGui.QPixmap(2 * self.canvas_width, self.canvas_height)
-        # print("pixmap info : hasAlpha =", self.pixmap.hasAlpha(), ", depth =", self.pixmap.depth(), ", default depth =", self.pixmap.defaultDepth())
-        self.pixmap.fill(QtGui.QColor("black"))
-        self.painter = QtGui.QPainter()
+        self.allocate(self.canvas_width, self.canvas_height)
         self.write_offset = 0
         self.last_write_time = 0
 
+    def allocate(self, width, height):
+        # the QImage does not own the memory, so the array must be kept alongside it
+        self.pixels = numpy.zeros((height, 2 * width), dtype=numpy.uint32)
+        self.pixels.fill(QtGui.QColor("black").rgb())
+        self.image = QtGui.QImage(self.pixels.data, 2 * width, height, self.pixels.strides[0], QtGui.QImage.Format_RGB32)
+        self.dirty_columns = numpy.ones(2 * width, dtype=bool)
+
     def erase(self):
-        self.pixmap = QtGui.QPixmap(2 * self.canvas_width, self.canvas_height)
-        self.pixmap.fill(QtGui.QColor("black"))
+        self.pixels.fill(QtGui.QColor("black").rgb())
+        self.dirty_columns[:] = True
         self.write_offset = 0
 
-    # resize the pixmap and update the offsets accordingly
+    # resize the image and update the offsets accordingly
     def resize(self, width, height):
-        oldWidth = int(self.pixmap.width() / 2)
+        oldWidth = self.pixels.shape[1] // 2
         if width != oldWidth:
-            self.write_offset = (self.write_offset % oldWidth) * width / oldWidth
+            self.write_offset = (self.write_offset % oldWidth) * width // oldWidth
             self.write_offset = self.write_offset % width  # to handle negative values
-        self.pixmap = self.pixmap.scaled(2 * width, height, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+
+        scaled = self.image.scaled(2 * width, height, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+        scaled = scaled.convertToFormat(QtGui.QImage.Format_RGB32)
+
+        self.allocate(width, height)
+        bits = scaled.constBits()
+        bits.setsize(scaled.sizeInBytes())
+        scaled_pixels = numpy.frombuffer(bits, dtype=numpy.uint32).reshape((height, scaled.bytesPerLine() // 4))
+        self.pixels[:] = scaled_pixels[:, :2 * width]
 
     def setcanvas_height(self, canvas_height):
         if self.canvas_height != int(canvas_height):
@@ -77,59 +93,60 @@ class CanvasScaledSpectrogram(QtCore.QObject):
             self.canvasWidthChanged.emit(int(canvas_width))
             self.logger.info("Spectrogram image: canvas_width changed, now: %d", int(canvas_width))
 
-    def addData(self, xyzs: numpy.ndarray, last_data_time: float) -> None:
-        # revert the frequency axis so that the larger frequencies
-        # are at the top of the widget
-        xyzs = xyzs[::-1, :]
+    def addData(self, xyzs: numpy.ndarray, last_data_time: float,
+                color_transform: Optional[Color_Transform] = None) -> None:
+        """Write new columns of colors in the image.
 
+        With a color transform, 'xyzs' is the power, and its colors are
+        written by the transform directly in the image.
+        """
+        # the columns that do not fit in the canvas would be overwritten right away
+        xyzs = xyzs[:, -self.canvas_width:]
         width = xyzs.shape[1]
 
-        # convert the data to colors, and then to a data string
-        # that QImage can understand
-        byteString = self.colors_to_bytes(xyzs)
-
-        myimage = self.prepare_image(byteString, width, xyzs.shape[0])
-
-        # Now, draw the image onto the widget pixmap, which has
+        # Now, write the columns in the image, which has
         # the structure of a 2D ringbuffer
 
         offset = self.write_offset % self.canvas_width
 
         # first copy, always complete
-        source1 = QtCore.QRectF(0, 0, width, xyzs.shape[0])
-        target1 = QtCore.QRectF(offset, 0, width, xyzs.shape[0])
+        if color_transform is not None and xyzs.shape[0] == self.canvas_height:
+            # the rows are written upwards, so that the larger frequencies
+            # are at the top of the widget
+            color_transform.push(xyzs, self.pixels[::-1, offset:offset + width])
+            height = self.canvas_height
+        else:
+            if color_transform is not None:
+                xyzs = color_transform.push(xyzs)
+            # revert the frequency axis so that the larger frequencies
+            # are at the top of the widget (a view, the flip is done by the write below)
+            xyzs = xyzs[::-1, :][:self.canvas_height]
+            height = xyzs.shape[0]
+            self.pixels[:height, offset:offset + width] = xyzs
+
         # second copy, can be folded
+        first = self.pixels[:height, offset:offset + width]
         direct = min(width, self.canvas_width - offset)
-        folded = width - direct
-        source2a = QtCore.QRectF(0, 0, direct, xyzs.shape[0])
-        target2a = QtCore.QRectF(offset + self.canvas_width, 0, direct, xyzs.shape[0])
-        source2b = QtCore.QRectF(direct, 0, folded, xyzs.shape[0])
-        target2b = QtCore.QRectF(0, 0, folded, xyzs.shape[0])
-
-        self.painter.begin(self.pixmap)
-        self.painter.drawImage(target1, myimage, source1)
-        self.painter.drawImage(target2a, myimage, source2a)
-        self.painter.drawImage(target2b, myimage, source2b)
-        self.painter.end()
+        self.pixels[:height, offset + self.canvas_width:offset + self.canvas_width + direct] = first[:, :direct]
+        self.pixels[:height, :width - direct] = first[:, direct:]
+
+        self.dirty_columns[offset:offset + width] = True
+        self.dirty_columns[offset + self.canvas_width:offset + self.canvas_width + direct] = True
+        self.dirty_columns[:width - direct] = True
 
         # updating the offset
         self.write_offset += width
         self.last_write_time = last_data_time
 
-    def colors_to_bytes(self, data):
-        return data.tostring()
-
-    # defined as a separate function so that it appears in the profiler
-    # NOTE: QImage with a colormap is slower (by a factor of 2) than the custom
-    # colormap code here.
-    def prepare_image(self, byteString, width, height):
-        myimage = QtGui.QImage(byteString, width, height, QtGui.QImage.Format_RGB32)
-        return myimage
+    def getimage(self):
+        return self.image
 
-    def getpixmap(self):
-        return self.pixmap
+    # returns the mask of the columns that have been written and not uploaded yet,
+    # the renderer clears the columns that it uploads
+    def getdirtycolumns(self):
+        return self.dirty_columns
 
     def getpixmapoffset(self, read_time: float, canvas_timerange: float) -> float:        
         read_write_time_delay = read_time - self.last_write_time
         read_write_pixel_delay = self.canvas_width * read_write_time_delay / canvas_timerange
-        return (self.write_offset + read_write_pixel_delay) % self.canvas_width
\ No newline at end of file
+        return (self.write_offset + read_write_pixel_delay) % self.canvas_width
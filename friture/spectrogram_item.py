@@ -17,24 +17,41 @@
 # You should have received a copy of the GNU General Public License
 # along with Friture.  If not, see <http://www.gnu.org/licenses/>.
 
+import math
+
+from PyQt5 import sip
 from PyQt5.QtCore import pyqtSignal, pyqtProperty, QRectF
-from PyQt5.QtQuick import QQuickPaintedItem
-from PyQt5.QtGui import QPainter
+from PyQt5.QtQuick import QQuickItem, QSGNode, QSGTexture
 from friture.audiobackend import AudioBackend
 from friture.spectrogram_item_data import SpectrogramImageData
 
-# QQuickPaintedItem does not work for all Qt backends.
-# Ideally we would use QSGSimpleTextureNode and createTextureFromImage instead,
-# but I did not manage to fix the segfaults that I got with those
-# To revist in Qt6
-class SpectrogramItem(QQuickPaintedItem):
+# width of the textures that the spectrogram image is split into, so that
+# only the tiles with new columns are uploaded
+TEXTURE_TILE_WIDTH = 64
+
+
+class SpectrogramItem(QQuickItem):
+    """Draw the spectrogram image as scene-graph textures.
+
+    The ring image of the spectrogram is split in vertical tiles, each one
+    a texture of an image node. A tile is uploaded again only when new
+    columns are written to it, and the scrolling only moves the tiles and
+    their source rects.
+
+    The nodes come from QQuickWindow.createImageNode, so that they work
+    with the OpenGL and the software renderers alike.
+    """
     curveChanged = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setAntialiasing(True)
+        self.setFlag(QQuickItem.ItemHasContents, True)
 
         self._curve = SpectrogramImageData()
+        self.last_paint_time = 0.
+
+        # the image nodes of the tiles, owned by the scene graph
+        self.tile_nodes = []
 
     @pyqtProperty(SpectrogramImageData, notify=curveChanged)
     def curve(self) -> SpectrogramImageData:
@@ -53,13 +70,61 @@ class SpectrogramItem(QQuickPaintedItem):
     def updateScreenSize(self) -> None:
         self._curve.update_screen_size(self.width(), self.height())
 
-    def paint(self, painter: QPainter) -> None:
+    # called on the render thread, while the GUI thread is blocked
+    def updatePaintNode(self, paint_node, update_data):
+        if paint_node is None:
+            paint_node = QSGNode()
+            self.tile_nodes = []
+            # the new nodes have no texture yet
+            self._curve.dirty_columns()[:] = True
+
         if self._curve.is_playing:
             self.last_paint_time = AudioBackend().get_stream_time()
-        
-        pixmap_source_rect = self._curve.pixmap_source_rect(self.last_paint_time)
 
-        painter.drawPixmap(
-            QRectF(0, 0, self.width(), self.height()),
-            self._curve.pixmap(),
-            pixmap_source_rect)
\ No newline at end of file
+        image = self._curve.image()
+        # all the columns are dirty when the image is reallocated with a new size
+        dirty_columns = self._curve.dirty_columns()
+
+        tile_count = math.ceil(image.width() / TEXTURE_TILE_WIDTH)
+        # a tile node is only created with its first texture, since the
+        # renderers do not expect image nodes without a texture
+        self.tile_nodes += [None] * (tile_count - len(self.tile_nodes))
+
+        # the visible part of the image is contiguous, see CanvasScaledSpectrogram
+        source_rect = self._curve.pixmap_source_rect(self.last_paint_time)
+        x_scale = self.width() / source_rect.width() if source_rect.width() > 0 else 0.
+
+        for tile, node in enumerate(self.tile_nodes):
+            left = tile * TEXTURE_TILE_WIDTH
+            right = min(left + TEXTURE_TILE_WIDTH, image.width())
+            visible_left = max(left, source_rect.left())
+            visible_right = min(right, source_rect.right())
+
+            if tile >= tile_count or visible_right <= visible_left:
+                # the dirty columns of this tile are uploaded when it becomes visible
+                if node is not None:
+                    node.setRect(QRectF())
+                continue
+
+            if dirty_columns[left:right].any():
+                tile_image = image.copy(left, 0, right - left, image.height())
+                texture = self.window().createTextureFromImage(tile_image)
+                # the node deletes its previous texture and this one when it is replaced
+                sip.transferto(texture, None)
+                if node is None:
+                    node = self.window().createImageNode()
+                    node.setFiltering(QSGTexture.Linear)
+                    node.setOwnsTexture(True)
+                    # the renderer looks at the texture as soon as the node is in the tree
+                    node.setTexture(texture)
+                    paint_node.appendChildNode(node)
+                    self.tile_nodes[tile] = node
+                else:
+                    node.setTexture(texture)
+                dirty_columns[left:right] = False
+
+            node.setSourceRect(QRectF(visible_left - left, source_rect.top(), visible_right - visible_left, source_rect.height()))
+            node.setRect(QRectF((visible_left - source_rect.left()) * x_scale, 0.,
+                                (visible_right - visible_left) * x_scale, self.height()))
+
+        return paint_node
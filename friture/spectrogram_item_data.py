@@ -21,7 +21,9 @@ from PyQt5 import QtCore
 from PyQt5.QtCore import pyqtProperty
 import numpy
 import math
+from typing import Optional
 
+from friture.signal.color_tranform import Color_Transform
 from friture.spectrogram_image import CanvasScaledSpectrogram
 
 class SpectrogramImageData(QtCore.QObject):
@@ -41,18 +43,22 @@ class SpectrogramImageData(QtCore.QObject):
         self.jitter_seconds = 0.
         self.is_playing = True
 
-    def push(self, data: numpy.ndarray, last_data_time: float) -> None:
+    def push(self, data: numpy.ndarray, last_data_time: float,
+             color_transform: Optional[Color_Transform] = None) -> None:
         self.last_data_time = last_data_time
 
-        self.canvasscaledspectrogram.addData(data, last_data_time)
+        self.canvasscaledspectrogram.addData(data, last_data_time, color_transform)
 
         self.data_changed.emit()
     
     def draw(self):
         self.data_changed.emit()
 
-    def pixmap(self):
-        return self.canvasscaledspectrogram.getpixmap()
+    def image(self):
+        return self.canvasscaledspectrogram.getimage()
+
+    def dirty_columns(self):
+        return self.canvasscaledspectrogram.getdirtycolumns()
     
     def pixmap_source_rect(self, paint_time):
         pixmap_offset = self.canvasscaledspectrogram.getpixmapoffset(paint_time - self.jitter_seconds, self.T + self.jitter_seconds)
@@ -22,6 +22,7 @@ import logging
 from PyQt5 import QtWidgets
 from friture.audiobackend import SAMPLING_RATE
 import friture.plotting.frequency_scales as fscales
+from friture.signal.windows import DEFAULT_WINDOW, WINDOW_NAMES, window_label
 
 # shared with spectrogram.py
 DEFAULT_FFT_SIZE = 7  # 4096 points
@@ -32,6 +33,8 @@ DEFAULT_SPEC_MIN = -140
 DEFAULT_SPEC_MAX = 0
 DEFAULT_TIMERANGE = 10.
 DEFAULT_WEIGHTING = 0  # None
+DEFAULT_BAND_LIMITED = True
+DEFAULT_TRANSFORM = 0  # FFT
 
 
 class Spectrogram_Settings_Dialog(QtWidgets.QDialog):
@@ -113,8 +116,31 @@ class Spectrogram_Settings_Dialog(QtWidgets.QDialog):
         self.comboBox_weighting.addItem("C")
         self.comboBox_weighting.setCurrentIndex(DEFAULT_WEIGHTING)
 
+        self.comboBox_window = QtWidgets.QComboBox(self)
+        self.comboBox_window.setObjectName("window")
+        for name in WINDOW_NAMES:
+            self.comboBox_window.addItem(window_label(name), name)
+        self.comboBox_window.setCurrentIndex(WINDOW_NAMES.index(DEFAULT_WINDOW))
+
+        self.checkBox_bandLimited = QtWidgets.QCheckBox(self)
+        self.checkBox_bandLimited.setObjectName("bandLimited")
+        self.checkBox_bandLimited.setToolTip("Decimate the signal before the FFT when the max frequency is low")
+        self.checkBox_bandLimited.setChecked(DEFAULT_BAND_LIMITED)
+
+        self.comboBox_transform = QtWidgets.QComboBox(self)
+        self.comboBox_transform.setObjectName("transform")
+        self.comboBox_transform.addItem("FFT")
+        self.comboBox_transform.addItem("Constant-Q")
+        self.comboBox_transform.addItem("Multi-resolution FFT")
+        self.comboBox_transform.setToolTip("The constant-Q transform has the same resolution in each octave.\n"
+                                           "The multi-resolution FFT uses shorter frames for the higher frequencies.")
+        self.comboBox_transform.setCurrentIndex(DEFAULT_TRANSFORM)
+
         self.formLayout.addRow("Time range:", self.doubleSpinBox_timerange)
+        self.formLayout.addRow("Transform:", self.comboBox_transform)
         self.formLayout.addRow("FFT Size:", self.comboBox_fftsize)
+        self.formLayout.addRow("Window:", self.comboBox_window)
+        self.formLayout.addRow("Band-limited analysis:", self.checkBox_bandLimited)
         self.formLayout.addRow("Frequency scale:", self.comboBox_freqscale)
         self.formLayout.addRow("Min frequency:", self.spinBox_minfreq)
         self.formLayout.addRow("Max frequency:", self.spinBox_maxfreq)
@@ -124,7 +150,10 @@ class Spectrogram_Settings_Dialog(QtWidgets.QDialog):
 
         self.setLayout(self.formLayout)
 
+        self.comboBox_transform.currentIndexChanged.connect(self.parent().settransform)
         self.comboBox_fftsize.currentIndexChanged.connect(self.fftsizechanged)
+        self.comboBox_window.currentIndexChanged.connect(self.windowchanged)
+        self.checkBox_bandLimited.toggled.connect(self.parent().setbandlimited)
         self.comboBox_freqscale.currentIndexChanged.connect(self.freqscalechanged)
         self.spinBox_minfreq.valueChanged.connect(self.parent().setminfreq)
         self.spinBox_maxfreq.valueChanged.connect(self.parent().setmaxfreq)
@@ -139,15 +168,30 @@ class Spectrogram_Settings_Dialog(QtWidgets.QDialog):
         fft_size = 2 ** index * 32
         self.parent().setfftsize(fft_size)
 
+    # slot
+    def windowchanged(self, index):
+        window = self.comboBox_window.itemData(index)
+        self.logger.info("window slot %d %s", index, window)
+        self.parent().setwindow(window)
+
     # slot
     def freqscalechanged(self, index):
         self.logger.info("freq_scale slot %d %s", index, fscales.ALL[index])
         self.parent().setfreqscale(fscales.ALL[index])
         
+    # method
+    def set_sample_rate(self, sample_rate):
+        # the frequency range is bounded by the Nyquist frequency
+        self.spinBox_minfreq.setMaximum(sample_rate // 2)
+        self.spinBox_maxfreq.setMaximum(sample_rate // 2)
+
     # method
     def saveState(self, settings):
         settings.setValue("timeRange", self.doubleSpinBox_timerange.value())
+        settings.setValue("transform", self.comboBox_transform.currentIndex())
         settings.setValue("fftSize", self.comboBox_fftsize.currentIndex())
+        settings.setValue("window", self.comboBox_window.currentData())
+        settings.setValue("bandLimited", self.checkBox_bandLimited.isChecked())
         settings.setValue("freqScale", self.comboBox_freqscale.currentIndex())
         settings.setValue("freqMin", self.spinBox_minfreq.value())
         settings.setValue("freqMax", self.spinBox_maxfreq.value())
@@ -159,8 +203,15 @@ class Spectrogram_Settings_Dialog(QtWidgets.QDialog):
     def restoreState(self, settings):
         timeRange = settings.value("timeRange", DEFAULT_TIMERANGE, type=float)
         self.doubleSpinBox_timerange.setValue(timeRange)
+        transform = settings.value("transform", DEFAULT_TRANSFORM, type=int)
+        self.comboBox_transform.setCurrentIndex(transform)
         fft_size = settings.value("fftSize", DEFAULT_FFT_SIZE, type=int)  # 7th index is 1024 points
         self.comboBox_fftsize.setCurrentIndex(fft_size)
+        window = settings.value("window", DEFAULT_WINDOW, type=str)
+        if window in WINDOW_NAMES:
+            self.comboBox_window.setCurrentIndex(WINDOW_NAMES.index(window))
+        bandLimited = settings.value("bandLimited", DEFAULT_BAND_LIMITED, type=bool)
+        self.checkBox_bandLimited.setChecked(bandLimited)
         freqscale = settings.value("freqScale", DEFAULT_FREQ_SCALE, type=int)
         self.comboBox_freqscale.setCurrentIndex(freqscale)
         freqMin = settings.value("freqMin", DEFAULT_MINFREQ, type=int)
@@ -18,7 +18,7 @@
 # along with Friture.  If not, see <http://www.gnu.org/licenses/>.
 
 from PyQt5 import QtWidgets
-from numpy import log10, argmax, zeros, arange, floor, float64
+from numpy import log10, argmax, zeros, arange, float64
 from friture.audioproc import audioproc  # audio processing class
 from friture.spectrum_settings import (Spectrum_Settings_Dialog,  # settings dialog
                                        DEFAULT_FFT_SIZE,
@@ -28,12 +28,15 @@ from friture.spectrum_settings import (Spectrum_Settings_Dialog,  # settings dia
                                        DEFAULT_SPEC_MIN,
                                        DEFAULT_SPEC_MAX,
                                        DEFAULT_WEIGHTING,
+                                       DEFAULT_WINDOW,
+                                       DEFAULT_BAND_LIMITED,
                                        DEFAULT_RESPONSE_TIME,
                                        DEFAULT_SHOW_FREQ_LABELS)
 import friture.plotting.frequency_scales as fscales
 
 from friture.audiobackend import SAMPLING_RATE
 from friture.spectrumPlotWidget import SpectrumPlotWidget
+from friture.stft import band_decimation
 from friture_extensions.exp_smoothing_conv import pyx_exp_smoothed_value_numpy
 
 
@@ -55,6 +58,8 @@ class Spectrum_Widget(QtWidgets.QWidget):
         # initialize the class instance that will do the fft
         self.proc = audioproc()
 
+        self.sample_rate = SAMPLING_RATE
+
         self.maxfreq = DEFAULT_MAXFREQ
         self.proc.set_maxfreq(self.maxfreq)
         self.minfreq = DEFAULT_MINFREQ
@@ -63,13 +68,18 @@ class Spectrum_Widget(QtWidgets.QWidget):
         self.spec_min = DEFAULT_SPEC_MIN
         self.spec_max = DEFAULT_SPEC_MAX
         self.weighting = DEFAULT_WEIGHTING
+        self.window_name = DEFAULT_WINDOW
+        self.band_limited = DEFAULT_BAND_LIMITED
+        # number of times the signal is decimated before the FFT
+        self.decimation = 0
         self.dual_channels = False
         self.response_time = DEFAULT_RESPONSE_TIME
 
         self.update_weighting()
         self.freq = self.proc.get_freq_scale()
 
-        self.old_index = 0
+        # shared STFT of each displayed channel
+        self.subscriptions = []
         self.overlap = 3. / 4.
 
         self.update_display_buffers()
@@ -91,7 +101,51 @@ class Spectrum_Widget(QtWidgets.QWidget):
     # method
     def set_buffer(self, buffer):
         self.audiobuffer = buffer
-        self.old_index = self.audiobuffer.ringbuffer.offset
+        self.subscribe()
+        self.audiobuffer.sample_rate_changed.connect(self.set_sample_rate)
+        self.set_sample_rate(self.audiobuffer.sample_rate)
+        self.audiobuffer.channels_changed.connect(self.set_channels)
+
+    # slot
+    def set_channels(self, channels):
+        self.subscribe()
+
+    # method
+    def subscribe(self):
+        for subscription in self.subscriptions:
+            subscription.close()
+
+        # in dual-channel mode, both selected channels are displayed
+        n_channels = 2 if self.dual_channels else 1
+        channels = self.audiobuffer.channels[:n_channels] if self.audiobuffer is not None else ()
+        self.subscriptions = [self.audiobuffer.stft.subscribe(channel, self.fft_size, self.hop(), self.window_name, self.decimation)
+                              for channel in channels]
+
+    # method
+    def update_analysis(self):
+        # when only a low band is displayed, the signal is decimated so that a
+        # shorter FFT gives the same frequency resolution
+        realmax = max(self.minfreq, self.maxfreq)
+        self.decimation = band_decimation(realmax, self.sample_rate, self.fft_size) if self.band_limited else 0
+
+        factor = 2 ** self.decimation
+        self.proc.set_sample_rate(self.sample_rate / factor)
+        self.proc.set_fftsize(self.fft_size // factor)
+        self.freq = self.proc.get_freq_scale()
+        self.update_display_buffers()
+        self.update_weighting()
+        # reset kernel and parameters for the smoothing filter
+        self.setresponsetime(self.response_time)
+        self.subscribe()
+
+    # slot
+    def set_sample_rate(self, sample_rate):
+        if sample_rate == self.sample_rate:
+            return
+
+        self.sample_rate = sample_rate
+        self.update_analysis()
+        self.settings_dialog.set_sample_rate(sample_rate)
 
     def log_spectrogram(self, sp):
         # Note: implementing the log10 of the array in Cython did not bring
@@ -114,50 +168,34 @@ class Spectrum_Widget(QtWidgets.QWidget):
         return res
 
     def handle_new_data(self, floatdata):
-        # we need to maintain an index of where we are in the buffer
-        index = self.audiobuffer.ringbuffer.offset
-
-        available = index - self.old_index
-
-        if available < 0:
-            # ringbuffer must have grown or something...
-            available = 0
-            self.old_index = index
-
-        # if we have enough data to add a frequency column in the time-frequency plane, compute it
-        needed = self.fft_size * (1. - self.overlap)
-        realizable = int(floor(available / needed))
+        # the power spectra of all the frames that are ready, computed once
+        # for all the widgets that use the same FFT settings
+        spectra = [subscription.spectra()[0] for subscription in self.subscriptions]
+        # the channel streams are in step, they have the same frames
+        realizable = min((len(sp) for sp in spectra), default=0)
 
         if realizable > 0:
-            sp1n = zeros((len(self.freq), realizable), dtype=float64)
-            sp2n = zeros((len(self.freq), realizable), dtype=float64)
-
-            for i in range(realizable):
-                floatdata = self.audiobuffer.data_indexed(self.old_index, self.fft_size)
-
-                # first channel
-                # FFT transform
-                sp1n[:, i] = self.proc.analyzelive(floatdata[0, :])
-
-                if self.dual_channels and floatdata.shape[0] > 1:
-                    # second channel for comparison
-                    sp2n[:, i] = self.proc.analyzelive(floatdata[1, :])
-
-                self.old_index += int(needed)
+            # in dual-channel mode, both channels are smoothed together
+            n_channels = 2 if self.dual_channels else 1
+            nfreq = len(self.freq)
+            spn = zeros((n_channels, nfreq, realizable), dtype=float64)
+            for channel, sp in enumerate(spectra):
+                spn[channel] = sp[:realizable].T
 
             # compute the widget data
-            sp1 = pyx_exp_smoothed_value_numpy(self.kernel, self.alpha, sp1n, self.dispbuffers1)
-            sp2 = pyx_exp_smoothed_value_numpy(self.kernel, self.alpha, sp2n, self.dispbuffers2)
+            # the smoothing runs on the stacked channels, row by row
+            sp = pyx_exp_smoothed_value_numpy(self.kernel, self.alpha,
+                                              spn.reshape(n_channels * nfreq, realizable),
+                                              self.dispbuffers[:n_channels].reshape(n_channels * nfreq))
+            sp.shape = (n_channels, nfreq)
             # store result for next computation
-            self.dispbuffers1 = sp1
-            self.dispbuffers2 = sp2
+            self.dispbuffers[:n_channels] = sp
 
-            sp1.shape = self.freq.shape
-            sp2.shape = self.freq.shape
+            sp1 = sp[0]
             self.w.shape = self.freq.shape
 
-            if self.dual_channels and floatdata.shape[0] > 1:
-                dB_spectrogram = self.log_spectrogram(sp2) - self.log_spectrogram(sp1)
+            if self.dual_channels and len(spectra) > 1:
+                dB_spectrogram = self.log_spectrogram(sp[1]) - self.log_spectrogram(sp1)
             else:
                 dB_spectrogram = self.log_spectrogram(sp1) + self.w
 
@@ -178,6 +216,10 @@ class Spectrum_Widget(QtWidgets.QWidget):
     def canvasUpdate(self):
         self.PlotZoneSpect.canvasUpdate()
 
+    # method
+    def hop(self):
+        return int(self.fft_size * (1. - self.overlap))
+
     def pause(self):
         self.PlotZoneSpect.pause()
 
@@ -196,7 +238,7 @@ class Spectrum_Widget(QtWidgets.QWidget):
         # we compute alpha so that the N most recent samples represent 100*w percent of the output
         w = 0.65
         delta_n = self.fft_size * (1. - self.overlap)
-        n = self.response_time * SAMPLING_RATE / delta_n
+        n = self.response_time * self.sample_rate / delta_n
         N = 2 * 4096
         self.alpha = 1. - (1. - w) ** (1. / (n + 1))
         self.kernel = self.compute_kernel(self.alpha, N)
@@ -206,8 +248,8 @@ class Spectrum_Widget(QtWidgets.QWidget):
         return kernel
 
     def update_display_buffers(self):
-        self.dispbuffers1 = zeros(len(self.freq))
-        self.dispbuffers2 = zeros(len(self.freq))
+        # one row of smoothed spectrum per channel
+        self.dispbuffers = zeros((2, len(self.freq)))
 
     def setminfreq(self, minfreq):
         self.setMinMaxFreq(minfreq, self.maxfreq)
@@ -223,23 +265,17 @@ class Spectrum_Widget(QtWidgets.QWidget):
         realmax = max(self.minfreq, self.maxfreq)
 
         self.proc.set_maxfreq(realmax)
-
-        self.freq = self.proc.get_freq_scale()
-        self.update_display_buffers()
-        self.update_weighting()
-        # reset kernel and parameters for the smoothing filter
-        self.setresponsetime(self.response_time)
+        self.update_analysis()
 
         self.PlotZoneSpect.setfreqrange(realmin, realmax)
 
     def setfftsize(self, fft_size):
         self.fft_size = fft_size
-        self.proc.set_fftsize(self.fft_size)
-        self.freq = self.proc.get_freq_scale()
-        self.update_display_buffers()
-        self.update_weighting()
-        # reset kernel and parameters for the smoothing filter
-        self.setresponsetime(self.response_time)
+        self.update_analysis()
+
+    def setbandlimited(self, band_limited):
+        self.band_limited = band_limited
+        self.update_analysis()
 
     def setmin(self, value):
         self.spec_min = value
@@ -249,6 +285,10 @@ class Spectrum_Widget(QtWidgets.QWidget):
         self.spec_max = value
         self.PlotZoneSpect.setspecrange(self.spec_min, self.spec_max)
 
+    def setwindow(self, window_name):
+        self.window_name = window_name
+        self.subscribe()
+
     def setweighting(self, weighting):
         self.weighting = weighting
         self.PlotZoneSpect.setweighting(weighting)
@@ -269,6 +309,9 @@ class Spectrum_Widget(QtWidgets.QWidget):
 
     def setdualchannels(self, dual_enabled):
         self.dual_channels = dual_enabled
+        self.subscribe()
+        # the second channel is not smoothed in single-channel mode, start it over
+        self.dispbuffers[1] = 0.
         if dual_enabled:
             self.PlotZoneSpect.set_peaks_enabled(False)
             self.PlotZoneSpect.set_baseline_dataUnits(0.)
@@ -10,7 +10,6 @@ from PyQt5.QtQuickWidgets import QQuickWidget
 from numpy import zeros, ones, log10
 import numpy as np
 
-from friture.audiobackend import SAMPLING_RATE
 from friture.plotting.coordinateTransform import CoordinateTransform
 from friture.spectrum_data import Spectrum_Data
 from friture.filled_curve import CurveType, FilledCurve
@@ -166,7 +165,8 @@ class SpectrumPlotWidget(QtWidgets.QWidget):
             x_left[0] = 1e-10
             x_left[1:] = (x[1:] + x[:-1]) / 2.0
             x_right[:-1] = x_left[1:]
-            x_right[-1] = float(SAMPLING_RATE / 2)
+            # the last bin is at the Nyquist frequency
+            x_right[-1] = float(x[-1])
             scaled_x_left = self.normHorizontalScaleTransform.toScreen(x_left)
             scaled_x_right = self.normHorizontalScaleTransform.toScreen(x_right)
 
@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Short-time Fourier transforms shared by all the widgets that read the same audio."""
+
+import logging
+import weakref
+from typing import Dict, Optional, Tuple
+
+from numpy import arange, array, ascontiguousarray, concatenate, searchsorted, zeros
+
+from friture import generated_filters
+from friture.audioproc import audioproc
+from friture.ringbuffer import RingBuffer, RingBufferReader
+from friture.signal.decimate import decimate_multiple, decimate_multiple_filtic
+from friture.signal.windows import DEFAULT_WINDOW
+
+# at most 16x decimation for the band-limited analysis
+MAX_DECIMATION = 4
+# the analyzed frames are not made shorter than the smallest FFT size of the settings
+MIN_DECIMATED_FFT_SIZE = 32
+# the half-band decimation filter passes up to this fraction of the decimated Nyquist frequency
+DECIMATION_PASSBAND = 0.96
+
+# (channel, fft_size, hop, window, decimation)
+StftKey = Tuple[int, int, int, str, int]
+
+# one service per ringbuffer, dropped with the ringbuffer
+services: 'weakref.WeakKeyDictionary[RingBuffer, StftService]' = weakref.WeakKeyDictionary()
+
+
+def band_decimation(maxfreq: float, sample_rate: float, fft_size: int) -> int:
+    """How many times the signal can be decimated by 2 while keeping the band up to 'maxfreq'."""
+    decimation = 0
+    while decimation < MAX_DECIMATION \
+            and maxfreq <= DECIMATION_PASSBAND * sample_rate / 2 ** (decimation + 2) \
+            and fft_size // 2 ** (decimation + 1) >= MIN_DECIMATED_FFT_SIZE:
+        decimation += 1
+    return decimation
+
+
+def stft_service(ringbuffer: RingBuffer) -> 'StftService':
+    """Return the STFT service that reads 'ringbuffer', creating it if needed."""
+    service = services.get(ringbuffer)
+    if service is None:
+        service = StftService(ringbuffer)
+        services[ringbuffer] = service
+    return service
+
+
+class StftStream:
+    """The frames of one configuration, computed once for all its subscribers.
+
+    The frame ends are aligned on multiples of the hop, so that the streams of
+    different channels with the same frame size and hop are in step, and a
+    subscriber can combine them.
+
+    Only the last batch of frames is kept. Like the ringbuffer views, it is
+    only valid until the next push, so a subscriber that skips a batch
+    misses its frames.
+
+    For a band-limited analysis, the channel is first decimated 'decimation'
+    times by the half-band filter into a private ringbuffer, and the frames
+    are taken from there. They are 2 ** decimation times shorter, for the same
+    frequency resolution and duration, and their spectra only cover the
+    decimated band.
+    """
+
+    def __init__(self, ringbuffer: RingBuffer, channel: int, fft_size: int, hop: int, window: str, decimation: int = 0) -> None:
+        self.ringbuffer = ringbuffer
+        self.channel = channel
+        self.window = window
+        self.decimation = decimation
+        self.refcount = 0
+
+        factor = 2 ** decimation
+        self.fft_size = fft_size // factor
+        self.hop = max(1, hop // factor)
+
+        self.proc = audioproc()
+        self.proc.set_fftsize(self.fft_size)
+        self.proc.set_window(window)
+
+        self.source: Optional[RingBufferReader] = None
+        if decimation == 0:
+            self.analyzed = ringbuffer
+            self.analyzed_channel = channel
+            offset = ringbuffer.published_offset()
+        else:
+            # whole chunks of 'factor' samples are decimated, the chunks are
+            # aligned on the hop so that the channels are decimated in step
+            chunk_start = -(-ringbuffer.published_offset() // hop) * hop
+            self.source = RingBufferReader(ringbuffer, factor, factor, position=chunk_start + factor)
+            bdec, adec = generated_filters.PARAMS['dec']
+            self.bdec = array(bdec)
+            self.adec = array(adec)
+            self.zis = decimate_multiple_filtic(decimation, self.bdec, self.adec)
+
+            self.analyzed = RingBuffer()
+            self.analyzed.set_sample_rate(ringbuffer.sample_rate / factor)
+            self.analyzed_channel = 0
+            offset = 0
+
+        self.reader = RingBufferReader(self.analyzed, self.fft_size, self.hop, position=self.aligned_end(offset))
+
+        self.computed_offset: Optional[int] = None
+        self.frames = zeros((1, 0, self.fft_size))
+        self.spectra = zeros((0, self.fft_size // 2 + 1))
+        self.transforms = zeros((0, self.fft_size // 2 + 1), dtype=complex)
+        self.times = zeros(0)
+        self.ends = zeros(0, dtype=int)
+
+    def aligned_end(self, offset: int) -> int:
+        # end of the first whole frame after 'offset' in the analyzed ringbuffer,
+        # aligned on the hop like the frames of the other channels
+        return -(-(offset + self.fft_size) // self.hop) * self.hop
+
+    def start_end(self) -> int:
+        """End of the first frame that a new subscriber gets.
+
+        It is the same as for a new stream, so that the subscriptions made
+        at the same time to several channels are in step, whether their
+        streams already existed or not.
+        """
+        return max(self.reader.position, self.aligned_end(self.analyzed.published_offset()))
+
+    def update(self) -> None:
+        offset = self.ringbuffer.published_offset()
+        if offset == self.computed_offset:
+            return
+        self.computed_offset = offset
+
+        if self.source is not None:
+            self.decimate(self.source)
+
+        frames, times = self.reader.frames()
+        n = frames.shape[1]
+        # the reader may have skipped overwritten frames
+        first_end = self.reader.position - n * self.hop
+
+        self.frames = frames
+        self.times = times
+        self.ends = first_end + arange(n) * self.hop
+        if self.analyzed_channel < frames.shape[0]:
+            self.spectra = self.proc.analyze_frames(frames[self.analyzed_channel])
+            self.transforms = self.proc.transforms
+        else:
+            # the channel is not captured (anymore)
+            self.spectra = zeros((n, self.fft_size // 2 + 1))
+            self.transforms = zeros((n, self.fft_size // 2 + 1), dtype=complex)
+
+    def decimate(self, source: RingBufferReader) -> None:
+        chunks, times = source.frames()
+        n = chunks.shape[1]
+        if n == 0:
+            return
+
+        self.analyzed.set_sample_rate(self.ringbuffer.sample_rate / 2 ** self.decimation)
+
+        if self.channel < chunks.shape[0]:
+            # consecutive chunks are one contiguous run of samples
+            x = ascontiguousarray(chunks[self.channel]).reshape(-1)
+            x_dec, self.zis = decimate_multiple(self.decimation, self.bdec, self.adec, x, self.zis)
+        else:
+            x_dec = zeros(n)
+
+        self.analyzed.push(x_dec.reshape(1, -1), times[-1])
+
+    def close(self) -> None:
+        self.analyzed.release(self.reader)
+        if self.source is not None:
+            self.ringbuffer.release(self.source)
+
+
+class StftSubscription:
+    """The spectra of one configuration, as seen by one subscriber.
+
+    Each subscriber has its own position, so it gets each frame at most
+    once, no matter how many other subscribers read the same stream. The
+    stream only keeps its last batch of frames: a subscriber that does not
+    read after every push misses the frames of the batches it skipped, they
+    are counted in 'dropped_frames'.
+
+    The subscription is released by close(), or when it is garbage collected.
+    """
+
+    def __init__(self, service: 'StftService', key: StftKey, stream: StftStream) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.key = key
+        self.stream = stream
+        self.next_end = stream.start_end()
+        self.dropped_frames = 0
+        self.finalizer = weakref.finalize(self, service.release, key)
+
+    @property
+    def fft_size(self) -> int:
+        return self.stream.fft_size
+
+    @property
+    def hop(self) -> int:
+        return self.stream.hop
+
+    def consume(self) -> int:
+        # index of the first computed frame that this subscriber has not seen yet
+        stream = self.stream
+        stream.update()
+
+        n = len(stream.ends)
+        if n == 0:
+            return 0
+
+        missed = int(stream.ends[0] - self.next_end) // stream.hop
+        if missed > 0:
+            # the frames of the skipped batches are gone, restart from the oldest computed one
+            self.dropped_frames += missed
+            self.logger.debug("STFT subscriber for %s missed %d frames", self.key, missed)
+
+        first = min(n, max(0, -(-(self.next_end - stream.ends[0]) // stream.hop)))
+        # a new subscriber can start after the computed frames
+        self.next_end = max(self.next_end, stream.ends[-1] + stream.hop)
+        return first
+
+    def read(self):
+        """Return the new (channels, frames, fft_size) frames, their (frames, fft_size // 2 + 1)
+        power spectra and the stream time at the end of each frame.
+
+        The arrays are shared with the other subscribers and only valid until
+        the next push, they must not be modified.
+        """
+        first = self.consume()
+        stream = self.stream
+        return stream.frames[:, first:], stream.spectra[first:], stream.times[first:]
+
+    def transforms(self):
+        """Return the complex FFT of the new windowed frames, as (frames, fft_size // 2 + 1),
+        and their times. The FFT is not normalized."""
+        first = self.consume()
+        stream = self.stream
+        return stream.transforms[first:], stream.times[first:]
+
+    def spectra(self):
+        """Return the new power spectra, as (frames, fft_size // 2 + 1), and their times."""
+        frames, spectra, times = self.read()
+        return spectra, times
+
+    def close(self) -> None:
+        self.finalizer()
+
+
+class StftService:
+    """Compute each unique STFT configuration once for all the widgets.
+
+    The configurations are keyed by (channel, fft_size, hop, window,
+    decimation), where the channel is an index in the ringbuffer. A configuration is computed
+    lazily, when the first of its subscribers reads it after a push, and it
+    is freed when its last subscriber is closed.
+    """
+
+    def __init__(self, ringbuffer: RingBuffer) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.ringbuffer = ringbuffer
+        self.streams: Dict[StftKey, StftStream] = {}
+
+    def subscribe(self, channel: int, fft_size: int, hop: int, window: str = DEFAULT_WINDOW, decimation: int = 0) -> StftSubscription:
+        key: StftKey = (channel, fft_size, hop, window, decimation)
+        stream = self.streams.get(key)
+        if stream is None:
+            self.logger.info("STFT service: new stream for channel %d, fft size %d, hop %d, %s window, decimated %d times", *key)
+            stream = StftStream(self.ringbuffer, channel, fft_size, hop, window, decimation)
+            self.streams[key] = stream
+        stream.refcount += 1
+        return StftSubscription(self, key, stream)
+
+    def release(self, key: StftKey) -> None:
+        stream = self.streams.get(key)
+        if stream is None:
+            return
+        stream.refcount -= 1
+        if stream.refcount == 0:
+            self.logger.info("STFT service: freeing the stream for channel %d, fft size %d, hop %d, %s window, decimated %d times", *key)
+            stream.close()
+            del self.streams[key]
+
+
+class FrameAligner:
+    """Match the frames of several streams with the same hop by their times.
+
+    The streams with long or decimated frames deliver their first frames
+    later than the others, so the first frames of the other streams are
+    dropped, and the frames are then handed out in step. Each stream has
+    frames of 'widths[i]' values.
+    """
+
+    def __init__(self, widths, tolerance: float) -> None:
+        # frames closer than this (in seconds) are at the same time
+        self.tolerance = tolerance
+        self.values = [zeros((0, width)) for width in widths]
+        self.times = [zeros(0) for width in widths]
+
+    def push(self, index: int, values, times) -> None:
+        if len(times) > 0:
+            self.values[index] = concatenate((self.values[index], values))
+            self.times[index] = concatenate((self.times[index], times))
+
+    def pop(self):
+        """Return the frames that all the streams have, as a list of (frames, width) arrays, and their times."""
+        if any(len(times) == 0 for times in self.times):
+            return [values[:0] for values in self.values], zeros(0)
+
+        start = max(times[0] for times in self.times) - self.tolerance
+        for i, times in enumerate(self.times):
+            skipped = int(searchsorted(times, start))
+            self.times[i] = times[skipped:]
+            self.values[i] = self.values[i][skipped:]
+
+        n = min(len(times) for times in self.times)
+        matched = [values[:n] for values in self.values]
+        matched_times = self.times[0][:n]
+        self.values = [values[n:] for values in self.values]
+        self.times = [times[n:] for times in self.times]
+
+        return matched, matched_times
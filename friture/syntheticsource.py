@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Synthetic input source, to run the analyzers without any audio device."""
+
+import logging
+
+import numpy as np
+
+SIGNALS = ["sine", "noise", "sweep", "chirp"]
+
+DEFAULT_FREQUENCY = 1000.
+DEFAULT_SWEEP_START_FREQUENCY = 20.
+DEFAULT_SWEEP_STOP_FREQUENCY = 20000.
+DEFAULT_SWEEP_PERIOD_S = 1.
+AMPLITUDE = 0.5
+
+
+class SyntheticSource:
+    """Generate an endless test signal, block by block.
+
+    The signals are deterministic: the noise is drawn from a generator seeded
+    with 'seed', and the tones keep their phase across blocks, so that two
+    runs with the same parameters and block size produce the same data.
+
+    The 'sweep' is logarithmic and the 'chirp' is linear, both going from
+    DEFAULT_SWEEP_START_FREQUENCY to DEFAULT_SWEEP_STOP_FREQUENCY (bounded by
+    the Nyquist frequency) every DEFAULT_SWEEP_PERIOD_S.
+    """
+
+    def __init__(self, signal="sine", channels=1, samplerate=48000, seed=0, frequency=DEFAULT_FREQUENCY):
+        self.logger = logging.getLogger(__name__)
+
+        if signal not in SIGNALS:
+            raise ValueError("Unknown synthetic signal: %s" % (signal))
+        if channels < 1:
+            raise ValueError("The synthetic source needs at least one channel")
+
+        self.signal = signal
+        self.name = "synthetic %s" % (signal)
+        self.nchannels = channels
+        self.samplerate = samplerate
+        self.frequency = frequency
+        self.seed = seed
+
+        self.f0 = DEFAULT_SWEEP_START_FREQUENCY
+        self.f1 = min(DEFAULT_SWEEP_STOP_FREQUENCY, 0.45 * samplerate)
+        self.period = DEFAULT_SWEEP_PERIOD_S
+
+        self.rewind()
+
+        self.logger.info("Synthetic source: %s, %d channels, %d Hz, seed %d", signal, channels, samplerate, seed)
+
+    def exhausted(self):
+        return False
+
+    def rewind(self):
+        self.position = 0
+        self.phase = 0.
+        self.rng = np.random.default_rng(self.seed)
+
+    def read(self, frames):
+        """Return the next block of 'frames' frames, as a (channels, frames) array."""
+        if frames == 0:
+            return np.zeros((self.nchannels, 0))
+
+        if self.signal == "noise":
+            block = AMPLITUDE * self.rng.standard_normal((self.nchannels, frames))
+            np.clip(block, -1., 1., out=block)
+        else:
+            t = (self.position + np.arange(frames)) / self.samplerate
+            block = np.tile(AMPLITUDE * np.sin(self.tone_phase(t)), (self.nchannels, 1))
+
+        self.position += frames
+        return block
+
+    def tone_phase(self, t):
+        if self.signal == "sine":
+            freq = np.full(t.shape, self.frequency)
+        elif self.signal == "sweep":
+            freq = self.f0 * (self.f1 / self.f0) ** ((t % self.period) / self.period)
+        else:
+            freq = self.f0 + (self.f1 - self.f0) * ((t % self.period) / self.period)
+
+        # integrate the instantaneous frequency, so that the phase is
+        # continuous across blocks and sweep periods
+        phase = self.phase + 2. * np.pi * np.cumsum(freq) / self.samplerate
+        self.phase = phase[-1] % (2. * np.pi)
+        return phase
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.audioproc import audioproc
+
+class AudioprocTest(unittest.TestCase):
+    def test_batched_analysis_matches_frame_by_frame(self) -> None:
+        proc = audioproc()
+        proc.set_fftsize(256)
+        rng = np.random.default_rng(0)
+
+        # a varying number of frames reuses the work arrays
+        for n in (4, 2, 6):
+            frames = rng.standard_normal((2, n, 256))
+            spectra = proc.analyze_frames(frames)
+            self.assertEqual(spectra.shape, (2, n, 129))
+            for channel in range(2):
+                for i in range(n):
+                    npt.assert_allclose(spectra[channel, i], proc.analyzelive(frames[channel, i]))
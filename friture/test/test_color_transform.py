@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.signal.color_tranform import Color_Transform
+
+class ColorTransformTest(unittest.TestCase):
+    def test_matches_the_separate_steps(self) -> None:
+        transform = Color_Transform(-100., -20.)
+        rng = np.random.default_rng(0)
+        power = 10. ** rng.uniform(-14., 1., (30, 12))
+        weighting = rng.uniform(-10., 10., 30)
+        transform.setweighting(weighting)
+
+        # dB, weighting, scaling, clipping and lookup, one array at a time
+        db = 10. * np.log10(power + 1e-30) + weighting[:, np.newaxis]
+        scaled = np.clip((db - -100.) / (-20. - -100.), 0., 1.)
+        expected = transform.colors[(scaled * 255).astype(int)]
+
+        # the screen resampler hands out transposed views
+        colors = transform.push(np.ascontiguousarray(power.T).T)
+        self.assertEqual(colors.dtype, np.uint32)
+        npt.assert_array_equal(colors, expected)
+
+        # the output buffer is reused for smaller pushes
+        npt.assert_array_equal(transform.push(power[:, :3]), expected[:, :3])
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.audioproc import audioproc
+from friture.cqt import ConstantQTransform, SpectralKernel, cqt_frequencies, quality_factor
+from friture.ringbuffer import RingBuffer
+from friture.stft import StftService
+
+class ConstantQTransformTest(unittest.TestCase):
+    def test_frequencies(self) -> None:
+        freqs = cqt_frequencies(12, 55., 880.)
+        self.assertEqual(len(freqs), 49)
+        npt.assert_allclose(freqs[::12], [55., 110., 220., 440., 880.])
+
+    def test_sparse_kernel_matches_the_temporal_kernel(self) -> None:
+        kernel = SpectralKernel(np.array([1000., 2000.]), 48000., 1024, quality_factor(12))
+        x = np.random.default_rng(0).standard_normal((3, 1024))
+        power = kernel.apply(np.fft.rfft(x))
+
+        # direct correlation of the frames with the windowed complex exponentials
+        for i, f in enumerate(kernel.freqs):
+            length = int(np.ceil(quality_factor(12) * 48000. / f))
+            n = np.arange(length)
+            temporal = np.hanning(length + 2)[1:-1] / length * np.exp(2j * np.pi * f * n / 48000.)
+            direct = np.abs(x[:, -length:] @ np.conj(temporal)) ** 2
+            npt.assert_allclose(power[:, i], direct, rtol=0.05)
+
+    def test_tone_peaks_in_its_bin(self) -> None:
+        buf = RingBuffer()
+        buf.set_sample_rate(48000)
+        service = StftService(buf)
+        cqt = ConstantQTransform(service, 0, 24, 50., 20000., 48000, 1024)
+        self.assertGreater(len(cqt.octaves), 1)
+
+        t = np.arange(2 * 48000) / 48000.
+        signal = np.sin(2. * np.pi * 440. * t)
+        columns = []
+        for i, block in enumerate(np.split(signal, 96)):
+            buf.push(block[np.newaxis, :], (i + 1) * 1000. / 48000.)
+            columns.append(cqt.process())
+
+        power = np.concatenate([power for power, times in columns], axis=1)
+        times = np.concatenate([times for power, times in columns])
+        self.assertEqual(power.shape[0], len(cqt.freqs))
+        self.assertGreater(power.shape[1], 0)
+        self.assertEqual(power.shape[1], len(times))
+
+        column = power[:, -1]
+        self.assertAlmostEqual(cqt.freqs[np.argmax(column)], 440., delta=440. * 0.03)
+        # same peak level as the Hann-windowed FFT of the spectrogram
+        proc = audioproc()
+        proc.set_fftsize(4096)
+        fft_level = proc.analyzelive(signal[:4096]).max()
+        self.assertAlmostEqual(10. * np.log10(column.max()), 10. * np.log10(fft_level), delta=1.)
+
+        cqt.close()
+        self.assertEqual(len(service.streams), 0)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+
+from friture.devicecache import DeviceCapabilityCache, capability_key
+
+class DeviceCapabilityCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "cache", "devices.json")
+        self.device = {'name': "USB Audio", 'max_input_channels': 2}
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_persisted(self) -> None:
+        key = capability_key(self.device, "ALSA")
+        cache = DeviceCapabilityCache(self.path)
+        self.assertIsNone(cache.get(key))
+        cache.set(key, [(48000, "float32"), (44100, "int16")])
+        cache.save()
+
+        cache = DeviceCapabilityCache(self.path)
+        self.assertEqual(cache.get(key), [(48000, "float32"), (44100, "int16")])
+        self.assertIsNone(cache.get(capability_key(self.device, "JACK Audio Connection Kit")))
+
+    def test_invalidate(self) -> None:
+        key = capability_key(self.device, "ALSA")
+        cache = DeviceCapabilityCache(self.path)
+        cache.set(key, [(48000, "float32")])
+        cache.save()
+        cache.invalidate()
+        self.assertIsNone(DeviceCapabilityCache(self.path).get(key))
+
+    def test_corrupt_file(self) -> None:
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        cache = DeviceCapabilityCache(self.path)
+        self.assertIsNone(cache.get(capability_key(self.device, "ALSA")))
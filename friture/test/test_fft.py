@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.bench import bench_fft
+from friture.signal import fft as fft_facade
+
+class FftFacadeTest(unittest.TestCase):
+    def test_backends_match_numpy(self) -> None:
+        rng = np.random.default_rng(0)
+        x = rng.standard_normal((3, 64))
+        for name in fft_facade.available_backends():
+            backend = fft_facade.create_backend(name)
+            npt.assert_allclose(backend.rfft(x), np.fft.rfft(x), atol=1e-10)
+            npt.assert_allclose(backend.irfft(np.fft.rfft(x)), x, atol=1e-10)
+            npt.assert_allclose(backend.fft(x, n=48), np.fft.fft(x, n=48), atol=1e-10)
+            npt.assert_allclose(backend.ifft(x, axis=0), np.fft.ifft(x, axis=0), atol=1e-10)
+
+            # the same spectrum gives an even and an odd number of points
+            spectrum = np.fft.rfft(x[:, :9])
+            for n in (8, 9):
+                npt.assert_allclose(backend.irfft(spectrum, n=n), np.fft.irfft(spectrum, n=n), atol=1e-10)
+
+            out = np.empty((3, 33), dtype=complex)
+            self.assertIs(backend.rfft(x, out=out), out)
+            npt.assert_allclose(out, np.fft.rfft(x), atol=1e-10)
+
+    def test_unknown_backend(self) -> None:
+        with self.assertRaises(ValueError):
+            fft_facade.create_backend("fftpack")
+
+    def test_bench_reports_each_backend(self) -> None:
+        report = io.StringIO()
+        results = bench_fft([64], 2, 0.001, out=report)
+        self.assertEqual(set(results[64]), set(fft_facade.available_backends()))
+        self.assertIn("Fastest backend", report.getvalue())
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+import wave
+
+import numpy as np
+import numpy.testing as npt
+
+from friture.filesource import FileSource
+
+class FileSourceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def write_wav(self, name: str, frames: np.ndarray, sample_width: int, rate: int) -> str:
+        path = os.path.join(self.dir.name, name)
+        with wave.open(path, "wb") as w:
+            w.setnchannels(frames.shape[1])
+            w.setsampwidth(sample_width)
+            w.setframerate(rate)
+            w.writeframes(frames.tobytes())
+        return path
+
+    def test_read_int16_wav(self) -> None:
+        samples = np.array([[0, 16384], [-32768, 8192], [32767, -16384]], dtype="<i2")
+        source = FileSource(self.write_wav("a.wav", samples, 2, 44100))
+        self.assertEqual(source.nchannels, 2)
+        self.assertEqual(source.samplerate, 44100)
+        self.assertEqual(source.frames, 3)
+
+        block = source.read(2)
+        npt.assert_allclose(block, [[0., -1.], [0.5, 0.25]])
+        block = source.read(2)
+        npt.assert_allclose(block, [[32767. / 32768], [-0.5]])
+        self.assertTrue(source.exhausted())
+        self.assertEqual(source.read(2).shape, (2, 0))
+
+    def test_read_int24_wav(self) -> None:
+        values = np.array([0, 2 ** 22, -2 ** 23, -1], dtype=np.int32)
+        frames = np.stack([values & 0xFF, (values >> 8) & 0xFF, (values >> 16) & 0xFF], axis=1).astype(np.uint8).reshape(4, 1, 3)
+        source = FileSource(self.write_wav("b.wav", frames, 3, 48000))
+        npt.assert_allclose(source.read(4), [values / 2. ** 23])
+
+    def test_read_raw(self) -> None:
+        path = os.path.join(self.dir.name, "c.raw")
+        np.array([[0.5, -0.25], [1., 0.]], dtype="<f4").tofile(path)
+        source = FileSource(path, raw_format="float32", samplerate=96000, channels=2)
+        npt.assert_allclose(source.read(16), [[0.5, 1.], [-0.25, 0.]])
+
+    def test_not_a_wav(self) -> None:
+        path = os.path.join(self.dir.name, "d.wav")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            FileSource(path)
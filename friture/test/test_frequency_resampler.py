@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+import friture.plotting.frequency_scales as fscales
+from friture.signal.frequency_resampler import Frequency_Resampler
+
+class FrequencyResamplerTest(unittest.TestCase):
+    def test_interpolates_like_np_interp(self) -> None:
+        freq = np.linspace(0., 24000., 4097)
+        resampler = Frequency_Resampler(fscales.Mel, 20., 200., 50)
+        resampler.setfreq(freq)
+        data = np.random.default_rng(0).standard_normal((freq.size, 7))
+
+        # at most one bin per pixel, this is a plain linear interpolation
+        resampled = resampler.push(data)
+        self.assertEqual(len(resampler.banded_rows), 0)
+        expected = np.stack([np.interp(resampler.xscaled, freq, data[:, j]) for j in range(7)], axis=1)
+        npt.assert_allclose(resampled, expected)
+
+        self.assertEqual(resampler.push(data[:, :0]).shape, (50, 0))
+
+    def test_narrow_tone_is_kept(self) -> None:
+        freq = np.linspace(0., 24000., 4097)
+        data = np.zeros((freq.size, 1))
+        data[3001] = 1.
+
+        resampler = Frequency_Resampler(fscales.Octave, 20., 24000., 100)
+        resampler.setfreq(freq)
+        self.assertEqual(resampler.push(data).max(), 1.)
+
+        # the mean of the bins of the pixel is not a point sample either
+        resampler = Frequency_Resampler(fscales.Octave, 20., 24000., 100, reduction="mean")
+        resampler.setfreq(freq)
+        self.assertGreater(resampler.push(data).max(), 0.)
+        npt.assert_allclose(resampler.push(np.ones((freq.size, 3))), 1.)
+
+    def test_work_arrays_are_reused(self) -> None:
+        freq = np.linspace(0., 24000., 4097)
+        data = np.random.default_rng(0).standard_normal((freq.size, 5))
+
+        for reduction in ["max", "mean"]:
+            resampler = Frequency_Resampler(fscales.Octave, 20., 24000., 100, reduction=reduction)
+            resampler.setfreq(freq)
+            expected = resampler.push(data)
+            work_arrays = dict(resampler.work_arrays)
+
+            # fewer columns reuse the same arrays, without stale values
+            npt.assert_allclose(resampler.push(data[:, 2:4]), expected[:, 2:4])
+            for name, array in work_arrays.items():
+                self.assertIs(resampler.work_arrays[name], array)
+            npt.assert_allclose(resampler.push(data), expected)
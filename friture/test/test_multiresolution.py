@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import numpy as np
+
+from friture.multiresolution import MultiResolutionStft, multiresolution_bands
+from friture.ringbuffer import RingBuffer
+from friture.stft import StftService
+
+class MultiResolutionStftTest(unittest.TestCase):
+    def test_bands(self) -> None:
+        self.assertEqual(multiresolution_bands(4096, 0.75), ([0, 2, 4], 64))
+        # the hop must be a whole number of decimated samples
+        self.assertEqual(multiresolution_bands(512, 0.75), ([0, 2], 32))
+        self.assertEqual(multiresolution_bands(32, 0.75), ([0], 8))
+
+    def test_tones_in_each_band(self) -> None:
+        buf = RingBuffer()
+        buf.set_sample_rate(48000)
+        service = StftService(buf)
+        multires = MultiResolutionStft(service, 0, 4096, 0.75, "hann", 48000)
+        self.assertTrue(np.all(np.diff(multires.freqs) > 0))
+        self.assertEqual(multires.freqs[-1], 24000.)
+
+        t = np.arange(48000) / 48000.
+        tones = [100., 3000., 10000.]
+        signal = sum(np.sin(2. * np.pi * f * t) for f in tones) / len(tones)
+        columns = []
+        for i, block in enumerate(np.split(signal, 48)):
+            buf.push(block[np.newaxis, :], (i + 1) * 1000. / 48000.)
+            columns.append(multires.process())
+
+        power = np.concatenate([power for power, times in columns], axis=1)
+        times = np.concatenate([times for power, times in columns])
+        self.assertEqual(power.shape, (len(multires.freqs), len(times)))
+        self.assertGreater(len(times), 0)
+        self.assertTrue(np.all(np.diff(times) > 0))
+
+        column = power[:, -1]
+        for f in tones:
+            near = np.abs(multires.freqs - f) < 0.1 * f
+            peak = column[near].max()
+            # each tone is found in its own band, at the same level
+            self.assertAlmostEqual(10. * np.log10(peak), 10. * np.log10(column.max()), delta=1.5)
+
+        multires.close()
+        self.assertEqual(len(service.streams), 0)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.octavefilters import Octave_Filters
+
+class OctaveFiltersTest(unittest.TestCase):
+    def test_channels_are_filtered_together(self) -> None:
+        x = np.random.default_rng(0).standard_normal((2, 4096))
+        bands, decs = Octave_Filters(3).filter(x)
+        for channel in range(2):
+            # a bank of its own, with its own filter states
+            single, decs = Octave_Filters(3).filter(x[channel:channel + 1])
+            for band, single_band in zip(bands, single):
+                npt.assert_array_equal(band[channel], single_band[0])
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.signal.online_linear_2D_resampler import Online_Linear_2D_resampler
+
+class ReferenceResampler(Online_Linear_2D_resampler):
+    # column by column, like the Cython interpolation that the vectorized push replaces
+    def push(self, data):
+        columns = []
+        for j in range(data.shape[1]):
+            self.orig_index += 1.
+            for i in range(self.processable(0)):
+                self.resampled_index += self.resampling_ratio
+                a = self.orig_index - self.resampled_index
+                columns.append((1 - a) * data[:, j] + a * self.old_data)
+            self.old_data = data[:, j]
+        return np.array(columns).reshape((-1, data.shape[0])).T
+
+class OnlineLinear2DResamplerTest(unittest.TestCase):
+    def test_matches_the_column_by_column_resampling(self) -> None:
+        rng = np.random.default_rng(0)
+        for L, M in [(3, 7), (7, 3), (1, 1), (640, 187)]:
+            resampler = Online_Linear_2D_resampler(L, M, 16)
+            reference = ReferenceResampler(L, M, 16)
+            # the fractional position carries across the pushes
+            for size in [1, 5, 0, 13, 2, 40]:
+                data = rng.standard_normal((16, size))
+                resampled = resampler.push(data)
+                expected = reference.push(data)
+                self.assertEqual(resampled.shape, expected.shape)
+                npt.assert_allclose(resampled, expected)
+                self.assertEqual(resampler.resampled_index, reference.resampled_index)
@@ -27,13 +27,13 @@ class PitchTrackerTest(unittest.TestCase):
     def test_new_frames(self) -> None:
         buf = RingBuffer()
         tracker = PitchTracker(buf, fft_size=4, overlap=0.5)
-        buf.push(np.array([np.arange(2)]))
-        buf.push(np.array([np.arange(2, 5)]))
+        buf.push(np.array([np.arange(2)]), 0.)
+        buf.push(np.array([np.arange(2, 5)]), 0.)
         npt.assert_array_equal(
             [np.array([np.arange(4)])],
             list(tracker.new_frames())
         )
-        buf.push(np.array([np.arange(5, 8)]))
+        buf.push(np.array([np.arange(5, 8)]), 0.)
         npt.assert_array_equal(
             [np.array([np.arange(2, 6)]), np.array([np.arange(4, 8)])],
             list(tracker.new_frames())
@@ -55,17 +55,17 @@ class PitchTrackerTest(unittest.TestCase):
         buf = RingBuffer()
         tracker = PitchTracker(buf, fft_size=32, overlap=0.5, sample_rate=32)
 
-        buf.push(np.array([np.sin(np.linspace(0, 2*np.pi, 32))]))
+        buf.push(np.array([np.sin(np.linspace(0, 2*np.pi, 32))]), 0.)
         npt.assert_array_equal(tracker.get_estimates(1.0), np.zeros((3,)))
         self.assertTrue(tracker.update())
         self.assertFalse(tracker.update())
-        npt.assert_array_equal(tracker.get_estimates(1.0), [0, 0, 1500])
+        npt.assert_array_equal(tracker.get_estimates(1.0), [0, 0, 1])
 
-        buf.push(np.array([np.sin(np.linspace(0, 4*np.pi, 32))]))
+        buf.push(np.array([np.sin(np.linspace(0, 4*np.pi, 32))]), 0.)
         self.assertTrue(tracker.update())
         self.assertFalse(tracker.update())
         # spectral leakage and low resolution mean this doesn't correctly
         # pick up the doubled pitch in the second half of the signal :/
         npt.assert_array_equal(
-            tracker.get_estimates(2.0), [0, 0, 1500, 1500, 1500]
+            tracker.get_estimates(2.0), [0, 0, 1, 1, 1]
         )
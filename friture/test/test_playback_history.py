@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import tempfile
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.playback.history import SampleHistory, SAMPLE_SCALE
+
+class SampleHistoryTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def read(self, history: SampleHistory, start: int, count: int, channels: int) -> np.ndarray:
+        out = np.zeros((count, channels), dtype=np.int16)
+        history.read_into(out, start, count)
+        return out
+
+    def test_wrap_around(self) -> None:
+        history = SampleHistory(8, self.dir.name)
+        data = np.arange(12).reshape(1, 12) / SAMPLE_SCALE
+        history.push(data[:, :5])
+        history.push(data[:, 5:])
+        self.assertEqual(history.offset, 12)
+        # mono is duplicated to all the output channels
+        npt.assert_array_equal(self.read(history, 5, 6, 2), np.tile(np.arange(5, 11), (2, 1)).T)
+
+    def test_clipping_and_channels(self) -> None:
+        history = SampleHistory(4, self.dir.name)
+        history.push(np.array([[2., -0.5], [0., -2.]]))
+        npt.assert_array_equal(self.read(history, 0, 2, 3), [[SAMPLE_SCALE, 0, 0], [int(-0.5 * SAMPLE_SCALE), -SAMPLE_SCALE, 0]])
+
+    def test_resize_keeps_recent_frames(self) -> None:
+        history = SampleHistory(8, self.dir.name)
+        history.push(np.arange(10).reshape(1, 10) / SAMPLE_SCALE)
+        history.resize(5)
+        npt.assert_array_equal(self.read(history, 5, 5, 1)[:, 0], np.arange(5, 10))
+        history.resize(16)
+        npt.assert_array_equal(self.read(history, 5, 5, 1)[:, 0], np.arange(5, 10))
+
+    def test_resize_publishes_a_complete_mapping(self) -> None:
+        history = SampleHistory(8, self.dir.name)
+        history.push(np.arange(6).reshape(1, 6) / SAMPLE_SCALE)
+        samples, capacity = history.ring
+        history.resize(4)
+        # a reader that took the old mapping can still use it
+        self.assertEqual(capacity, 8)
+        npt.assert_array_equal(samples[:6, 0], np.arange(6))
+        self.assertEqual(history.ring[0].shape[0], history.ring[1])
+        npt.assert_array_equal(self.read(history, 2, 4, 1)[:, 0], np.arange(2, 6))
+
+    def test_reset_discards_the_frames(self) -> None:
+        history = SampleHistory(8, self.dir.name)
+        history.push(np.arange(1, 7).reshape(1, 6) / SAMPLE_SCALE)
+        history.reset(16)
+        self.assertEqual(history.offset, 0)
+        self.assertEqual(history.capacity, 16)
+        npt.assert_array_equal(self.read(history, 0, 16, 1), 0)
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+import friture.mirroredbuffer
+from friture.ringbuffer import RingBuffer, RingBufferReader, SharedRingBuffer
+
+class RingBufferTest(unittest.TestCase):
+    def check_history(self, buf: RingBuffer) -> None:
+        rng = np.random.default_rng(0)
+        history = np.zeros((2, 1))
+        buf.push(history, 0.)
+        for i in range(100):
+            block = rng.standard_normal((2, int(rng.integers(1, 3000))))
+            buf.push(block, 0.)
+            history = np.concatenate([history, block], axis=1)
+            if i == 50:
+                buf.grow_if_needed(30000)
+
+            length = int(rng.integers(1, min(history.shape[1], 9000) + 1))
+            npt.assert_array_equal(buf.data(length), history[:, -length:])
+            if history.shape[1] > length + 100:
+                npt.assert_array_equal(buf.data_older(length, 100), history[:, -length - 100:-100])
+            start = history.shape[1] - 50
+            if start > length:
+                npt.assert_array_equal(buf.data_indexed(start, length), history[:, start - length:start])
+
+    def test_history(self) -> None:
+        self.check_history(RingBuffer())
+
+    def test_history_without_mirroring(self) -> None:
+        supported = friture.mirroredbuffer.mirroring_supported
+        friture.mirroredbuffer.mirroring_supported = False
+        try:
+            buf = RingBuffer()
+            self.assertFalse(buf.mirrored)
+            self.check_history(buf)
+        finally:
+            friture.mirroredbuffer.mirroring_supported = supported
+
+    def test_reservations_size_once(self) -> None:
+        class Reader:
+            pass
+        readers = [Reader(), Reader(), Reader()]
+        buf = RingBuffer()
+        for i, reader in enumerate(readers):
+            buf.reserve(reader, 40000 * (i + 1))
+        buf.push(np.zeros((1, 16)), 0.)
+        self.assertEqual(buf.growth_count, 1)
+        self.assertEqual(buf.buffer_length, 2 ** 17)
+        buf.data(120000)
+        self.assertEqual(buf.growth_count, 1)
+
+    def test_growth_is_power_of_two(self) -> None:
+        buf = RingBuffer()
+        buf.data(100000)
+        self.assertEqual(buf.buffer_length, 2 ** 17)
+
+    def test_views_outlive_growth(self) -> None:
+        buf = RingBuffer()
+        buf.push(np.ones((1, 16)), 0.)
+        view = buf.data(16)
+        buf.grow_if_needed(4 * buf.buffer_length)
+        npt.assert_array_equal(view, np.ones((1, 16)))
+
+
+class RingBufferReaderTest(unittest.TestCase):
+    def test_overlapping_frames(self) -> None:
+        buf = RingBuffer()
+        buf.set_sample_rate(10)
+        reader = RingBufferReader(buf, 4, 2, position=4)
+
+        buf.push(np.array([np.arange(3.)]), 0.3)
+        frames, times = reader.frames()
+        self.assertEqual(frames.shape, (1, 0, 4))
+
+        buf.push(np.array([np.arange(3., 9.)]), 0.9)
+        frames, times = reader.frames()
+        npt.assert_array_equal(frames[0], [[0, 1, 2, 3], [2, 3, 4, 5], [4, 5, 6, 7]])
+        npt.assert_allclose(times, [0.4, 0.6, 0.8])
+        self.assertEqual(reader.ready, 0)
+
+        buf.push(np.array([np.arange(9., 12.)]), 1.2)
+        frames, times = reader.frames()
+        npt.assert_array_equal(frames[0], [[6, 7, 8, 9], [8, 9, 10, 11]])
+
+    def test_frames_are_views(self) -> None:
+        buf = RingBuffer()
+        buf.push(np.ones((2, 64)), 0.)
+        reader = RingBufferReader(buf, 16, 8)
+        buf.push(np.ones((2, 32)), 0.)
+        frames, times = reader.frames()
+        self.assertEqual(frames.shape, (2, 5, 16))
+        self.assertTrue(np.shares_memory(frames, buf.buffer))
+
+    def test_overrun_skips_ahead(self) -> None:
+        buf = RingBuffer()
+        reader = RingBufferReader(buf, 16, 16)
+        for i in range(3):
+            buf.push(np.arange(i * buf.buffer_length, (i + 1) * buf.buffer_length, dtype=float)[np.newaxis, :], 0.)
+        frames, times = reader.frames()
+        self.assertEqual(reader.overruns, 1)
+        self.assertGreaterEqual(frames[0, 0, 0], 2 * buf.buffer_length)
+        self.assertTrue(reader.valid())
+
+
+class SharedRingBufferTest(unittest.TestCase):
+    def test_reads_do_not_resize(self) -> None:
+        buf = SharedRingBuffer()
+        buf.push(np.ones((1, 16)), 0.)
+        length = buf.buffer_length
+        window = buf.data(2 * length)
+        self.assertEqual(buf.buffer_length, length)
+        npt.assert_array_equal(window[:, -16:], np.ones((1, 16)))
+        npt.assert_array_equal(window[:, :-16], 0.)
+        buf.push(np.ones((1, 16)), 0.)
+        self.assertEqual(buf.buffer_length, 2 * length)
+
+    def test_reader_from_another_thread(self) -> None:
+        buf = SharedRingBuffer()
+        reader = RingBufferReader(buf, 256, 128, position=256)
+        done = threading.Event()
+        received = []
+
+        def consume() -> None:
+            while not done.is_set() or reader.ready > 0:
+                frames, times = reader.frames()
+                firsts = frames[0, :, 0].copy()
+                if reader.valid():
+                    received.extend(firsts)
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        for i in range(200):
+            buf.push(np.arange(i * 1000, (i + 1) * 1000, dtype=float)[np.newaxis, :], 0.)
+        done.set()
+        consumer.join()
+
+        # intact frames start on the hop grid, in order
+        self.assertTrue(all(first % 128 == 0 for first in received))
+        self.assertTrue(all(np.diff(received) > 0))
+
+    def test_reservations_allocate_ahead_of_the_producer(self) -> None:
+        buf = SharedRingBuffer()
+        buf.push(np.arange(16, dtype=float)[np.newaxis, :], 0.)
+        length = buf.buffer_length
+
+        readers = []
+        reserving = threading.Thread(target=lambda: readers.append(RingBufferReader(buf, 4 * length, length)))
+        reserving.start()
+        reserving.join()
+        spare = buf.spare[0]
+        self.assertEqual(buf.buffer_length, length)
+
+        # the producer copies the samples into the storage prepared for it
+        buf.push(np.arange(16, 32, dtype=float)[np.newaxis, :], 0.)
+        self.assertIs(buf.buffer, spare)
+        self.assertIsNone(buf.spare)
+        npt.assert_array_equal(buf.data(32)[0], np.arange(32))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import unittest
+import numpy as np
+
+# the QML scene is rendered without any GPU or display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QT_QUICK_BACKEND", "software")
+
+from PyQt5.QtWidgets import QApplication
+
+from friture.audiobuffer import AudioBuffer
+from friture.qml_types import qml_engine
+from friture.spectrogram import Spectrogram_Widget
+
+# kept for the whole run, the QML engine does not survive its application
+app = QApplication.instance() or QApplication([])
+
+class SpectrogramWidgetTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = qml_engine()
+        self.widget = Spectrogram_Widget(None, self.engine)
+        # a paused spectrogram does not read the stream time
+        self.widget.pause()
+        self.widget.resize(400, 300)
+        self.widget.show()
+
+        self.buffer = AudioBuffer()
+        self.widget.set_buffer(self.buffer)
+        self.time = 0.
+
+    def tearDown(self) -> None:
+        self.widget.close()
+
+    def push(self, frames: int) -> None:
+        t = np.arange(frames) / self.buffer.sample_rate
+        block = np.sin(2. * np.pi * 1000. * t).reshape(1, -1)
+        self.time += frames / self.buffer.sample_rate
+        self.buffer.handle_new_data(block, self.time, False)
+        self.widget.handle_new_data(block)
+        self.widget.canvasUpdate()
+        app.processEvents()
+
+    def test_transforms_with_weighting(self) -> None:
+        # the A weighting of the FFT grid is interpolated on the other transforms' grids
+        self.widget.setweighting(1)
+        for transform in [1, 2, 0]:
+            self.widget.settransform(transform)
+            for i in range(4):
+                self.push(8192)
+            self.assertEqual(self.widget.w.shape, (len(self.widget.freq), 1))
+
+        # the weightings of the analysis are left untouched
+        self.assertEqual(self.widget.proc.get_freq_weighting()[0].ndim, 1)
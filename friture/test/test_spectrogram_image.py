@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.signal.color_tranform import Color_Transform
+from friture.spectrogram_image import CanvasScaledSpectrogram
+
+class CanvasScaledSpectrogramTest(unittest.TestCase):
+    def test_columns_are_written_in_place(self) -> None:
+        canvas = CanvasScaledSpectrogram(canvas_height=4, canvas_width=5)
+        image = canvas.getimage()
+
+        first = np.arange(12, dtype=np.uint32).reshape((4, 3)) | 0xff000000
+        canvas.addData(first, 1.)
+        second = np.arange(100, 112, dtype=np.uint32).reshape((4, 3)) | 0xff000000
+        canvas.addData(second, 2.)
+
+        # the image wraps the pixels, without any copy
+        self.assertIs(canvas.getimage(), image)
+        self.assertEqual(image.pixel(1, 3), first[0, 1])
+        self.assertEqual(image.pixel(1, 0), first[3, 1])
+
+        # both copies of the ring hold the last 5 columns, with the high frequencies on top
+        flipped = np.concatenate((first, second), axis=1)[::-1]
+        npt.assert_array_equal(canvas.pixels[:, 5:10], np.concatenate((flipped[:, 5:], flipped[:, 1:5]), axis=1))
+        npt.assert_array_equal(canvas.pixels[:, 1:6], flipped[:, 1:6])
+        self.assertEqual(canvas.write_offset, 6)
+
+    def test_resize_keeps_the_image(self) -> None:
+        canvas = CanvasScaledSpectrogram(canvas_height=4, canvas_width=5)
+        canvas.addData(np.full((4, 5), 0xff336699, dtype=np.uint32), 1.)
+        canvas.setcanvas_width(10)
+        canvas.setcanvas_height(8)
+        self.assertEqual(canvas.pixels.shape, (8, 20))
+        self.assertEqual(canvas.getimage().width(), 20)
+        npt.assert_array_equal(canvas.pixels, 0xff336699)
+
+    def test_colors_are_written_by_the_transform(self) -> None:
+        transform = Color_Transform(-100., 0.)
+        rng = np.random.default_rng(0)
+        power = 10. ** rng.uniform(-10., 0., (4, 8))
+
+        colored = CanvasScaledSpectrogram(canvas_height=4, canvas_width=5)
+        colored.addData(transform.push(power[:, :3]).copy(), 1.)
+        colored.addData(transform.push(power[:, 3:]).copy(), 2.)
+
+        # the transform writes the flipped rows directly in both copies of the ring
+        canvas = CanvasScaledSpectrogram(canvas_height=4, canvas_width=5)
+        canvas.addData(power[:, :3], 1., transform)
+        canvas.addData(power[:, 3:], 2., transform)
+        npt.assert_array_equal(canvas.pixels, colored.pixels)
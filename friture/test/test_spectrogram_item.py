@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import unittest
+import numpy as np
+
+# the scene graph is rendered without any GPU or display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QT_QUICK_BACKEND", "software")
+
+from PyQt5.QtQuick import QQuickWindow
+from PyQt5.QtTest import QSignalSpy
+from PyQt5.QtWidgets import QApplication
+
+from friture.imageplot import ImagePlot
+from friture.qml_types import qml_engine
+from friture.spectrogram_item import SpectrogramItem
+
+# kept for the whole run, the QML engine does not survive its application
+app = QApplication.instance() or QApplication([])
+
+RED = 0xffff0000
+BLUE = 0xff0000ff
+
+class SpectrogramItemTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.window = QQuickWindow()
+        self.window.resize(100, 50)
+        self.item = SpectrogramItem(self.window.contentItem())
+        self.item.setWidth(100)
+        self.item.setHeight(50)
+        self.item.curve.pause()
+        self.item.updateScreenSize()
+        # the window is exposed once it has rendered its first frame
+        rendered = QSignalSpy(self.window.frameSwapped)
+        self.window.show()
+        rendered.wait(1000)
+
+    def tearDown(self) -> None:
+        self.window.close()
+
+    def grab(self):
+        rendered = QSignalSpy(self.window.frameSwapped)
+        self.item.update()
+        rendered.wait(1000)
+        # the offscreen platform can only grab the window from the screen
+        return self.window.screen().grabWindow(self.window.winId()).toImage()
+
+    def test_scrolls_without_uploading_again(self) -> None:
+        curve = self.item.curve
+        curve.push(np.full((50, 100), RED, dtype=np.uint32), 0.)
+        image = self.grab()
+        self.assertEqual(image.pixel(50, 25), RED)
+
+        # the newest columns are on the right
+        curve.push(np.full((50, 10), BLUE, dtype=np.uint32), 0.)
+        written = curve.dirty_columns().copy()
+        image = self.grab()
+        self.assertEqual(image.pixel(95, 25), BLUE)
+        self.assertEqual(image.pixel(50, 25), RED)
+
+        # the visible copy of the new columns was uploaded, the hidden one is
+        # left for when it scrolls into view
+        dirty = curve.dirty_columns()
+        self.assertTrue(written.any())
+        self.assertFalse((dirty & ~written).any())
+        self.assertLess(dirty.sum(), written.sum())
+
+    def test_new_tiles_while_rendering(self) -> None:
+        # a tile node is added to a rendered tree every few frames
+        curve = self.item.curve
+        for i in range(30):
+            curve.push(np.full((50, 10), BLUE if i % 2 else RED, dtype=np.uint32), 0.)
+            image = self.grab()
+            self.assertEqual(image.pixel(95, 25), BLUE if i % 2 else RED)
+
+class ImagePlotTest(unittest.TestCase):
+    def test_renders_in_the_quick_widget(self) -> None:
+        engine = qml_engine()
+        plot = ImagePlot(None, engine)
+        # a paused plot does not read the stream time
+        plot.pause()
+        # wide enough for many tiles, so that new tile nodes are added while rendering
+        plot.resize(800, 400)
+        plot.show()
+
+        for i in range(30):
+            plot.push(np.full((plot.spectrogram_screen_height(), 10), BLUE, dtype=np.uint32), 0.)
+            plot.draw()
+            app.processEvents()
+            image = plot.quickWidget.grabFramebuffer()
+            self.assertFalse(image.isNull())
+
+        # the items made by a Repeater are not QObject children, walk the visual tree
+        items = [plot.quickWidget.rootObject()]
+        while not isinstance(items[0], SpectrogramItem):
+            items = items[1:] + items[0].childItems()
+        self.assertGreater(sum(node is not None for node in items[0].tile_nodes), 2)
+
+        plot.close()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.audioproc import audioproc
+from friture.ringbuffer import RingBuffer
+from friture.stft import StftService, band_decimation
+
+class StftServiceTest(unittest.TestCase):
+    def test_subscribers_share_the_frames(self) -> None:
+        buf = RingBuffer()
+        service = StftService(buf)
+        first = service.subscribe(0, 64, 16)
+        second = service.subscribe(0, 64, 16)
+        self.assertEqual(len(service.streams), 1)
+
+        signal = np.random.default_rng(0).standard_normal((1, 200))
+        buf.push(signal, 0.)
+        spectra, times = first.spectra()
+        other_spectra, other_times = second.spectra()
+        self.assertIs(spectra.base, other_spectra.base)
+        npt.assert_array_equal(spectra, other_spectra)
+
+        # the frames end on multiples of the hop
+        proc = audioproc()
+        proc.set_fftsize(64)
+        self.assertEqual(spectra.shape, (9, 33))
+        npt.assert_allclose(spectra[0], proc.analyzelive(signal[0, :64]))
+        npt.assert_allclose(spectra[-1], proc.analyzelive(signal[0, 128:192]))
+
+        # each subscriber gets each frame once
+        self.assertEqual(first.spectra()[0].shape[0], 0)
+        buf.push(signal[:, :8], 0.)
+        self.assertEqual(first.spectra()[0].shape[0], 1)
+        self.assertEqual(second.spectra()[0].shape[0], 1)
+
+    def test_late_subscribers_are_in_step(self) -> None:
+        buf = RingBuffer()
+        service = StftService(buf)
+        first = service.subscribe(0, 64, 16)
+        signal = np.random.default_rng(0).standard_normal((2, 200))
+        buf.push(signal, 0.)
+        first.spectra()
+
+        # joining an existing stream or a new one starts at the same frame
+        joined = service.subscribe(0, 64, 16)
+        new = service.subscribe(1, 64, 16)
+        buf.push(signal[:, :120], 0.)
+        self.assertEqual(joined.spectra()[0].shape[0], 4)
+        self.assertEqual(new.spectra()[0].shape[0], 4)
+        self.assertEqual(joined.next_end, new.next_end)
+
+        # the frames of a skipped batch are counted as dropped
+        self.assertEqual(first.dropped_frames, 0)
+        buf.push(signal[:, :32], 0.)
+        self.assertEqual(first.spectra()[0].shape[0], 2)
+        self.assertEqual(first.dropped_frames, 8)
+
+    def test_unused_streams_are_freed(self) -> None:
+        buf = RingBuffer()
+        service = StftService(buf)
+        first = service.subscribe(0, 64, 16)
+        second = service.subscribe(0, 64, 16)
+        other = service.subscribe(0, 128, 32)
+        self.assertEqual(len(service.streams), 2)
+
+        first.close()
+        other.close()
+        self.assertEqual(list(service.streams), [(0, 64, 16, "hann", 0)])
+
+        del second
+        self.assertEqual(len(service.streams), 0)
+
+    def test_band_decimation(self) -> None:
+        self.assertEqual(band_decimation(20000, 48000, 8192), 0)
+        self.assertEqual(band_decimation(2000, 48000, 8192), 3)
+        self.assertEqual(band_decimation(100, 48000, 8192), 4)
+        # the decimated frames are not shorter than 32 samples
+        self.assertEqual(band_decimation(100, 48000, 128), 2)
+
+    def test_decimated_stream_keeps_the_resolution(self) -> None:
+        buf = RingBuffer()
+        buf.set_sample_rate(48000)
+        service = StftService(buf)
+        full = service.subscribe(0, 4096, 1024)
+        decimated = service.subscribe(0, 4096, 1024, decimation=3)
+        self.assertEqual(decimated.fft_size, 512)
+        self.assertEqual(decimated.hop, 128)
+
+        t = np.arange(48000) / 48000.
+        for block in np.split(np.sin(2. * np.pi * 1000. * t), 48):
+            buf.push(block[np.newaxis, :], 0.)
+
+        full_spectra, _ = full.spectra()
+        decimated_spectra, _ = decimated.spectra()
+        # same frame rate, the decimation filter only delays the first frames
+        self.assertLessEqual(abs(len(full_spectra) - len(decimated_spectra)), 1)
+        # the tone is in the same bin, with the same level
+        self.assertEqual(np.argmax(full_spectra[-1]), np.argmax(decimated_spectra[-1]))
+        self.assertAlmostEqual(10. * np.log10(full_spectra[-1].max()),
+                               10. * np.log10(decimated_spectra[-1].max()), delta=0.5)
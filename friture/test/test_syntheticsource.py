@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.syntheticsource import SyntheticSource, SIGNALS
+
+class SyntheticSourceTest(unittest.TestCase):
+    def test_deterministic(self) -> None:
+        for signal in SIGNALS:
+            a = SyntheticSource(signal, channels=2, seed=42)
+            b = SyntheticSource(signal, channels=2, seed=42)
+            for i in range(3):
+                npt.assert_array_equal(a.read(256), b.read(256))
+
+    def test_phase_continuity(self) -> None:
+        # the tone does not depend on how it is split into blocks
+        a = SyntheticSource("chirp")
+        b = SyntheticSource("chirp")
+        npt.assert_allclose(np.hstack([a.read(100), a.read(156)]), b.read(256), atol=1e-12)
+
+    def test_shape(self) -> None:
+        source = SyntheticSource("noise", channels=3)
+        self.assertEqual(source.read(64).shape, (3, 64))
+        self.assertEqual(source.position, 64)
+        self.assertFalse(source.exhausted())
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (C) 2026 Timothée Lecomte
+
+# This file is part of Friture.
+#
+# Friture is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as published by
+# the Free Software Foundation.
+#
+# Friture is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Friture.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import numpy as np
+import numpy.testing as npt
+
+from friture.audioproc import audioproc
+from friture.signal.windows import WINDOW_NAMES, get_window, window_gains
+
+class WindowsTest(unittest.TestCase):
+    def test_windows_are_shared_and_read_only(self) -> None:
+        for name in WINDOW_NAMES:
+            window = get_window(name, 256)
+            self.assertIs(get_window(name, 256), window)
+            self.assertFalse(window.flags.writeable)
+            self.assertEqual(window.shape, (256,))
+
+    def test_gains(self) -> None:
+        npt.assert_allclose(get_window("hann", 64), np.hanning(64))
+        gains = window_gains("hann", 4096)
+        self.assertAlmostEqual(gains.coherent_gain, 0.5, places=3)
+        self.assertAlmostEqual(gains.enbw, 1.5, places=2)
+        self.assertAlmostEqual(window_gains("flattop", 4096).enbw, 3.77, places=2)
+
+    def test_tone_level_does_not_depend_on_the_window(self) -> None:
+        proc = audioproc()
+        proc.set_fftsize(1024)
+        tone = np.sin(2. * np.pi * 64. * np.arange(1024) / 1023.)
+        peaks = []
+        for name in WINDOW_NAMES:
+            proc.set_window(name)
+            peaks.append(proc.analyzelive(tone).max())
+        npt.assert_allclose(peaks, peaks[0], rtol=0.1)
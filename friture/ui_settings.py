@@ -92,7 +92,7 @@ class Ui_Settings_Dialog(object):
         self.formLayout_2.setWidget(1, QtWidgets.QFormLayout.LabelRole, self.label_historyLength)
         self.spinBox_historyLength = QtWidgets.QSpinBox(self.playbackGroup)
         self.spinBox_historyLength.setMinimum(1)
-        self.spinBox_historyLength.setMaximum(600)
+        self.spinBox_historyLength.setMaximum(14400)
         self.spinBox_historyLength.setProperty("value", 30)
         self.spinBox_historyLength.setObjectName("spinBox_historyLength")
         self.formLayout_2.setWidget(1, QtWidgets.QFormLayout.FieldRole, self.spinBox_historyLength)
@@ -111,4 +111,53 @@ def pyx_lfilter_float64_1D(
 
 
 
-    return y, z
\ No newline at end of file
+    return y, z
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def pyx_lfilter_float64_2D(
+    np.ndarray[np.float64_t, ndim=1] b not None,
+    np.ndarray[np.float64_t, ndim=1] a not None,
+    np.ndarray[np.float64_t, ndim=2] x not None,
+    np.ndarray[np.float64_t, ndim=2] zi not None):
+
+    """
+    Filter each row of a 2-D array with the same IIR or FIR filter.
+
+    This is the multi-channel counterpart of pyx_lfilter_float64_1D: x is
+    channel-major (channels, samples) and zi holds one row of initial
+    conditions per channel, of length max(len(a),len(b))-1.
+
+    Returns the filtered rows and the final filter delay values.
+    """
+
+    assert b.shape[0] == a.shape[0], "a and b must be of the same shape"
+    assert zi.shape[0] == x.shape[0], "zi must have one row per channel"
+    assert zi.shape[1] == b.shape[0]-1
+
+    cdef Py_ssize_t n_channels = x.shape[0]
+    cdef Py_ssize_t len_x = x.shape[1]
+    cdef Py_ssize_t len_b = b.shape[0]
+    cdef np.intp_t n
+    cdef np.uintp_t k
+    cdef Py_ssize_t c
+
+    cdef np.ndarray[np.float64_t, ndim=2] y = np.empty((n_channels, len_x))
+    cdef np.ndarray[np.float64_t, ndim=2] z = np.array(zi, copy=True)
+
+    for c in range(n_channels):
+        if len_b > 1:
+            for k in range(len_x):
+                y[c, k] = z[c, 0] + b[0] * x[c, k] # Calculate first delay (output)
+
+                # Fill in middle delays
+                for n in range(len_b - 2):
+                    z[c, n] = z[c, 1+n] + x[c, k] * b[1+n] - y[c, k] * a[1+n]
+
+                # Calculate last delay
+                z[c, len_b - 2] = x[c, k] * b[len_b - 1] - y[c, k] * a[len_b - 1]
+        else:
+            for k in range(len_x):
+                y[c, k] = x[c, k] * b[0]
+
+    return y, z
@@ -6,6 +6,28 @@ cimport numpy as np
 dtype = np.float64
 ctypedef np.float64_t dtype_t
 
+from libc.math cimport log2, log10
+from libc.stdint cimport uint64_t
+from libc.string cimport memcpy
+
+# log2 of the mantissa, tabulated on its 10 upper bits and linearly interpolated,
+# since the libm log10 is several times slower than the lookup itself
+cdef enum:
+    LOG2_TABLE_BITS = 10
+cdef double LOG2_TABLE[(1 << LOG2_TABLE_BITS) + 1]
+cdef int _i
+for _i in range((1 << LOG2_TABLE_BITS) + 1):
+    LOG2_TABLE[_i] = log2(1. + _i / <double>(1 << LOG2_TABLE_BITS))
+
+# for positive, normal doubles only
+cdef inline double fast_log2(double x) nogil:
+    cdef uint64_t bits
+    memcpy(&bits, &x, sizeof(double))
+    cdef int exponent = <int>((bits >> 52) & 0x7ff) - 1023
+    cdef uint64_t index = (bits >> (52 - LOG2_TABLE_BITS)) & ((1 << LOG2_TABLE_BITS) - 1)
+    cdef double fraction = <double>(bits & ((<uint64_t>1 << (52 - LOG2_TABLE_BITS)) - 1)) / <double>(<uint64_t>1 << (52 - LOG2_TABLE_BITS))
+    return exponent + LOG2_TABLE[index] + fraction * (LOG2_TABLE[index + 1] - LOG2_TABLE[index])
+
 cimport cython
 @cython.boundscheck(False)
 @cython.wraparound(False)
@@ -50,3 +72,47 @@ def pyx_rgb_from_float_2D(np.ndarray[np.uint32_t, ndim=2] lut not None,
                 out[i, j, k] = lut[l, k]
     
     return out
+
+# fused conversion of a power spectrogram to colors, in a single pass:
+# 10 * log10(power) + weighting[row], scaled from [spec_min, spec_max] to the
+# lut entries, clipped, and looked up into 'out' (which may be any view, for
+# example the rows of the destination image)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def pyx_color_from_power_2D(np.ndarray[np.uint32_t, ndim=1] lut not None,
+                            np.ndarray[np.float64_t, ndim=2] power not None,
+                            np.ndarray[np.float64_t, ndim=1] weighting not None,
+                            dtype_t spec_min,
+                            dtype_t spec_max,
+                            np.ndarray[np.uint32_t, ndim=2] out not None):
+    cdef np.intp_t i, j, k
+    cdef Py_ssize_t M = power.shape[0]
+    cdef Py_ssize_t N = power.shape[1]
+    cdef Py_ssize_t last = lut.shape[0] - 1
+    cdef dtype_t epsilon = 1e-30
+    cdef dtype_t scale = 0.
+    cdef dtype_t slope, offset, x
+
+    if out.shape[0] != M or out.shape[1] != N or weighting.shape[0] != M:
+        raise ValueError("The power, weighting and output shapes do not match")
+
+    if spec_max > spec_min:
+        scale = last / (spec_max - spec_min)
+
+    # 10 * log10(p) = 10 * log10(2) * log2(p)
+    slope = 10. * log10(2.) * scale
+
+    for i in range(M):
+        offset = (weighting[i] - spec_min) * scale
+        for j in range(N):
+            x = fast_log2(power[i, j] + epsilon) * slope + offset
+            if x <= 0.:
+                k = 0
+            elif x >= last:
+                k = last
+            else:
+                k = <np.intp_t> x
+            out[i, j] = lut[k]
+
+    return out
@@ -21,9 +21,6 @@ import numpy
 ext_modules = [Extension("friture_extensions.exp_smoothing_conv",
                     ["friture_extensions/exp_smoothing_conv.pyx"],
                     include_dirs=[numpy.get_include()]),
-               Extension("friture_extensions.linear_interp",
-                    ["friture_extensions/linear_interp.pyx"],
-                    include_dirs=[numpy.get_include()]),
                Extension("friture_extensions.lookup_table",
                     ["friture_extensions/lookup_table.pyx"],
                     include_dirs=[numpy.get_include()]),